@@ -0,0 +1,189 @@
+"""
+Replays reactions and command bursts through the src/bot.py handlers in real time, reporting handler
+latency and event loop lag. Discord, LeetCode and OpenAI are replaced by in-memory fakes.
+
+Usage: python -m benchmarks.bot_load --reactions-per-minute 10000 --seconds 30
+"""
+
+import argparse
+import asyncio
+import logging
+import os
+import random
+import statistics
+import tempfile
+import time
+from collections import defaultdict
+from dataclasses import dataclass, field
+from typing import Awaitable, Dict, List
+
+from src.internal.leetcode_bot_logic import LeetcodeBot
+from src.internal.message_queue import MessageQueue
+from src.internal.scheduler_store import SchedulerStore
+from src.internal.stats import QUESTION_COMPLETE_EMOJIS, StatsManager
+from tests.test_utils.fake_discord import FakeDiscord
+from tests.test_utils.fakes import (
+    FakeLeetcodeClient,
+    FakeOpenAIClient,
+    FakeQuestionBankManager,
+)
+
+EMOJIS = QUESTION_COMPLETE_EMOJIS + ["👍", "🔥", "😭"]
+BURST_COMMANDS = ["stats", "listSchedulers", "botStats", "listQuestionBanks"]
+LAG_SAMPLE_SECONDS = 0.01
+
+
+@dataclass
+class LoadResult:
+    seconds: float
+    latencies: Dict[str, List[float]] = field(
+        default_factory=lambda: defaultdict(list)
+    )  # handler -> seconds
+    loop_lags: List[float] = field(default_factory=list)  # seconds
+
+
+def _percentile(values: List[float], percentile: float) -> float:
+    if not values:
+        return 0.0
+    values = sorted(values)
+    return values[min(len(values) - 1, int(len(values) * percentile))]
+
+
+async def _monitor_loop_lag(lags: List[float]):
+    # A sleep overshooting its deadline means something held the loop
+    while True:
+        start = time.perf_counter()
+        await asyncio.sleep(LAG_SAMPLE_SECONDS)
+        lags.append(time.perf_counter() - start - LAG_SAMPLE_SECONDS)
+
+
+async def run_load(
+    reactions_per_minute: int,
+    seconds: float,
+    burst_size: int,
+    burst_interval: float,
+    num_users: int,
+    num_posts: int,
+    seed: int = 0,
+) -> LoadResult:
+    state_dir = tempfile.TemporaryDirectory()
+    rng = random.Random(seed)
+    lc_bot = LeetcodeBot(
+        leetcode_client=FakeLeetcodeClient(),
+        openai_client=FakeOpenAIClient(),
+        question_bank_manager=FakeQuestionBankManager(),
+        stats=StatsManager(),
+        message_queue=MessageQueue(rate=1e9, capacity=10**9),  # Discord isn't real
+        scheduler_store=SchedulerStore(
+            os.path.join(state_dir.name, "schedulers.jsonl")
+        ),
+    )
+    users = [f"load-user-{i}" for i in range(num_users)]
+    result = LoadResult(seconds)
+
+    async with FakeDiscord(lc_bot, users) as discord:
+        lc_bot.start_background_tasks()
+        for i in range(num_posts):
+            await discord.command("post", f"https://leetcode.com/problems/load-{i}/")
+        post_ids = [message.id for message in discord.main_channel.messages]
+
+        async def timed(name: str, handler: Awaitable):
+            start = time.perf_counter()
+            await handler
+            result.latencies[name].append(time.perf_counter() - start)
+
+        # Each user reacts or unreacts, so removes only follow adds
+        reacted = set()
+
+        def next_reaction():
+            user, post_id, emoji = (
+                rng.choice(users),
+                rng.choice(post_ids),
+                rng.choice(EMOJIS),
+            )
+            key = (user, post_id, emoji)
+            remove = key in reacted
+            (reacted.remove if remove else reacted.add)(key)
+            name = "reaction_remove" if remove else "reaction_add"
+            return name, discord.react(user, post_id, emoji, remove=remove)
+
+        monitor = asyncio.create_task(_monitor_loop_lag(result.loop_lags))
+        tasks = set()
+
+        def spawn(name: str, handler: Awaitable):
+            task = asyncio.create_task(timed(name, handler))
+            tasks.add(task)
+            task.add_done_callback(tasks.discard)
+
+        reaction_interval = 60 / reactions_per_minute
+        start = time.perf_counter()
+        next_reaction_time = next_burst_time = start
+        while (now := time.perf_counter()) - start < seconds:
+            # Catch up on everything due, like a burst of gateway events after a stall
+            while next_reaction_time <= now:
+                spawn(*next_reaction())
+                next_reaction_time += reaction_interval
+            if next_burst_time <= now:
+                for _ in range(burst_size):
+                    command = rng.choice(BURST_COMMANDS)
+                    spawn(f"!{command}", discord.command(command))
+                next_burst_time += burst_interval
+            await asyncio.sleep(
+                max(0.0, min(next_reaction_time, next_burst_time) - time.perf_counter())
+            )
+
+        await asyncio.gather(*tasks)
+        monitor.cancel()
+        lc_bot.loop_watchdog.stop()
+
+    state_dir.cleanup()
+    return result
+
+
+def format_result(result: LoadResult) -> str:
+    lines = [f"Ran for {result.seconds:.0f}s"]
+    for name, latencies in sorted(result.latencies.items()):
+        lines.append(
+            f"{name}: {len(latencies)} calls ({len(latencies) / result.seconds * 60:.0f}/min), "
+            f"p50 {_percentile(latencies, 0.5) * 1e3:.3f}ms, "
+            f"p99 {_percentile(latencies, 0.99) * 1e3:.3f}ms, "
+            f"max {max(latencies) * 1e3:.3f}ms"
+        )
+    lags = result.loop_lags
+    lines.append(
+        f"Event loop lag: mean {statistics.fmean(lags or [0]) * 1e3:.3f}ms, "
+        f"p50 {_percentile(lags, 0.5) * 1e3:.3f}ms, "
+        f"p99 {_percentile(lags, 0.99) * 1e3:.3f}ms, "
+        f"max {max(lags or [0]) * 1e3:.3f}ms"
+    )
+    return "\n".join(lines)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--reactions-per-minute", type=int, default=10_000)
+    parser.add_argument("--seconds", type=float, default=30)
+    parser.add_argument("--burst-size", type=int, default=20)
+    parser.add_argument("--burst-interval", type=float, default=5)
+    parser.add_argument("--users", type=int, default=500)
+    parser.add_argument("--posts", type=int, default=50)
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.WARNING)
+    result = asyncio.run(
+        run_load(
+            args.reactions_per_minute,
+            args.seconds,
+            args.burst_size,
+            args.burst_interval,
+            args.users,
+            args.posts,
+            args.seed,
+        )
+    )
+    print(format_result(result))
+
+
+if __name__ == "__main__":
+    main()
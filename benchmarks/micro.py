@@ -0,0 +1,328 @@
+"""
+Micro-benchmarks for core data paths, parametrized by data size. Results can be saved as a JSON baseline and later
+runs compared against it, flagging slowdowns beyond a threshold.
+
+Usage:
+    python -m benchmarks.micro --save benchmarks/baselines/micro.json
+    python -m benchmarks.micro --compare benchmarks/baselines/micro.json --threshold 0.25
+"""
+
+import argparse
+import asyncio
+import functools
+import gc
+import json
+import logging
+import os
+import platform
+import random
+import statistics
+import sys
+import time
+from dataclasses import dataclass
+from datetime import datetime, timedelta
+from typing import Callable, Dict, List, Optional
+
+from src.internal.date_generator import DateGenerator
+from src.internal.question_bank import Question, QuestionBank
+from src.internal.question_bank_manager import QuestionBankManager
+from src.internal.stats import QUESTION_COMPLETE_EMOJIS, StatsManager
+from src.utils.clock import VirtualClock
+from src.utils.string_utils import parse_date_str
+from src.utils.text import get_stats_text
+
+DEFAULT_BASELINE = "benchmarks/baselines/micro.json"
+EMOJIS = QUESTION_COMPLETE_EMOJIS + ["👍", "🔥", "😭"]
+MIN_REPEAT_SECONDS = 0.05  # Calibrate ops per repeat to take at least this long
+
+
+@dataclass
+class Benchmark:
+    name: str
+    params: List  # Data size, or another case to run
+    # (param, number) -> seconds taken by number ops, setup excluded
+    run: Callable[[object, int], float]
+    quick_params: Optional[List] = None  # Subset run with --quick, all if None
+
+
+def _question_urls(n: int) -> List[str]:
+    return [f"https://leetcode.com/problems/question-{i}/" for i in range(n)]
+
+
+@functools.cache
+def _make_stats(num_users: int) -> StatsManager:
+    """
+    Manager with num_users users and 10 posts, reused between runs
+    """
+    stats = StatsManager()
+
+    async def init():
+        await stats.init([f"user-{i}" for i in range(num_users)])
+        for post_id in range(10):
+            await stats.handle_new_post(post_id)
+
+    asyncio.run(init())
+    return stats
+
+
+_banks: Dict[int, QuestionBank] = {}
+
+
+def bench_get_random_question_url(size: int, number: int) -> float:
+    elapsed = 0.0
+    while number > 0:
+        # Sampling marks questions posted, so refill the bank once half is used
+        bank = _banks.get(size)
+        if bank is None or len(bank._unposted) <= size // 2:
+            bank = _banks[size] = QuestionBank(
+                "bench.csv",
+                [Question(url) for url in _question_urls(size)],
+                datetime.now(),
+            )
+        batch = min(number, len(bank._unposted) - size // 2)
+        start = time.perf_counter()
+        for _ in range(batch):
+            bank.get_random_question_url()
+        elapsed += time.perf_counter() - start
+        number -= batch
+    return elapsed
+
+
+def bench_log_user_reaction_add(size: int, number: int) -> float:
+    stats = _make_stats(size)
+    rng = random.Random(0)
+    reactions = [
+        (f"user-{rng.randrange(size)}", rng.randrange(10), rng.choice(EMOJIS))
+        for _ in range(min(number, 100_000))
+    ]
+
+    async def run() -> float:
+        start = time.perf_counter()
+        for i in range(number):
+            await stats.log_user_reaction_add(*reactions[i % len(reactions)])
+        return time.perf_counter() - start
+
+    return asyncio.run(run())
+
+
+def bench_get_user_stats(size: int, number: int) -> float:
+    stats = _make_stats(size)
+
+    async def run() -> float:
+        start = time.perf_counter()
+        for _ in range(number):
+            await stats.get_user_stats()
+        return time.perf_counter() - start
+
+    return asyncio.run(run())
+
+
+def bench_get_stats_text(size: int, number: int) -> float:
+    user_stats = asyncio.run(_make_stats(size).get_user_stats())
+    start = time.perf_counter()
+    for _ in range(number):
+        get_stats_text(user_stats)
+    return time.perf_counter() - start
+
+
+def bench_date_generator_call(num_days: int, number: int) -> float:
+    clock = VirtualClock(datetime(2025, 1, 1))
+    date_generator = DateGenerator(
+        list(range(num_days)), datetime(2025, 1, 1, 9).time(), clock
+    )
+    start = time.perf_counter()
+    for _ in range(number):
+        clock.advance(timedelta(hours=12))  # Posts on about half the calls
+        date_generator()
+    return time.perf_counter() - start
+
+
+PARSE_DATE_CASES = {
+    "time": "9:30",
+    "iso": "2025-06-21-14:30",
+    "short_month": "Jun 21, 2025 14:30",
+    "full_month": "June 21, 2025 14:30",
+}
+
+
+def bench_parse_date_str(case: str, number: int) -> float:
+    clock = VirtualClock(datetime(2025, 1, 1))
+    date_str = PARSE_DATE_CASES[case]
+    start = time.perf_counter()
+    for _ in range(number):
+        parse_date_str(date_str, clock)
+    return time.perf_counter() - start
+
+
+def bench_csv_to_question_bank(size: int, number: int) -> float:
+    lines = [f"{url},{i % 3 == 0}\n" for i, url in enumerate(_question_urls(size))]
+    start = time.perf_counter()
+    for _ in range(number):
+        QuestionBankManager._csv_to_question_bank("bench.csv", lines)
+    return time.perf_counter() - start
+
+
+BANK_SIZES = [100, 10_000, 1_000_000]
+USER_COUNTS = [10, 1_000, 100_000]
+
+BENCHMARKS = [
+    Benchmark(
+        "QuestionBank.get_random_question_url",
+        BANK_SIZES,
+        bench_get_random_question_url,
+        quick_params=BANK_SIZES[:2],
+    ),
+    Benchmark(
+        "StatsManager.log_user_reaction_add",
+        USER_COUNTS,
+        bench_log_user_reaction_add,
+        quick_params=USER_COUNTS[:2],
+    ),
+    Benchmark(
+        "StatsManager.get_user_stats",
+        USER_COUNTS,
+        bench_get_user_stats,
+        quick_params=USER_COUNTS[:2],
+    ),
+    Benchmark(
+        "get_stats_text",
+        USER_COUNTS,
+        bench_get_stats_text,
+        quick_params=USER_COUNTS[:2],
+    ),
+    Benchmark("DateGenerator.__call__", [1, 7], bench_date_generator_call),
+    Benchmark("parse_date_str", list(PARSE_DATE_CASES), bench_parse_date_str),
+    Benchmark(
+        "QuestionBankManager._csv_to_question_bank",
+        BANK_SIZES,
+        bench_csv_to_question_bank,
+        quick_params=BANK_SIZES[:2],
+    ),
+]
+
+
+def measure(benchmark: Benchmark, param, repeats: int) -> Dict[str, float]:
+    """
+    Returns seconds per op, the median and min over repeats
+    """
+    number = 1
+    while (elapsed := benchmark.run(param, number)) < MIN_REPEAT_SECONDS:
+        number *= 2 if elapsed == 0 else max(2, int(MIN_REPEAT_SECONDS / elapsed))
+    # Calibration runs double as warm up, and aren't counted
+    per_op = [benchmark.run(param, number) / number for _ in range(repeats)]
+    return {
+        "median": statistics.median(per_op),
+        "min": min(per_op),
+        "number": number,
+    }
+
+
+def run_benchmarks(
+    name_filter: Optional[str], quick: bool, repeats: int
+) -> Dict[str, Dict[str, float]]:
+    results = {}
+    for benchmark in BENCHMARKS:
+        if name_filter and name_filter not in benchmark.name:
+            continue
+        params = (
+            benchmark.quick_params
+            if quick and benchmark.quick_params
+            else benchmark.params
+        )
+        for param in params:
+            key = f"{benchmark.name}[{param}]"
+            gc.collect()  # Don't bill garbage from the last benchmark to this one
+            results[key] = measure(benchmark, param, repeats)
+            print(f"{key}: {_format_seconds(results[key]['median'])}/op", flush=True)
+    return results
+
+
+def compare(
+    results: Dict[str, Dict[str, float]],
+    baseline: Dict[str, Dict[str, float]],
+    threshold: float,
+) -> List[str]:
+    """
+    Prints each result against the baseline, returns keys slower than it by more than threshold (a fraction)
+    """
+    regressions = []
+    for key, result in results.items():
+        if key not in baseline:
+            print(f"{key}: no baseline")
+            continue
+        # Medians are noisy on shared machines, compare the best runs
+        ratio = result["min"] / baseline[key]["min"]
+        flag = ""
+        if ratio > 1 + threshold:
+            flag = "  <-- SLOWER"
+            regressions.append(key)
+        elif ratio < 1 / (1 + threshold):
+            flag = "  (faster)"
+        print(
+            f"{key}: {_format_seconds(baseline[key]['min'])} -> "
+            f"{_format_seconds(result['min'])} ({ratio:.2f}x){flag}"
+        )
+    return regressions
+
+
+def _format_seconds(seconds: float) -> str:
+    for unit, scale in [("s", 1), ("ms", 1e-3), ("us", 1e-6)]:
+        if seconds >= scale:
+            return f"{seconds / scale:.2f}{unit}"
+    return f"{seconds / 1e-9:.0f}ns"
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--filter", help="Only run benchmarks with this in their name")
+    parser.add_argument("--quick", action="store_true", help="Skip the largest sizes")
+    parser.add_argument("--repeats", type=int, default=5)
+    parser.add_argument(
+        "--save", nargs="?", const=DEFAULT_BASELINE, help="Save results as a baseline"
+    )
+    parser.add_argument(
+        "--compare",
+        nargs="?",
+        const=DEFAULT_BASELINE,
+        help="Compare against a baseline",
+    )
+    parser.add_argument(
+        "--threshold",
+        type=float,
+        default=0.25,
+        help="Slowdown fraction flagged when comparing",
+    )
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.WARNING)
+    results = run_benchmarks(args.filter, args.quick, args.repeats)
+
+    if args.save:
+        os.makedirs(os.path.dirname(args.save) or ".", exist_ok=True)
+        with open(args.save, mode="w", encoding="utf-8") as file:
+            json.dump(
+                {
+                    "python": sys.version.split()[0],
+                    "platform": platform.platform(),
+                    "created": datetime.now().isoformat(timespec="seconds"),
+                    "results": results,
+                },
+                file,
+                indent=2,
+            )
+        print(f"Saved baseline to {args.save}")
+
+    if args.compare:
+        with open(args.compare, mode="r", encoding="utf-8") as file:
+            baseline = json.load(file)["results"]
+        print(f"\nCompared to {args.compare}:")
+        regressions = compare(results, baseline, args.threshold)
+        if regressions:
+            print(
+                f"{len(regressions)} benchmarks slower than baseline by over {args.threshold:.0%}"
+            )
+            sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
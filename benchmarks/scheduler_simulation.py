@@ -0,0 +1,201 @@
+"""
+Runs LeetcodeBot.handle_check_for_schedulers over simulated time with many concurrent campaigns.
+LeetCode, OpenAI and Discord are replaced by in-memory fakes, and time is a VirtualClock that jumps
+straight to the next scheduler tick with something due, so a simulated year takes seconds.
+
+Usage: python -m benchmarks.scheduler_simulation --campaigns 200 --days 365
+"""
+
+import argparse
+import asyncio
+import heapq
+import logging
+import os
+import random
+import statistics
+import tempfile
+import time
+from collections import Counter
+from dataclasses import dataclass, field
+from datetime import datetime, timedelta
+from typing import List, Tuple
+
+from src.internal.leetcode_bot_logic import LeetcodeBot
+from src.internal.message_queue import MessageQueue
+from src.internal.posts import Scheduler
+from src.internal.scheduler_store import SchedulerStore
+from src.internal.stats import StatsManager
+from src.types.command_inputs import CampaignCommandArgs
+from src.utils.clock import VirtualClock
+import src.internal.settings as settings
+from tests.test_utils.fakes import (
+    FakeChannel,
+    FakeLeetcodeClient,
+    FakeOpenAIClient,
+    FakeQuestionBankManager,
+)
+
+DAY_CODES = ["Mo", "Tu", "We", "Th", "Fr", "Sa", "Su"]
+START_DATE = datetime(2025, 1, 1)
+
+
+@dataclass
+class SimulationResult:
+    num_days: int
+    posts_per_day: Counter = field(default_factory=Counter)  # date -> posts
+    drifts: List[float] = field(default_factory=list)  # seconds late, per due post
+    event_tick_cpu: List[float] = field(default_factory=list)  # seconds
+    idle_tick_cpu: List[float] = field(default_factory=list)  # seconds
+    wall_time: float = 0.0
+    restore_time: float = 0.0  # seconds, to restore all schedulers after the run
+    num_restored: int = 0
+
+
+def _percentile(values: List[float], percentile: float) -> float:
+    if not values:
+        return 0.0
+    values = sorted(values)
+    return values[min(len(values) - 1, int(len(values) * percentile))]
+
+
+def _random_campaign_args(rng: random.Random, i: int) -> CampaignCommandArgs:
+    days = rng.sample(DAY_CODES, rng.randint(1, 7))
+    return CampaignCommandArgs(
+        time_str=f"{rng.randrange(24)}:{rng.randrange(60):02}",
+        days_str="".join(days),
+        question_bank_name=f"bank{i}",
+        length=-1,
+        story_prompt="A simulated story" if rng.random() < 0.5 else None,
+    )
+
+
+async def simulate(
+    num_campaigns: int, num_days: int, tick_seconds: int, seed: int = 0
+) -> SimulationResult:
+    settings.initialize(dev_mode=False)  # Dev mode posts campaigns on every tick
+    state_dir = tempfile.TemporaryDirectory()
+    rng = random.Random(seed)
+    clock = VirtualClock(START_DATE)
+    main_channel, bot_channel = FakeChannel(1), FakeChannel(2)
+    lc_bot = LeetcodeBot(
+        clock=clock,
+        leetcode_client=FakeLeetcodeClient(),
+        openai_client=FakeOpenAIClient(),
+        question_bank_manager=FakeQuestionBankManager(),
+        stats=StatsManager(),
+        message_queue=MessageQueue(rate=1e9, capacity=10**9),  # Discord isn't real
+        scheduler_store=SchedulerStore(
+            os.path.join(state_dir.name, "schedulers.jsonl")
+        ),
+    )
+    await lc_bot.init(main_channel, bot_channel, members=["sim-user"])
+    for i in range(num_campaigns):
+        await lc_bot.handle_campaign(_random_campaign_args(rng, i))
+
+    result = SimulationResult(num_days)
+    end = START_DATE + timedelta(days=num_days)
+    tick = timedelta(seconds=tick_seconds)
+    # The bot loop isn't aligned to post times
+    tick_origin = START_DATE + timedelta(seconds=rng.uniform(0, tick_seconds))
+    last_idle_sample = None
+    wall_start = time.perf_counter()
+
+    # (next post time, id, scheduler), only refreshed for schedulers that were due
+    upcoming: List[Tuple[datetime, int, Scheduler]] = []
+
+    def push(scheduler: Scheduler):
+        if times := scheduler.upcoming_post_times(1):
+            heapq.heappush(upcoming, (times[0], scheduler.id, scheduler))
+
+    for scheduler in lc_bot.schedulers:
+        push(scheduler)
+
+    while upcoming:
+        # The bot loop only checks once a tick, so posts go out on the first tick after they're due
+        ticks = -(-(upcoming[0][0] - tick_origin) // tick)  # Ceiling division
+        clock.set(tick_origin + ticks * tick)
+        now = clock.now()
+        if now >= end:
+            break
+
+        due = []
+        while upcoming and upcoming[0][0] <= now:
+            due.append(heapq.heappop(upcoming))
+        num_posts = len(main_channel.messages)
+
+        cpu_start = time.process_time()
+        await lc_bot.handle_check_for_schedulers()
+        result.event_tick_cpu.append(time.process_time() - cpu_start)
+
+        result.posts_per_day[now.date()] += len(main_channel.messages) - num_posts
+        result.drifts.extend((now - target).total_seconds() for target, _, _ in due)
+        active = set(map(id, lc_bot.schedulers))
+        for _, _, scheduler in due:
+            if id(scheduler) in active:
+                push(scheduler)
+
+        # The real loop also ticks when nothing is due, sample one of those a day
+        if last_idle_sample != now.date():
+            last_idle_sample = now.date()
+            cpu_start = time.process_time()
+            await lc_bot.handle_check_for_schedulers()
+            result.idle_tick_cpu.append(time.process_time() - cpu_start)
+
+    result.wall_time = time.perf_counter() - wall_start
+
+    # Restart from the saved state
+    restarted = LeetcodeBot(
+        clock=clock,
+        leetcode_client=FakeLeetcodeClient(),
+        openai_client=FakeOpenAIClient(),
+        question_bank_manager=FakeQuestionBankManager(),
+        stats=StatsManager(),
+        scheduler_store=SchedulerStore(lc_bot.scheduler_store.path),
+    )
+    restore_start = time.perf_counter()
+    await restarted.restore_schedulers()
+    result.restore_time = time.perf_counter() - restore_start
+    result.num_restored = len(restarted.schedulers)
+
+    state_dir.cleanup()
+    return result
+
+
+def format_result(result: SimulationResult, tick_seconds: int) -> str:
+    posts = [
+        result.posts_per_day.get(START_DATE.date() + timedelta(days=d), 0)
+        for d in range(result.num_days)
+    ]
+    ticks_per_day = 24 * 60 * 60 // tick_seconds
+    idle_cpu = statistics.fmean(result.idle_tick_cpu) if result.idle_tick_cpu else 0.0
+    return "\n".join(
+        [
+            f"Simulated {result.num_days} days in {result.wall_time:.2f}s",
+            f"Posts per day: mean {statistics.fmean(posts):.1f}, min {min(posts)}, max {max(posts)}, total {sum(posts)}",
+            f"Drift from target: mean {statistics.fmean(result.drifts or [0]):.1f}s, "
+            f"p99 {_percentile(result.drifts, 0.99):.1f}s, max {max(result.drifts or [0]):.1f}s",
+            f"CPU per posting tick: mean {statistics.fmean(result.event_tick_cpu or [0]) * 1e3:.3f}ms, "
+            f"p99 {_percentile(result.event_tick_cpu, 0.99) * 1e3:.3f}ms, max {max(result.event_tick_cpu or [0]) * 1e3:.3f}ms",
+            f"CPU per idle tick: mean {idle_cpu * 1e3:.3f}ms ({idle_cpu * ticks_per_day:.2f}s/day at {ticks_per_day} ticks/day)",
+            f"Restored {result.num_restored} schedulers in {result.restore_time * 1e3:.1f}ms",
+        ]
+    )
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--campaigns", type=int, default=200)
+    parser.add_argument("--days", type=int, default=365)
+    parser.add_argument("--tick-seconds", type=int, default=60)
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.WARNING)
+    result = asyncio.run(
+        simulate(args.campaigns, args.days, args.tick_seconds, args.seed)
+    )
+    print(format_result(result, args.tick_seconds))
+
+
+if __name__ == "__main__":
+    main()
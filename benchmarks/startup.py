@@ -0,0 +1,175 @@
+"""
+Measures cold start time to on_ready, in fresh processes, with per module import times. Each run imports src.bot
+and does what on_ready does (indexing question banks, restoring campaigns, sending the ready message) against
+generated state. Discord is an in-memory fake, so gateway login time isn't included.
+
+Usage: python -m benchmarks.startup --runs 5 --banks 20 --campaigns 50
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from datetime import datetime, time as dt_time, timedelta
+from typing import Dict, List
+
+# In the child, startup is timed from here, interpreter startup is only in the parent's wall time
+CHILD_STARTED_AT = time.perf_counter()
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+HEAVY_MODULES = ["openai", "boto3", "requests", "pytz", "aiohttp.web"]
+
+
+def write_state(state_dir: str, num_banks: int, num_questions: int, num_campaigns: int):
+    """
+    Question banks and a scheduler log of campaigns, as they'd be on disk after a restart
+    """
+    from src.constants.config import QUESTION_BANK_DIR, SCHEDULER_STATE_FILE
+    from src.internal.scheduler_store import SchedulerStore
+    from src.types.scheduler_specs import CampaignSpec
+
+    bank_dir = os.path.join(state_dir, QUESTION_BANK_DIR)
+    os.makedirs(bank_dir, exist_ok=True)
+    for bank in range(num_banks):
+        with open(os.path.join(bank_dir, f"bank-{bank}.csv"), "w") as file:
+            for i in range(num_questions):
+                file.write(
+                    f"https://leetcode.com/problems/bank-{bank}-question-{i}/,{i % 3 == 0}\n"
+                )
+
+    store = SchedulerStore(os.path.join(state_dir, SCHEDULER_STATE_FILE))
+    next_date = datetime.now() + timedelta(days=1)
+    specs = [
+        CampaignSpec(
+            id=i,
+            question_bank_name=f"bank-{i % num_banks}.csv",
+            days=[0, 2, 4],
+            time=dt_time(9),
+            length=-1,
+            repeats=-1,
+            next_date=next_date,
+            story_prompt="A startup benchmark story",
+        )
+        for i in range(num_campaigns)
+    ]
+    asyncio.run(store.save(specs))
+
+
+async def _start_bot() -> Dict[str, float]:
+    import_started_at = time.perf_counter()
+    import src.bot
+    import src.internal.settings as settings
+    from tests.test_utils.fake_discord import FakeDiscord
+
+    imported_at = time.perf_counter()
+
+    settings.initialize(dev_mode=False)
+    lc_bot = src.bot.lc_bot
+    # What on_ready does, with the members a guild fetch would return
+    async with FakeDiscord(lc_bot, [f"user-{i}" for i in range(100)]):
+        lc_bot.start_background_tasks()
+        await lc_bot.send("Hello! LC-Bot is ready!", src.bot.Channel.BOT)
+        ready_at = time.perf_counter()
+        lc_bot.loop_watchdog.stop()
+
+    return {
+        "before_import": import_started_at - CHILD_STARTED_AT,
+        "import": imported_at - import_started_at,
+        "on_ready": ready_at - imported_at,
+        "total": ready_at - CHILD_STARTED_AT,
+        "num_schedulers": len(lc_bot.schedulers),
+        **{f"loaded:{name}": float(name in sys.modules) for name in HEAVY_MODULES},
+    }
+
+
+def run_child():
+    result = asyncio.run(_start_bot())
+    print(json.dumps(result), flush=True)
+
+
+def parse_import_times(stderr: str) -> Dict[str, float]:
+    """
+    Module -> cumulative import seconds, from -X importtime output
+    """
+    times = {}
+    for line in stderr.splitlines():
+        if not line.startswith("import time:") or "cumulative" in line:
+            continue
+        _, cumulative, name = line[len("import time:") :].split("|")
+        times[name.strip()] = int(cumulative) / 1e6  # microseconds
+    return times
+
+
+def run_once(state_dir: str) -> Dict:
+    env = {**os.environ, "PYTHONPATH": REPO_ROOT}
+    started_at = time.perf_counter()
+    process = subprocess.run(
+        [sys.executable, "-X", "importtime", "-m", "benchmarks.startup", "--child"],
+        cwd=state_dir,
+        env=env,
+        capture_output=True,
+        text=True,
+        check=True,
+    )
+    wall = time.perf_counter() - started_at
+    result = json.loads(process.stdout.strip().splitlines()[-1])
+    result["wall"] = wall  # Includes interpreter startup and exit
+    result["import_times"] = parse_import_times(process.stderr)
+    return result
+
+
+def format_results(results: List[Dict], top: int) -> str:
+    def median(key: str) -> float:
+        return statistics.median(result[key] for result in results)
+
+    lines = [
+        f"{len(results)} runs, {results[0]['num_schedulers']:.0f} schedulers restored, medians:",
+        f"  process wall time {median('wall') * 1e3:.0f}ms",
+        f"  import src.bot {median('import') * 1e3:.0f}ms",
+        f"  on_ready work {median('on_ready') * 1e3:.0f}ms",
+        f"  time to on_ready {median('total') * 1e3:.0f}ms (after interpreter startup)",
+        "  heavy modules loaded by on_ready: "
+        + (", ".join(m for m in HEAVY_MODULES if results[0][f"loaded:{m}"]) or "none"),
+        f"Slowest top level imports, cumulative (-X importtime, last run), top {top}:",
+    ]
+    import_times = results[-1]["import_times"]
+    # Top level packages, their submodules are already counted in them
+    top_level = {
+        name: seconds for name, seconds in import_times.items() if "." not in name
+    }
+    for name, seconds in sorted(top_level.items(), key=lambda x: -x[1])[:top]:
+        lines.append(f"  {name}: {seconds * 1e3:.1f}ms")
+    ours = {n: s for n, s in import_times.items() if n.startswith("src.")}
+    lines.append("Project modules, cumulative:")
+    for name, seconds in sorted(ours.items(), key=lambda x: -x[1])[:top]:
+        lines.append(f"  {name}: {seconds * 1e3:.1f}ms")
+    return "\n".join(lines)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--runs", type=int, default=5)
+    parser.add_argument("--banks", type=int, default=20)
+    parser.add_argument("--questions", type=int, default=2000, help="Per bank")
+    parser.add_argument("--campaigns", type=int, default=50)
+    parser.add_argument("--top", type=int, default=10)
+    parser.add_argument("--child", action="store_true", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.child:
+        run_child()
+        return
+
+    with tempfile.TemporaryDirectory() as state_dir:
+        write_state(state_dir, args.banks, args.questions, args.campaigns)
+        results = [run_once(state_dir) for _ in range(args.runs)]
+    print(format_results(results, args.top))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,188 @@
+"""
+Measures end to end post latency as LeetCode and OpenAI slow down. The real clients talk to the local stand-in
+servers in tests/test_utils/fake_servers.py, which inject latency, errors and throttling. Discord is an in-memory fake.
+
+Usage: python -m benchmarks.upstream_latency --latencies-ms 0 50 200 500 --posts 20
+"""
+
+import argparse
+import asyncio
+import logging
+import os
+import statistics
+import tempfile
+import time
+from dataclasses import dataclass, field
+from datetime import datetime, timedelta
+from typing import List
+
+from src.internal.leetcode_bot_logic import Channel, LeetcodeBot
+from src.internal.message_queue import MessageQueue
+from src.internal.scheduler_store import SchedulerStore
+from src.internal.stats import StatsManager
+from src.types.command_inputs import CampaignCommandArgs, PostCommandArgs
+from src.utils.clock import VirtualClock
+from src.utils.leetcode_client import LeetcodeClient, question_metadata_cache
+from src.utils.openai_client import OpenAIClient
+from src.utils.response_cache import ResponseCache
+import src.internal.settings as settings
+from tests.test_utils.fake_servers import (
+    FakeLeetcodeServer,
+    FakeOpenAIServer,
+    FaultInjection,
+    ServerThread,
+)
+from tests.test_utils.fakes import FakeChannel, FakeQuestionBankManager
+
+START_DATE = datetime(2025, 1, 1, 8)
+LAG_SAMPLE_SECONDS = 0.01
+
+
+@dataclass
+class LatencyResult:
+    upstream_latency: float  # seconds
+    post_latencies: List[float] = field(default_factory=list)  # !post, seconds
+    story_post_latencies: List[float] = field(
+        default_factory=list
+    )  # Campaign with a story, seconds
+    num_failed: int = 0
+    loop_lags: List[float] = field(default_factory=list)  # seconds
+    num_leetcode_requests: int = 0
+    num_openai_requests: int = 0
+
+
+def _percentile(values: List[float], percentile: float) -> float:
+    if not values:
+        return 0.0
+    values = sorted(values)
+    return values[min(len(values) - 1, int(len(values) * percentile))]
+
+
+async def _monitor_loop_lag(lags: List[float]):
+    # A sleep overshooting its deadline means something held the loop
+    while True:
+        start = time.perf_counter()
+        await asyncio.sleep(LAG_SAMPLE_SECONDS)
+        lags.append(time.perf_counter() - start - LAG_SAMPLE_SECONDS)
+
+
+async def measure(
+    faults: FaultInjection, num_posts: int, state_dir: str
+) -> LatencyResult:
+    result = LatencyResult(faults.latency)
+    leetcode_server, openai_server = (
+        FakeLeetcodeServer(faults),
+        FakeOpenAIServer(faults),
+    )
+    question_metadata_cache.clear()  # Every post should reach the server
+
+    with ServerThread(leetcode_server, openai_server):
+        clock = VirtualClock(START_DATE)
+        lc_bot = LeetcodeBot(
+            clock=clock,
+            leetcode_client=LeetcodeClient(base_url=leetcode_server.graphql_url),
+            openai_client=OpenAIClient(
+                ResponseCache(os.path.join(state_dir, f"llm_cache_{faults.latency}")),
+                base_url=openai_server.openai_base_url,
+                api_key="fake",
+            ),
+            question_bank_manager=FakeQuestionBankManager(),
+            stats=StatsManager(),
+            message_queue=MessageQueue(rate=1e9, capacity=10**9),  # Discord isn't real
+            scheduler_store=SchedulerStore(
+                os.path.join(state_dir, f"schedulers_{faults.latency}.jsonl")
+            ),
+        )
+        await lc_bot.init(FakeChannel(1), FakeChannel(2), members=["bench-user"])
+        monitor = asyncio.create_task(_monitor_loop_lag(result.loop_lags))
+
+        for i in range(num_posts):
+            start = time.perf_counter()
+            try:
+                await lc_bot.handle_post_command(
+                    PostCommandArgs(url=f"https://leetcode.com/problems/post-{i}/")
+                )
+                result.post_latencies.append(time.perf_counter() - start)
+            except Exception:
+                result.num_failed += 1
+
+        # Daily campaign with a story, stepping the clock to each post time
+        await lc_bot.handle_campaign(
+            CampaignCommandArgs(
+                time_str="9:00",
+                days_str="MoTuWeThFrSaSu",
+                question_bank_name="bench",
+                length=-1,
+                story_prompt="A benchmark story",
+            )
+        )
+        main_channel = lc_bot.channels[Channel.MAIN]
+        for day in range(num_posts):
+            clock.set(START_DATE + timedelta(days=day, hours=1))
+            num_sent = len(main_channel.messages)
+            start = time.perf_counter()
+            try:
+                await lc_bot.handle_check_for_schedulers()
+            except Exception:
+                result.num_failed += 1
+                continue
+            if len(main_channel.messages) > num_sent:
+                result.story_post_latencies.append(time.perf_counter() - start)
+
+        monitor.cancel()
+
+    result.num_leetcode_requests = leetcode_server.num_requests
+    result.num_openai_requests = openai_server.num_requests
+    return result
+
+
+def format_result(result: LatencyResult) -> str:
+    def stats(latencies: List[float]) -> str:
+        return (
+            f"p50 {_percentile(latencies, 0.5) * 1e3:.1f}ms, "
+            f"p99 {_percentile(latencies, 0.99) * 1e3:.1f}ms"
+        )
+
+    return (
+        f"Upstream latency {result.upstream_latency * 1e3:.0f}ms: "
+        f"!post {stats(result.post_latencies)} | "
+        f"campaign with story {stats(result.story_post_latencies)} | "
+        f"failed {result.num_failed} | "
+        f"loop lag max {max(result.loop_lags or [0]) * 1e3:.1f}ms, "
+        f"mean {statistics.fmean(result.loop_lags or [0]) * 1e3:.2f}ms | "
+        f"requests: leetcode {result.num_leetcode_requests}, openai {result.num_openai_requests}"
+    )
+
+
+async def run(args: argparse.Namespace):
+    settings.initialize(dev_mode=False)  # Dev mode posts campaigns on every tick
+    with tempfile.TemporaryDirectory() as state_dir:
+        for latency_ms in args.latencies_ms:
+            faults = FaultInjection(
+                latency=latency_ms / 1000,
+                jitter=args.jitter_ms / 1000,
+                error_rate=args.error_rate,
+                rate_limit=args.rate_limit,
+                burst=args.burst,
+            )
+            print(format_result(await measure(faults, args.posts, state_dir)))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument(
+        "--latencies-ms", type=float, nargs="+", default=[0, 50, 200, 500]
+    )
+    parser.add_argument("--posts", type=int, default=20)
+    parser.add_argument("--jitter-ms", type=float, default=0)
+    parser.add_argument("--error-rate", type=float, default=0)
+    parser.add_argument("--rate-limit", type=float, default=None)
+    parser.add_argument("--burst", type=int, default=1)
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.WARNING)
+    asyncio.run(run(args))
+
+
+if __name__ == "__main__":
+    main()
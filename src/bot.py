@@ -1,7 +1,8 @@
 import argparse
 import functools
 import logging
-from typing import Optional, cast
+import time
+from typing import TYPE_CHECKING, Dict, Optional, cast
 
 import discord
 from discord.channel import TextChannel
@@ -9,50 +10,42 @@ from discord.ext import commands, tasks
 from dotenv import load_dotenv
 from discord.raw_models import RawReactionActionEvent
 
+from src.constants.config import PROFILE_DEFAULT_SECONDS, TRACE_FILE
 from src.types.command_inputs import CampaignCommandArgs, PostCommandArgs
 from src.internal.leetcode_bot_logic import Channel, LeetcodeBot
 from src.types.errors import Error, UnexpectedError
-from src.utils.boto3 import get_from_ssm
+from src.utils.boto3 import get_from_ssm, prefetch_from_ssm
 from src.utils.environment import (
     get_int_from_env,
     get_from_env,
+    get_optional_from_env,
 )
+from src.utils.logging_pipeline import setup_logging
+from src.utils.metrics import COMMAND_LATENCY, start_metrics_server
+from src.utils.tracing import JsonlTraceExporter, tracer
 import src.internal.settings as settings
 
-# Logging Setup
-logging.basicConfig(level=logging.INFO)
+if TYPE_CHECKING:
+    from aiohttp import web
+
 log = logging.getLogger("Bot")
-log.info("Starting discord bot")
-
-# Parse Arguments
-parser = argparse.ArgumentParser()
-parser.add_argument("-d", "--dev", action="store_true", help="Enable development mode")
-args = parser.parse_args()
-is_dev = args.dev
-log.info(f"is_dev: {is_dev}")
-
-# Must initialize this before anything else
-# ie, openai client
-settings.initialize(is_dev, is_test=False)
-
-if is_dev:
-    # Env Setup
-    load_dotenv()
-    log.info("Loading bot token from env")
-    BOT_TOKEN = get_from_env("BOT_TOKEN")
-else:
-    log.info("Loading bot token from ssm")
-    BOT_TOKEN = get_from_ssm("BOT_TOKEN")
-
-BOT_CHANNEL_ID = get_int_from_env("BOT_CHANNEL_ID")
-MAIN_CHANNEL_ID = get_int_from_env("MAIN_CHANNEL_ID")
-TEXT_JSON_FILE = get_from_env("TEXT_JSON_FILE")
+
+# Set in main
+BOT_CHANNEL_ID: Optional[int] = None
+MAIN_CHANNEL_ID: Optional[int] = None
+METRICS_PORT: Optional[int] = None  # Metrics are only served if set
+STARTED_AT: Optional[float] = None  # perf_counter when main started
 
 # Bot Setup
 bot = commands.Bot(command_prefix="!", intents=discord.Intents.all())
 
 lc_bot = LeetcodeBot()
 
+# User id -> name, filled from guild members on ready and by reactions
+user_names: Dict[int, str] = {}
+
+metrics_server: Optional["web.AppRunner"] = None
+
 
 @bot.check
 def validate_channel(ctx):
@@ -76,37 +69,60 @@ async def on_ready():
     for guild in bot.guilds:
         log.info(f"Fetching members for: {guild.name}")
         async for member in guild.fetch_members(limit=None):
+            user_names[member.id] = member.name
             if not member.bot:
                 members.append(member.name)
 
     bot_channel = cast(TextChannel, bot.get_channel(BOT_CHANNEL_ID))
     main_channel = cast(TextChannel, bot.get_channel(MAIN_CHANNEL_ID))
     await lc_bot.init(main_channel, bot_channel, members)
+    lc_bot.start_background_tasks()
+
+    global metrics_server
+    if METRICS_PORT and metrics_server is None:  # on_ready runs again on reconnect
+        metrics_server = await start_metrics_server(METRICS_PORT)
 
     # Start background scheduler
     check_for_schedulers.start()
 
+    if STARTED_AT is not None:
+        log.info(f"Ready {time.perf_counter() - STARTED_AT:.2f}s after start")
     await lc_bot.send("Hello! LC-Bot is ready!", Channel.BOT)
 
 
-# Wrapper for handling unexpected exceptions
+# Wrapper for handling unexpected exceptions, also traces the command
 def handle_exceptions(func):
     @functools.wraps(func)
     async def wrapper(*args, **kwargs):
-        try:
-            return await func(*args, **kwargs)
-        except Error as e:
-            await lc_bot.handle_error(e)
-        except Exception as e:
-            log.exception(f"An unexpected error occurred in {func.__name__}: {e}")
-            await lc_bot.handle_error(UnexpectedError())
+        start = time.perf_counter()
+        outcome = "ok"
+        with tracer.trace(func.__name__) as trace:
+            try:
+                return await func(*args, **kwargs)
+            except Error as e:
+                outcome = "error"
+                await lc_bot.handle_error(e)
+            except Exception as e:
+                outcome = "unexpected_error"
+                log.exception(f"An unexpected error occurred in {func.__name__}: {e}")
+                await lc_bot.handle_error(UnexpectedError())
+            finally:
+                trace.attributes["outcome"] = outcome
+                COMMAND_LATENCY.observe(
+                    time.perf_counter() - start, func.__name__, outcome
+                )
 
     return wrapper
 
 
 @bot.command()
-async def test(ctx: commands.Context, prompt: Optional[str] = None):
-    res = await lc_bot.test(prompt)
+async def test(
+    ctx: commands.Context, prompt: Optional[str] = None, fresh: bool = False
+):
+    """
+    Set fresh to skip the LLM response cache.
+    """
+    res = await lc_bot.test(prompt, fresh)
     await lc_bot.send(res, Channel.BOT)
 
 
@@ -127,8 +143,11 @@ async def post(
 
 @bot.command()
 @handle_exceptions
-async def uploadQuestionBank(ctx: commands.Context):
-    await lc_bot.handle_upload_question_bank(ctx)
+async def uploadQuestionBank(ctx: commands.Context, validate: bool = False):
+    """
+    Set validate to check every question exists on leetcode before saving.
+    """
+    await lc_bot.handle_upload_question_bank(ctx, validate)
 
 
 @bot.command()
@@ -149,6 +168,17 @@ async def deleteQuestionBank(ctx: commands.Context, question_bank_name: str):
     await lc_bot.handle_delete_question_bank(question_bank_name)
 
 
+@bot.command()
+@handle_exceptions
+async def skipGloballyPosted(
+    ctx: commands.Context, question_bank_name: str, skip: bool = True
+):
+    """
+    Set whether the question bank skips questions already posted from other question banks.
+    """
+    await lc_bot.handle_skip_globally_posted(question_bank_name, skip)
+
+
 @bot.command()
 @handle_exceptions
 async def listSchedulers(ctx):
@@ -170,9 +200,11 @@ async def campaign(
     question_bank_name: str,
     story_prompt: Optional[str] = None,
     length: int = -1,
+    question_filter: Optional[str] = None,
 ):
     """
     If story_prompt is included, then stories will be automatically generated. Otherwise, story will be omitted.
+    question_filter picks questions by difficulty or topic, optionally per day (ie, Mo=easy,Fr=hard,arrays).
     """
     args = CampaignCommandArgs(
         time_str=time_str,
@@ -180,6 +212,7 @@ async def campaign(
         question_bank_name=question_bank_name,
         length=length,
         story_prompt=story_prompt,
+        question_filter=question_filter,
     )
     await lc_bot.handle_campaign(args)
 
@@ -190,30 +223,126 @@ async def stats(ctx: commands.Context):
     await lc_bot.handle_stats()
 
 
-# Background task to post
-num_seconds = 15 if is_dev else 60  # 1 minute
+@bot.command()
+@handle_exceptions
+async def botStats(ctx: commands.Context):
+    await lc_bot.handle_bot_stats()
 
 
-@tasks.loop(seconds=num_seconds)
+@bot.command()
+@handle_exceptions
+async def diagnostics(ctx: commands.Context):
+    """
+    Shows event loop lag, and the call sites that blocked the loop the longest.
+    """
+    await lc_bot.handle_diagnostics()
+
+
+@bot.command()
+@handle_exceptions
+async def profileCpu(ctx: commands.Context, seconds: float = PROFILE_DEFAULT_SECONDS):
+    """
+    Samples where the event loop spends its time for seconds, then posts the top functions and the stacks.
+    """
+    await lc_bot.handle_profile_cpu(seconds)
+
+
+@bot.command()
+@handle_exceptions
+async def profileMemory(
+    ctx: commands.Context, seconds: float = PROFILE_DEFAULT_SECONDS
+):
+    """
+    Traces allocations for seconds, then posts the sites that grew the most.
+    """
+    await lc_bot.handle_profile_memory(seconds)
+
+
+@bot.command()
+@handle_exceptions
+async def trace(ctx: commands.Context, which: str = "last"):
+    """
+    Shows where the time went in the most recent slow command, ie !trace last.
+    """
+    await lc_bot.handle_trace(which)
+
+
+# Background task to post
+@tasks.loop(seconds=60)
 @handle_exceptions
 async def check_for_schedulers():
     await lc_bot.handle_check_for_schedulers()
 
 
+async def get_user_name(user_id: int) -> str:
+    """
+    Looks up users the bot hasn't seen before, rather than on every reaction
+    """
+    if user_id not in user_names:
+        user = await bot.fetch_user(user_id)
+        user_names[user_id] = user.name
+    return user_names[user_id]
+
+
 @bot.event
 async def on_raw_reaction_add(data: RawReactionActionEvent):
-    user = await bot.fetch_user(data.user_id)
-    message = await lc_bot.channels[Channel.MAIN].fetch_message(data.message_id)
-
-    # Use message id as post id
-    await lc_bot.handle_reaction_add(user.name, message.id, str(data.emoji))
+    # Only posts in the main channel count, use message id as post id
+    if data.channel_id != lc_bot.channels[Channel.MAIN].id:
+        return
+    user_name = data.member.name if data.member else await get_user_name(data.user_id)
+    await lc_bot.handle_reaction_add(user_name, data.message_id, str(data.emoji))
 
 
 @bot.event
 async def on_raw_reaction_remove(data: RawReactionActionEvent):
-    user = await bot.fetch_user(data.user_id)
-    message = await lc_bot.channels[Channel.MAIN].fetch_message(data.message_id)
-    await lc_bot.handle_reaction_remove(user.name, message.id, str(data.emoji))
+    if data.channel_id != lc_bot.channels[Channel.MAIN].id:
+        return
+    user_name = await get_user_name(data.user_id)
+    await lc_bot.handle_reaction_remove(user_name, data.message_id, str(data.emoji))
+
+
+def main():
+    global BOT_CHANNEL_ID, MAIN_CHANNEL_ID, METRICS_PORT, STARTED_AT
+    STARTED_AT = time.perf_counter()
+
+    # Parse Arguments
+    parser = argparse.ArgumentParser()
+    parser.add_argument(
+        "-d", "--dev", action="store_true", help="Enable development mode"
+    )
+    args = parser.parse_args()
+    is_dev = args.dev
+
+    # Logging Setup, JSON lines in prod for log search
+    setup_logging(logging.INFO, json_output=not is_dev)
+    log.info("Starting discord bot")
+    log.info(f"is_dev: {is_dev}")
+
+    # Must initialize this before anything else
+    # ie, openai client
+    settings.initialize(is_dev, is_test=False)
+
+    if is_dev:
+        # Env Setup
+        load_dotenv()
+        log.info("Loading bot token from env")
+        bot_token = get_from_env("BOT_TOKEN")
+    else:
+        log.info("Loading bot token from ssm")
+        # The OpenAI key isn't needed to log in, so it's fetched while the gateway connects
+        prefetch_from_ssm("BOT_TOKEN", "OPENAI_API_KEY")
+        bot_token = get_from_ssm("BOT_TOKEN")
+
+    BOT_CHANNEL_ID = get_int_from_env("BOT_CHANNEL_ID")
+    MAIN_CHANNEL_ID = get_int_from_env("MAIN_CHANNEL_ID")
+    metrics_port = get_optional_from_env("METRICS_PORT")
+    METRICS_PORT = int(metrics_port) if metrics_port else None
+    tracer.exporter = JsonlTraceExporter(TRACE_FILE)
+
+    check_for_schedulers.change_interval(seconds=15 if is_dev else 60)
+
+    bot.run(bot_token)
 
 
-bot.run(BOT_TOKEN)
+if __name__ == "__main__":
+    main()
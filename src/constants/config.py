@@ -1 +1,72 @@
 QUESTION_BANK_DIR = "data/question_banks/"
+QUESTION_BANK_OPTIONS_FILE = "data/question_bank_options.json"
+SCHEDULER_STATE_FILE = "data/schedulers.jsonl"
+
+# LLM response cache
+LLM_CACHE_DIR = "data/llm_cache/"
+LLM_CACHE_MAX_BYTES = 10 * 1024 * 1024  # 10MB
+
+# Discord rate limits, per channel
+DISCORD_CHANNEL_RATE_LIMIT = 1.0  # messages per second
+DISCORD_CHANNEL_BURST = 5
+
+# Messages
+DISCORD_MESSAGE_LIMIT = 2000  # characters
+MESSAGE_ATTACHMENT_THRESHOLD = 4 * DISCORD_MESSAGE_LIMIT  # Send as a file above this
+
+# Logging
+LOG_QUEUE_SIZE = 10_000  # Records waiting to be written, dropped past this
+LOG_PAYLOAD_MAX_CHARS = (
+    2000  # Messages and extra fields, ie prompts and stories, are cut at this
+)
+# Logger name -> fraction of INFO and below records kept, applies to child loggers too
+LOG_SAMPLE_RATES = {"src.internal.stats": 0.25}
+# Logger name -> (records per second, burst) for INFO and below, applies to child loggers too
+LOG_RATE_LIMITS = {"src.internal.stats": (5.0, 20)}
+
+# Stats
+STATS_RETAINED_POSTS = (
+    30  # Posts with reactions kept per user, older ones are compacted
+)
+STATS_MAX_ARCHIVED_POSTS = 5000  # Compacted posts still counting late reactions
+
+# Event loop watchdog
+LOOP_LAG_SAMPLE_INTERVAL = 0.1  # seconds between heartbeats
+LOOP_LAG_THRESHOLD = 0.25  # seconds, capture the blocking stack above this
+LOOP_LAG_HISTORY = 3000  # Heartbeats kept for percentiles, about 5 minutes
+NUM_DIAGNOSTICS_OFFENDERS = 5  # Blocking call sites shown in !diagnostics
+
+# Profiler captures, !profileCpu and !profileMemory
+PROFILE_DEFAULT_SECONDS = 30
+PROFILE_MAX_SECONDS = 300
+PROFILE_SAMPLE_INTERVAL = 0.005  # seconds between CPU samples
+PROFILE_TRACEMALLOC_FRAMES = 10  # Frames kept per allocation
+NUM_PROFILE_TOP = 10  # Functions or allocation sites in the summary
+NUM_PROFILE_REPORT_SITES = 100  # Allocation sites in the attached memory report
+
+# Command tracing
+TRACE_FILE = "data/traces.jsonl"  # Slow traces are appended here
+TRACE_FILE_MAX_BYTES = 10 * 1024 * 1024  # 10MB, then rotated to TRACE_FILE.1
+TRACE_SLOW_THRESHOLD = 1.0  # seconds, commands slower than this are kept for !trace
+TRACE_HISTORY = 100  # Recent traces kept in memory
+
+# Schedulers
+NUM_UPCOMING_POST_TIMES = 3  # Shown per scheduler in !listSchedulers
+SCHEDULER_CATCH_UP_POLICY = (
+    "post_once"  # skip or post_once, for posts missed while down
+)
+SCHEDULER_LOG_COMPACT_MIN_RECORDS = 1000  # Don't compact the scheduler log below this
+
+# Question banks
+MAX_QUESTION_BANK_UPLOAD_BYTES = 32 * 1024 * 1024  # 32MB
+MAX_LOADED_QUESTION_BANKS = 16  # Parsed banks kept in memory
+QUESTION_BANK_LOADER_WORKERS = 4
+
+# LeetCode lookups
+LEETCODE_GRAPHQL_URL = (
+    "https://leetcode.com/graphql/"  # LEETCODE_GRAPHQL_URL env overrides
+)
+QUESTION_LOOKUP_BATCH_SIZE = 20  # Slugs per graphql request
+QUESTION_LOOKUP_CONCURRENCY = 4  # Requests in flight
+METADATA_INDEX_ATTEMPTS = 3  # For campaigns' metadata lookups after a restart
+METADATA_INDEX_RETRY_DELAY = 30.0  # seconds, doubled after each failed attempt
@@ -1,5 +1,6 @@
 import logging
-from typing import List, Optional, override
+from datetime import datetime
+from typing import Dict, List, Optional, override
 from src.constants.prompts import (
     STORY_GENERATION_SYSTEM_PROMPT,
     STORY_HISTORY_PROMPT_TEMPLATE,
@@ -12,8 +13,11 @@ from src.internal.date_generator import DateGenerator
 from src.internal.posts import Post, PostGenerator, Scheduler
 from src.internal.question_bank_manager import QuestionBankManager
 from src.internal.stats import StatsManager
-from src.utils.leetcode_client import QuestionData
-from src.utils.openai_client import OpenAIClient
+from src.types.scheduler_specs import CampaignSpec
+from src.utils.clock import Clock
+from src.utils.leetcode_client import LeetcodeClient, QuestionData
+from src.utils.openai_client import OpenAIClient, get_openai_client
+from src.utils.tracing import traced
 import src.internal.settings as settings
 
 log = logging.getLogger(__name__)
@@ -28,17 +32,24 @@ class Campaign(Scheduler):
         stats: StatsManager,
         length: int = -1,  # unlimited
         story_prompt: Optional[str] = None,
+        question_filters: Optional[Dict[Optional[int], str]] = None,
+        openai_client: Optional[OpenAIClient] = None,
+        leetcode_client: Optional[LeetcodeClient] = None,
     ):
         self.length = length
 
         self.question_bank_manager = question_bank_manager
         self.question_bank_name = question_bank_name
+        # weekday -> difficulty or topic, None key applies to all other days
+        self.question_filters = question_filters or {}
 
         self.stats = stats
 
         # Post generator
         self.post_generator = PostGenerator(
-            self._get_post_url, get_story_func=self._get_story
+            self._get_post_url,
+            get_story_func=self._get_story,
+            leetcode_client=leetcode_client,
         )
 
         # Date generator
@@ -48,7 +59,7 @@ class Campaign(Scheduler):
         self.story_prompt = story_prompt
         self.story_history: List[str] = []  # Stories for each day so far
 
-        self.openai_client = OpenAIClient()
+        self._openai_client = openai_client
 
         # post ids
         self.posts: List[Post] = []
@@ -60,18 +71,82 @@ class Campaign(Scheduler):
             repeats=(length + 1) if length >= 0 else -1,
         )
 
-    async def init(self):
+    @classmethod
+    def from_spec(
+        cls,
+        spec: CampaignSpec,
+        question_bank_manager: QuestionBankManager,
+        stats: StatsManager,
+        clock: Clock,
+        openai_client: Optional[OpenAIClient] = None,
+        leetcode_client: Optional[LeetcodeClient] = None,
+    ) -> "Campaign":
+        campaign = cls(
+            question_bank_manager,
+            spec.question_bank_name,
+            DateGenerator(spec.days, spec.time, clock, next_date=spec.next_date),
+            stats,
+            length=spec.length,
+            story_prompt=spec.story_prompt,
+            question_filters=dict(spec.question_filters),
+            openai_client=openai_client,
+            leetcode_client=leetcode_client,
+        )
+        campaign._restore_id(spec.id)
+        campaign.repeats = spec.repeats
+        campaign.story_history = list(spec.story_history)
+        return campaign
+
+    def to_spec(self) -> CampaignSpec:
+        return CampaignSpec(
+            id=self.id,
+            question_bank_name=self.question_bank_name,
+            days=self.date_generator.days,
+            time=self.date_generator.time,
+            length=self.length,
+            repeats=self.repeats,
+            next_date=self.date_generator.get_next_posting_date(),
+            story_prompt=self.story_prompt,
+            question_filters=list(self.question_filters.items()),
+            story_history=self.story_history,
+        )
+
+    @property
+    def openai_client(self) -> OpenAIClient:
+        # Only needed for stories, so don't create a client (and import openai) before the first one
+        if self._openai_client is None:
+            self._openai_client = get_openai_client()
+        return self._openai_client
+
+    @traced()
+    async def init(self, index_metadata: bool = True):
         # Create campaign class
         await self.question_bank_manager._assert_question_bank_exists(
             self.question_bank_name
         )
 
+        if index_metadata:
+            await self.index_question_metadata()
+
         log.info("Initialized campaign success")
 
+    async def index_question_metadata(self):
+        """
+        Looks up metadata needed for the question filters, if any
+        """
+        if self.question_filters:
+            await self.question_bank_manager.index_question_metadata(
+                self.question_bank_name
+            )
+
+    def _get_question_filter(self) -> Optional[str]:
+        weekday = self.date_generator.clock.now().weekday()
+        return self.question_filters.get(weekday, self.question_filters.get(None))
+
     async def _get_post_url(self):
         return (
             await self.question_bank_manager.get_random_question_url_from_question_bank(
-                self.question_bank_name
+                self.question_bank_name, self._get_question_filter()
             )
         )
 
@@ -90,6 +165,12 @@ class Campaign(Scheduler):
             return True
         return self._should_post_func()
 
+    @override
+    def upcoming_post_times(self, n: int) -> List[datetime]:
+        if self.repeats >= 0:
+            n = min(n, self.repeats)
+        return self.date_generator.preview(n)
+
     @override
     def should_final_post(self):
         return self.repeats == 1
@@ -101,6 +182,7 @@ class Campaign(Scheduler):
         self.repeats -= 1
         return res
 
+    @traced()
     async def _get_story(self, question_data: QuestionData | None):
         # This class should have exclusive access over its story_history, so no need for locks
         # If question data is not passed, will generate ending story
@@ -163,14 +245,13 @@ class Campaign(Scheduler):
 
         inputs.append({"role": "user", "content": kickstart_prompt})
 
-        log.info("Running story generation with the following:")
-        log.info(inputs)
+        # Formatted and truncated on the logging thread, inputs aren't changed after this
+        log.info("Running story generation", extra={"prompt": inputs})
 
-        res = self.openai_client.generate(inputs)
-        log.info(res)
-        log.info(res.output_text)
+        story = self.openai_client.generate(inputs)
+        log.info("Generated story", extra={"story": story})
 
         # Add to story history
-        self.story_history.append(res.output_text)
+        self.story_history.append(story)
 
-        return res.output_text
+        return story
@@ -1,55 +1,92 @@
 from datetime import datetime, time, timedelta
-from typing import Sequence
+from typing import List, Optional, Sequence
 import logging
 
+from src.utils.clock import Clock, system_clock
+
 log = logging.getLogger(__name__)
 
 
 class DateGenerator:
     # days is list of ints representing days to post - 0 = Monday ... 6 = Sunday
-    def __init__(self, days: Sequence[int], time: time):
+    def __init__(
+        self,
+        days: Sequence[int],
+        time: time,
+        clock: Optional[Clock] = None,
+        next_date: Optional[datetime] = None,  # When restoring, may be in the past
+    ):
         if len(days) == 0:
             raise ValueError("Days cannot be 0")
 
-        called_date = datetime.now()
+        self.clock = clock or system_clock
+        called_date = self.clock.now()
 
-        self.day_gen = self.__create_day_generator(days)
+        self.days = sorted(set(days))
         self.time = time
-        self.next_date = called_date.replace(
-            hour=time.hour, minute=time.minute, second=0, microsecond=0
-        )
+        self.days_mask = 0  # Bit i set if posting on weekday i
+        for day in days:
+            self.days_mask |= 1 << day
 
-        # adjust day
-        while self.next_date < called_date or self.next_date.weekday() not in days:
-            self.next_date = self.next_date + timedelta(days=1)
+        # Weekday -> days until the next posting day, strictly after it (1-7)
+        self._days_to_next = [
+            next(d for d in range(1, 8) if self.days_mask & (1 << ((weekday + d) % 7)))
+            for weekday in range(7)
+        ]
+        # Offsets in days from a posting day to the posting days of the following week, in order
+        self._week_offsets: List[List[int]] = []
+        for weekday in range(7):
+            offsets = [0]
+            while (
+                offset := offsets[-1] + self._days_to_next[(weekday + offsets[-1]) % 7]
+            ) < 7:
+                offsets.append(offset)
+            self._week_offsets.append(offsets)
 
-        while next(self.day_gen) != self.next_date.weekday():
-            pass  # advances self.day_gen to match
+        self.next_date = next_date or self._get_next_date(called_date, inclusive=True)
 
-    def __create_day_generator(self, days: Sequence[int]):
-        i = 0
-        while True:
-            yield days[i]
-            i = (i + 1) % len(days)
+    def skip_missed(self):
+        """
+        Moves a next date in the past to the next posting date from now
+        """
+        now = self.clock.now()
+        if self.next_date < now:
+            self.next_date = self._get_next_date(now, inclusive=True)
 
-    def __get_days_to_advance(self, curr_day: int, target_day: int):
-        return x if (x := (target_day - curr_day) % 7) != 0 else 7
+    def _get_next_date(self, after: datetime, inclusive: bool = False) -> datetime:
+        """
+        First posting date after the given date (or at it, if inclusive) in constant time
+        """
+        candidate = after.replace(
+            hour=self.time.hour, minute=self.time.minute, second=0, microsecond=0
+        )
+        weekday = candidate.weekday()
+        is_posting_day = bool(self.days_mask & (1 << weekday))
+        if is_posting_day and (candidate > after or (inclusive and candidate == after)):
+            return candidate
+        return candidate + timedelta(days=self._days_to_next[weekday])
 
     def get_next_posting_date(self):
         return self.next_date
 
+    def preview(self, n: int) -> List[datetime]:
+        """
+        Returns the next n posting dates, without advancing the generator
+        """
+        offsets = self._week_offsets[self.next_date.weekday()]
+        per_week = len(offsets)
+        return [
+            self.next_date + timedelta(days=7 * (i // per_week) + offsets[i % per_week])
+            for i in range(n)
+        ]
+
     # Returns True if should post, else false
     def __call__(self) -> bool:
-        curtime = datetime.now()
+        curtime = self.clock.now()
         if curtime < self.next_date:  # Not time yet
             return False
 
-        # set next date
-        while self.next_date <= curtime:
-            self.next_date = self.next_date + timedelta(
-                days=self.__get_days_to_advance(
-                    self.next_date.weekday(), next(self.day_gen)
-                )
-            )
+        # set next date, skipping any missed dates
+        self.next_date = self._get_next_date(curtime)
         log.info(f"Set next date of date generator to {self.next_date}")
         return True
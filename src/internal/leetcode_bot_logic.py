@@ -1,37 +1,76 @@
 import asyncio
-from datetime import datetime
+import contextvars
+from io import BytesIO
 import logging
+import time
 from discord.channel import TextChannel
 from discord.ext import commands
 from discord import File
 
+from src.constants.config import (
+    DISCORD_MESSAGE_LIMIT,
+    MESSAGE_ATTACHMENT_THRESHOLD,
+    METADATA_INDEX_ATTEMPTS,
+    METADATA_INDEX_RETRY_DELAY,
+    NUM_DIAGNOSTICS_OFFENDERS,
+    NUM_PROFILE_REPORT_SITES,
+    NUM_PROFILE_TOP,
+    NUM_UPCOMING_POST_TIMES,
+    PROFILE_MAX_SECONDS,
+    SCHEDULER_CATCH_UP_POLICY,
+)
 from src.internal.campaigns import Campaign
 from src.internal.date_generator import DateGenerator
+from src.internal.message_queue import COALESCED_SUFFIX_MAX, MessageQueue, Priority
 from src.internal.question_bank_manager import QuestionBankManager
+from src.internal.scheduler_store import CatchUpPolicy, SchedulerStore
 from src.internal.stats import StatsManager
 from src.types.command_inputs import CampaignCommandArgs, PostCommandArgs
+from src.types.scheduler_specs import PostSchedulerSpec, SchedulerSpec
 from src.types.errors import (
     Error,
     FailedScrapeError,
     FailedToGetPostError,
     FailedToParseDateStringError,
     FailedToParseDaysStringError,
+    FailedToParseQuestionFilterError,
     FailedToParseTimeStringError,
+    InvalidProfileDurationError,
+    ProfileAlreadyRunningError,
     ScheduledDateInPastError,
+    SchedulerDoesNotExistError,
+    UnexpectedError,
+    UnknownTraceError,
 )
 from src.utils.leetcode_client import LeetcodeClient
-from src.internal.posts import Post, PostGenerator, Scheduler
-import src.internal.settings as settings
+from src.utils.clock import Clock, system_clock
+from src.utils.loop_watchdog import LoopWatchdog
+from src.utils.metrics import REACTIONS, SCHEDULER_TICK, InstrumentedLock
+from src.utils.tracing import span, traced, tracer
+from src.utils.message_packer import pack_message
+from src.utils.profiler import profile_cpu, profile_memory
+from src.internal.posts import Post, PostGenerator, PostScheduler, Scheduler
 from enum import Enum
-from typing import Dict, Optional
-
-from src.utils.openai_client import OpenAIClient
-from src.utils.string_utils import parse_date_str, parse_days, parse_time_str
+from typing import Dict, Iterable, Optional
+
+from src.utils.openai_client import OpenAIClient, get_openai_client
+from src.utils.response_cache import response_cache
+from src.utils.string_utils import (
+    parse_date_str,
+    parse_days,
+    parse_question_filters,
+    parse_time_str,
+)
 from src.utils.text import (
     format_story_text,
+    get_cpu_profile_text,
+    get_diagnostics_text,
+    get_memory_profile_text,
     get_question_text,
     get_schedule_post_response_text,
+    get_scheduler_list_text,
     get_stats_text,
+    get_trace_text,
 )
 
 
@@ -40,27 +79,51 @@ class Channel(Enum):
     BOT = 2
 
 
+# MAIN channel posts go out ahead of BOT channel chatter
+CHANNEL_PRIORITIES = {Channel.MAIN: Priority.HIGH, Channel.BOT: Priority.NORMAL}
+
+
 log = logging.getLogger("LeetcodeBot (Internal Logic)")
 
 
 class LeetcodeBot:
-    channels: Dict[Channel, TextChannel] = {}
-    schedulers: list[Scheduler] = []
-    uncompleted_questions: set[str] = set()
-    completed_questions: set[str] = set()
-    leetcode_client = LeetcodeClient()
-    question_bank_manager = QuestionBankManager()
-    stats = StatsManager()
+    def __init__(
+        self,
+        clock: Optional[Clock] = None,
+        leetcode_client: Optional[LeetcodeClient] = None,
+        openai_client: Optional[OpenAIClient] = None,
+        question_bank_manager: Optional[QuestionBankManager] = None,
+        stats: Optional[StatsManager] = None,
+        message_queue: Optional[MessageQueue] = None,
+        scheduler_store: Optional[SchedulerStore] = None,
+        loop_watchdog: Optional[LoopWatchdog] = None,
+    ):
+        """
+        Dependencies can be passed in for tests and simulations, otherwise the real ones are created
+        """
+        self.clock = clock or system_clock
+        self.channels: Dict[Channel, TextChannel] = {}
+        self.schedulers: list[Scheduler] = []
+        self.scheduler_store = scheduler_store or SchedulerStore()
+        self._restored_schedulers = False
+        self.uncompleted_questions: set[str] = set()
+        self.completed_questions: set[str] = set()
+        self.leetcode_client = leetcode_client or LeetcodeClient()
+        self.question_bank_manager = question_bank_manager or QuestionBankManager(
+            clock=self.clock
+        )
+        self.stats = stats or StatsManager()
 
-    # For simplicity, just keep one lock and grab it for all state-changing operations
-    state_lock = asyncio.Lock()
+        # For simplicity, just keep one lock and grab it for all state-changing operations
+        self.state_lock = InstrumentedLock("leetcode_bot_state")
 
-    def __init__(self):
-        if settings.is_test:
-            return
+        self.message_queue = message_queue or MessageQueue()
+        self.background_tasks: set[asyncio.Task] = set()
+        self.loop_watchdog = loop_watchdog or LoopWatchdog()
+        self._profiling = False  # One capture at a time
 
-        # Init here on creation, not definition
-        self.openai_client = OpenAIClient()
+        # If None, campaigns share one client created when the first story is generated
+        self.openai_client = openai_client
 
     async def init(
         self, main_channel: TextChannel, bot_channel: TextChannel, members: list[str]
@@ -72,19 +135,153 @@ class LeetcodeBot:
 
         await self.stats.init(members)
 
+        if not self._restored_schedulers:  # init runs again on reconnect
+            self._restored_schedulers = True
+            await self.restore_schedulers()
+
         log.info("Successfully initialized LeetcodeBot")
 
+    async def restore_schedulers(
+        self, catch_up_policy: CatchUpPolicy = CatchUpPolicy(SCHEDULER_CATCH_UP_POLICY)
+    ):
+        """
+        Rebuilds schedulers saved before the last shutdown
+        """
+        start = time.perf_counter()
+        specs = await asyncio.to_thread(self.scheduler_store.load)
+        now = self.clock.now()
+
+        async with self.state_lock:
+            for spec in specs:
+                try:
+                    scheduler = await self._scheduler_from_spec(spec)
+                except Error as e:
+                    log.warning(f"Dropping scheduler {spec.id}: {e.msg}")
+                    await self.scheduler_store.delete(spec.id)
+                    continue
+
+                missed = [t for t in scheduler.upcoming_post_times(1) if t < now]
+                if missed and catch_up_policy == CatchUpPolicy.SKIP:
+                    if isinstance(scheduler, Campaign):
+                        scheduler.date_generator.skip_missed()
+                    else:
+                        log.info(f"Dropping missed post {spec.id}")
+                        await self.scheduler_store.delete(spec.id)
+                        continue
+                self.schedulers.append(scheduler)
+
+        log.info(
+            f"Restored {len(self.schedulers)} schedulers in {(time.perf_counter() - start) * 1000:.1f}ms"
+        )
+
+    async def _scheduler_from_spec(self, spec: SchedulerSpec) -> Scheduler:
+        if isinstance(spec, PostSchedulerSpec):
+            return PostScheduler.from_spec(spec, self.clock, self.leetcode_client)
+
+        campaign = Campaign.from_spec(
+            spec,
+            self.question_bank_manager,
+            self.stats,
+            self.clock,
+            openai_client=self.openai_client,
+            leetcode_client=self.leetcode_client,
+        )
+        await campaign.init(index_metadata=False)
+        # Metadata lookups go over the network, don't hold up startup. Filtered draws index what's missing.
+        self._start_background_task(self._index_question_metadata(campaign))
+        return campaign
+
+    async def _index_question_metadata(self, campaign: Campaign):
+        delay = METADATA_INDEX_RETRY_DELAY
+        for attempt in range(1, METADATA_INDEX_ATTEMPTS + 1):
+            try:
+                await campaign.index_question_metadata()
+                return
+            except Exception as e:
+                log.warning(
+                    f"Metadata lookup for campaign {campaign.id} failed, attempt {attempt}/{METADATA_INDEX_ATTEMPTS}: {e}"
+                )
+            if attempt < METADATA_INDEX_ATTEMPTS:
+                await asyncio.sleep(delay)
+                delay *= 2
+        log.error(
+            f"Gave up looking up metadata for campaign {campaign.id}, its filtered draws will look it up"
+        )
+
+    def start_background_tasks(self):
+        """
+        Starts work that shouldn't delay startup
+        """
+        self.loop_watchdog.start()
+        self._start_background_task(self.question_bank_manager.warm_question_banks())
+
+    def _start_background_task(self, coro):
+        # Keep a reference so the task isn't garbage collected. It outlives any command that started it, so
+        # give it a fresh context to keep it out of the command's trace.
+        task = asyncio.create_task(coro, context=contextvars.Context())
+        self.background_tasks.add(task)
+        task.add_done_callback(self._on_background_task_done)
+
+    def _on_background_task_done(self, task: asyncio.Task):
+        self.background_tasks.discard(task)
+        if not task.cancelled() and (e := task.exception()):
+            log.error(f"Background task failed: {e!r}", exc_info=e)
+
+    @traced()
     async def send(
-        self, msg: str, channel: Channel, file_attachment: Optional[str] = None
+        self,
+        msg: str,
+        channel: Channel,
+        file_attachment: Optional[File] = None,
+        priority: Optional[Priority] = None,
+        coalesce: bool = False,
+        wait: bool = True,
     ):
+        """
+        Queues msg for sending, split into as many messages as needed, or attached as a file if very long.
+        If wait, waits for delivery and returns the last sent message, otherwise returns None.
+        """
+        kwargs = {}
         if file_attachment:
-            file = File(open(file_attachment, "rb"))
-            res = await self.channels[channel].send(msg, file=file)
-        else:
-            res = await self.channels[channel].send(msg)
-        log.info(f"Sent {msg} to channel {channel}, id {res.id}")
+            kwargs["file"] = file_attachment
+        elif len(msg) > MESSAGE_ATTACHMENT_THRESHOLD:
+            kwargs["file"] = File(BytesIO(msg.encode()), filename="message.txt")
+            msg = "Message too long, see attached file."
+
+        # Enqueue all parts at once so they're sent in sequence, the attachment goes with the last part.
+        # Only whole single part messages are coalesced, leaving room for the repeat count.
+        parts = pack_message(msg, DISCORD_MESSAGE_LIMIT - len(COALESCED_SUFFIX_MAX))
+        coalesce = coalesce and len(parts) == 1
+        if not coalesce:
+            parts = pack_message(msg)
+        futures = [
+            self.message_queue.enqueue(
+                self.channels[channel],
+                part,
+                priority=CHANNEL_PRIORITIES[channel] if priority is None else priority,
+                coalesce=coalesce,
+                **(kwargs if i == len(parts) - 1 else {}),
+            )
+            for i, part in enumerate(parts)
+        ]
+        if not wait:
+            for future in futures:
+                future.add_done_callback(
+                    lambda f: f.cancelled() or f.exception()  # Retrieve, already logged
+                )
+            return None
+
+        res = (await asyncio.gather(*futures))[-1]
+        log.info(
+            "Sent message to channel %s in %d parts, id %s",
+            channel.name,
+            len(parts),
+            res.id,
+            extra={"body": msg},
+        )
         return res
 
+    @traced()
     async def post_question(self, post: Post):
         message = await self.send(get_question_text(post), Channel.MAIN)
         post.set_id(
@@ -92,6 +289,7 @@ class LeetcodeBot:
         )  # Posts aren't really stored anywhere, so maybe this is redundant for now
         await self.stats.handle_new_post(message.id)
 
+    @traced()
     async def handle_post_command(self, args: PostCommandArgs):
         date = None
 
@@ -103,25 +301,25 @@ class LeetcodeBot:
 
         if args.date_str:
             try:
-                date = parse_date_str(args.date_str)
+                with span("parse_args"):
+                    date = parse_date_str(args.date_str, self.clock)
             except Exception as e:
                 log.exception(e)
                 await self.handle_error(FailedToParseDateStringError(args.date_str))
                 return
 
-            if date < datetime.now():
+            if date < self.clock.now():
                 await self.handle_error(ScheduledDateInPastError(date))
                 return
 
-            def should_post():
-                return datetime.now() > date
-
             await self.add_to_schedulers(
-                Scheduler(
-                    PostGenerator(
-                        get_post_url, desc=args.desc, get_story_func=get_story
-                    ),
-                    should_post,
+                PostScheduler(
+                    args.url,
+                    date,
+                    self.clock,
+                    desc=args.desc,
+                    story=args.story,
+                    leetcode_client=self.leetcode_client,
                 )
             )
 
@@ -141,40 +339,68 @@ class LeetcodeBot:
             #     return
 
             post = await PostGenerator(
-                get_post_url, desc=args.desc, get_story_func=get_story
+                get_post_url,
+                desc=args.desc,
+                get_story_func=get_story,
+                leetcode_client=self.leetcode_client,
             )()
             await self.post_question(post)
 
-    async def handle_upload_question_bank(self, ctx: commands.Context):
+    @traced()
+    async def handle_upload_question_bank(
+        self, ctx: commands.Context, validate: bool = False
+    ):
         question_file = ctx.message.attachments[0]
-        response = await self.question_bank_manager.upload_question_bank(question_file)
+        response = await self.question_bank_manager.upload_question_bank(
+            question_file, validate=validate
+        )
         await self.send(response, Channel.BOT)
 
+    @traced()
     async def handle_get_question_bank(self, question_bank_name: str):
-        file_path = await self.question_bank_manager.get_question_bank_download_url(
+        data = await self.question_bank_manager.get_question_bank_file(
             question_bank_name
         )
         await self.send(
-            f"{question_bank_name}:", Channel.BOT, file_attachment=file_path
+            f"{question_bank_name}:",
+            Channel.BOT,
+            file_attachment=File(BytesIO(data), filename=question_bank_name),
         )
 
+    @traced()
     async def handle_delete_question_bank(self, question_bank_name: str):
         await self.question_bank_manager.delete_question_bank(question_bank_name)
         await self.send(f"{question_bank_name} deleted!", Channel.BOT)
 
+    @traced()
+    async def handle_skip_globally_posted(self, question_bank_name: str, skip: bool):
+        await self.question_bank_manager.set_skip_globally_posted(
+            question_bank_name, skip
+        )
+        if skip:
+            msg = f"{question_bank_name} will skip questions already posted from any question bank."
+        else:
+            msg = f"{question_bank_name} will only skip questions posted from itself."
+        await self.send(msg, Channel.BOT)
+
+    @traced()
     async def handle_list_question_banks(self):
         msg = await self.question_bank_manager.get_question_bank_list_text()
         await self.send(msg, Channel.BOT)
 
+    @traced()
     async def handle_view_schedulers(self):
-        text = (
-            "\n".join([str(scheduler) for scheduler in self.schedulers])
-            or "No schedulers active."
-        )
+        text = get_scheduler_list_text(self.schedulers, NUM_UPCOMING_POST_TIMES)
         await self.send(text, Channel.BOT)
 
+    @traced()
     async def handle_check_for_schedulers(self):
+        with SCHEDULER_TICK.time():
+            await self._check_for_schedulers()
+
+    async def _check_for_schedulers(self):
         async with self.state_lock:  # On schedulers
+            posted: list[Scheduler] = []
             # Make shallow copy so can be reused
             for scheduled_post in self.schedulers[:]:  # noqa
                 if not scheduled_post.should_post():
@@ -190,7 +416,7 @@ class LeetcodeBot:
                     except Exception as e:
                         log.exception(e, "exception occurred when getting final post.")
                     finally:
-                        self.schedulers.remove(scheduled_post)
+                        await self._remove_scheduler(scheduled_post)
                         log.info(f"Ended and removed campaign {scheduled_post}")
                         continue
 
@@ -205,7 +431,7 @@ class LeetcodeBot:
                     await self.post_question(post)
                 except FailedScrapeError as e:
                     await self.handle_error(e, f"Removing scheduler {scheduled_post}")
-                    self.schedulers.remove(scheduled_post)
+                    await self._remove_scheduler(scheduled_post)
                     continue
                 except Exception as e:
                     log.exception(e)
@@ -213,29 +439,43 @@ class LeetcodeBot:
                         f"Unexpected error posting, removing scheduler {scheduled_post}",
                         Channel.BOT,
                     )
-                    self.schedulers.remove(scheduled_post)
+                    await self._remove_scheduler(scheduled_post)
                     continue
 
                 if scheduled_post.should_delete():
-                    self.schedulers.remove(scheduled_post)
+                    await self._remove_scheduler(scheduled_post)
+                else:
+                    posted.append(scheduled_post)
 
+            # Save progress of everything that posted in one write
+            await self._save_schedulers(posted)
+
+    @traced()
     async def handle_campaign(
         self,
         args: CampaignCommandArgs,
     ):
-        # parse time and day
-        try:
-            time = parse_time_str(args.time_str)
-        except ValueError:
-            raise FailedToParseTimeStringError(args.time_str)
+        with span("parse_args"):
+            # parse time and day
+            try:
+                time = parse_time_str(args.time_str)
+            except ValueError:
+                raise FailedToParseTimeStringError(args.time_str)
 
-        try:
-            days = parse_days(args.days_str)
-        except ValueError:
-            raise FailedToParseDaysStringError(args.days_str)
+            try:
+                days = parse_days(args.days_str)
+            except ValueError:
+                raise FailedToParseDaysStringError(args.days_str)
+
+            question_filters = None
+            if args.question_filter is not None:
+                try:
+                    question_filters = parse_question_filters(args.question_filter)
+                except ValueError:
+                    raise FailedToParseQuestionFilterError(args.question_filter)
 
         # Generate date
-        date_generator = DateGenerator(days, time)
+        date_generator = DateGenerator(days, time, self.clock)
 
         campaign = Campaign(
             self.question_bank_manager,
@@ -244,6 +484,9 @@ class LeetcodeBot:
             self.stats,
             length=args.length,
             story_prompt=args.story_prompt,
+            question_filters=question_filters,
+            openai_client=self.openai_client,
+            leetcode_client=self.leetcode_client,
         )
         await campaign.init()
 
@@ -257,27 +500,123 @@ class LeetcodeBot:
         # await self.send(str(days), Channel.BOT)
 
     async def handle_reaction_add(self, user_name: str, post_id: int, emoji: str):
+        REACTIONS.inc("add")
         await self.stats.log_user_reaction_add(user_name, post_id, emoji)
 
     async def handle_reaction_remove(self, user_name: str, post_id: int, emoji: str):
+        REACTIONS.inc("remove")
         await self.stats.log_user_reaction_remove(user_name, post_id, emoji)
 
+    @traced()
     async def handle_stats(self):
         user_stats = await self.stats.get_user_stats()
         text = get_stats_text(user_stats)
         await self.send(text, Channel.BOT)
 
+    @traced()
+    async def handle_bot_stats(self):
+        await self.send(
+            f"Message queue: {self.message_queue.get_stats_text()}\n"
+            f"LLM response cache: {response_cache.get_stats_text()}",
+            Channel.BOT,
+        )
+
+    @traced()
+    async def handle_diagnostics(self):
+        await self.send(
+            get_diagnostics_text(
+                self.loop_watchdog.get_stats_text(),
+                self.loop_watchdog.get_offenders(NUM_DIAGNOSTICS_OFFENDERS),
+            ),
+            Channel.BOT,
+        )
+
+    @traced()
+    async def handle_profile_cpu(self, seconds: float):
+        self._start_profile(seconds, self._capture_cpu_profile(seconds))
+        await self.send(
+            f"Profiling CPU for {seconds:.0f}s, results will be posted here.",
+            Channel.BOT,
+        )
+
+    @traced()
+    async def handle_profile_memory(self, seconds: float):
+        self._start_profile(seconds, self._capture_memory_profile(seconds))
+        await self.send(
+            f"Tracing memory allocations for {seconds:.0f}s, results will be posted here.",
+            Channel.BOT,
+        )
+
+    def _start_profile(self, seconds: float, capture):
+        if not 0 < seconds <= PROFILE_MAX_SECONDS:
+            capture.close()
+            raise InvalidProfileDurationError(seconds, PROFILE_MAX_SECONDS)
+        if self._profiling:
+            capture.close()
+            raise ProfileAlreadyRunningError()
+        self._profiling = True
+        # The capture waits for seconds, so don't hold up the command
+        self._start_background_task(self._run_profile(capture))
+
+    async def _run_profile(self, capture):
+        try:
+            await capture
+        except Error as e:
+            await self.handle_error(e)
+        except Exception as e:
+            log.exception(f"Profile failed: {e}")
+            await self.handle_error(UnexpectedError())
+        finally:
+            self._profiling = False
+
+    async def _capture_cpu_profile(self, seconds: float):
+        profile = await profile_cpu(seconds)
+        await self.send(
+            get_cpu_profile_text(profile, NUM_PROFILE_TOP),
+            Channel.BOT,
+            file_attachment=File(
+                BytesIO(profile.get_folded_text().encode()),
+                filename="cpu_profile.folded",
+            ),
+        )
+
+    async def _capture_memory_profile(self, seconds: float):
+        profile = await profile_memory(seconds)
+        await self.send(
+            get_memory_profile_text(profile, NUM_PROFILE_TOP),
+            Channel.BOT,
+            file_attachment=File(
+                BytesIO(profile.get_report_text(NUM_PROFILE_REPORT_SITES).encode()),
+                filename="memory_profile.txt",
+            ),
+        )
+
+    @traced()
+    async def handle_trace(self, which: str):
+        if which != "last":
+            raise UnknownTraceError(which)
+        if tracer.last_slow is None:
+            msg = f"No command has taken over {tracer.slow_threshold * 1000:.0f}ms yet."
+        else:
+            msg = get_trace_text(tracer.last_slow)
+        await self.send(msg, Channel.BOT)
+
+    @traced()
     async def handle_delete_scheduler(self, id: int):
         async with self.state_lock:
-            del self.schedulers[id]
+            scheduler = next((s for s in self.schedulers if s.id == id), None)
+            if scheduler is None:
+                raise SchedulerDoesNotExistError(id)
+            await self._remove_scheduler(scheduler)
 
         await self.send(f"Scheduler {id} deleted.", Channel.BOT)
 
-    async def test(self, prompt: Optional[str]):
-        client = OpenAIClient()
-        res = client.test(prompt)
+    async def test(self, prompt: Optional[str], fresh: bool = False):
+        client = self.openai_client or get_openai_client()
+        res = client.test(prompt, bypass_cache=fresh)
         return res
 
+    @traced()
     async def handle_error(
         self, error: Error, additional_messages: Optional[str] = None
     ):
@@ -287,8 +626,21 @@ class LeetcodeBot:
         displayed_msg = error.displayed_msg + (
             f"\n{additional_messages}" if additional_messages else ""
         )
-        await self.send(displayed_msg, Channel.BOT)
+        await self.send(
+            displayed_msg, Channel.BOT, priority=Priority.LOW, coalesce=True
+        )
 
     async def add_to_schedulers(self, scheduler: Scheduler):
         async with self.state_lock:
             self.schedulers.append(scheduler)
+            await self._save_schedulers([scheduler])
+
+    # STATE LOCK MUST BE ACQUIRED ALREADY
+    async def _save_schedulers(self, schedulers: Iterable[Scheduler]):
+        specs = [spec for s in schedulers if (spec := s.to_spec()) is not None]
+        await self.scheduler_store.save(specs)
+
+    # STATE LOCK MUST BE ACQUIRED ALREADY
+    async def _remove_scheduler(self, scheduler: Scheduler):
+        self.schedulers.remove(scheduler)
+        await self.scheduler_store.delete(scheduler.id)
@@ -0,0 +1,204 @@
+import asyncio
+from dataclasses import dataclass, field
+from enum import IntEnum
+import heapq
+import itertools
+import logging
+import time
+from typing import Any, Dict, Optional
+
+from discord import Message
+from discord.channel import TextChannel
+
+from src.constants.config import DISCORD_CHANNEL_BURST, DISCORD_CHANNEL_RATE_LIMIT
+
+log = logging.getLogger(__name__)
+
+COALESCED_SUFFIX = "\n(repeated {} times)"
+COALESCED_SUFFIX_MAX = COALESCED_SUFFIX.format(999999)  # Space to leave when packing
+
+
+class Priority(IntEnum):
+    # Lower is sent first
+    HIGH = 0  # Posts to the MAIN channel
+    NORMAL = 1  # Command responses in the BOT channel
+    LOW = 2  # Error reports
+
+
+class TokenBucket:
+    def __init__(self, rate: float, capacity: int):
+        self.rate = rate  # tokens per second
+        self.capacity = capacity
+        self.tokens = float(capacity)
+        self.updated = time.monotonic()
+
+    def _refill(self):
+        now = time.monotonic()
+        self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+
+    def get_wait_time(self) -> float:
+        """
+        Returns seconds until a token is available, 0 if one is available now
+        """
+        self._refill()
+        if self.tokens >= 1:
+            return 0
+        return (1 - self.tokens) / self.rate
+
+    def consume(self):
+        self.tokens -= 1
+
+
+@dataclass(order=True)
+class _QueuedMessage:
+    priority: int
+    seq: int
+    channel: TextChannel = field(compare=False)
+    msg: str = field(compare=False)
+    kwargs: Dict[str, Any] = field(compare=False)
+    enqueued_at: float = field(compare=False)
+    coalesce_key: Optional[tuple] = field(default=None, compare=False)
+    # One future per caller, so one cancelled caller doesn't cancel the send for the others
+    waiters: list[asyncio.Future] = field(default_factory=list, compare=False)
+
+
+class MessageQueue:
+    """
+    Central queue for outbound discord messages.
+    Messages are sent in priority order, subject to a token bucket per channel. Identical coalesced messages
+    waiting in the queue are merged into one.
+    """
+
+    def __init__(
+        self,
+        rate: float = DISCORD_CHANNEL_RATE_LIMIT,
+        capacity: int = DISCORD_CHANNEL_BURST,
+    ):
+        self.rate = rate
+        self.capacity = capacity
+
+        # Channel id -> heap of messages for that channel
+        self._heaps: Dict[int, list[_QueuedMessage]] = {}
+        self._seq = itertools.count()
+        self._buckets: Dict[int, TokenBucket] = {}
+        self._pending_coalesced: Dict[tuple, _QueuedMessage] = {}
+        self._drain_task: Optional[asyncio.Task] = None
+
+        # Metrics
+        self.num_sent = 0
+        self.num_coalesced = 0
+        self.total_wait_time = 0.0
+        self.max_wait_time = 0.0
+
+    def enqueue(
+        self,
+        channel: TextChannel,
+        msg: str,
+        priority: Priority = Priority.NORMAL,
+        coalesce: bool = False,
+        **kwargs,
+    ) -> asyncio.Future[Message]:
+        """
+        Returns a future that resolves to the sent message.
+        If coalesce is set, an identical message already waiting for the same channel is reused.
+        """
+        future = asyncio.get_running_loop().create_future()
+
+        coalesce_key = (channel.id, msg) if coalesce and not kwargs else None
+        if coalesce_key and (queued := self._pending_coalesced.get(coalesce_key)):
+            queued.waiters.append(future)
+            if priority < queued.priority:
+                queued.priority = priority
+                heapq.heapify(self._heaps[channel.id])
+            self.num_coalesced += 1
+            return future
+
+        queued = _QueuedMessage(
+            priority=priority,
+            seq=next(self._seq),
+            channel=channel,
+            msg=msg,
+            kwargs=kwargs,
+            enqueued_at=time.monotonic(),
+            coalesce_key=coalesce_key,
+            waiters=[future],
+        )
+        heapq.heappush(self._heaps.setdefault(channel.id, []), queued)
+        if coalesce_key:
+            self._pending_coalesced[coalesce_key] = queued
+
+        if self._drain_task is None or self._drain_task.done():
+            self._drain_task = asyncio.create_task(self._drain())
+
+        return future
+
+    def get_num_queued(self):
+        return sum(len(heap) for heap in self._heaps.values())
+
+    def get_stats_text(self):
+        avg_wait = self.total_wait_time / self.num_sent if self.num_sent else 0
+        return (
+            f"queued={self.get_num_queued()} sent={self.num_sent} coalesced={self.num_coalesced} "
+            f"avg_wait={avg_wait:.3f}s max_wait={self.max_wait_time:.3f}s"
+        )
+
+    def _get_bucket(self, channel_id: int):
+        if channel_id not in self._buckets:
+            self._buckets[channel_id] = TokenBucket(self.rate, self.capacity)
+        return self._buckets[channel_id]
+
+    def _pop_next_ready(self) -> tuple[Optional[_QueuedMessage], float]:
+        """
+        Returns the highest priority channel head whose channel has a token, or the time to wait for one
+        """
+        best = None
+        min_wait = float("inf")
+        for channel_id, heap in self._heaps.items():
+            if not heap:
+                continue
+            wait = self._get_bucket(channel_id).get_wait_time()
+            if wait > 0:
+                min_wait = min(min_wait, wait)
+            elif best is None or heap[0] < best:
+                best = heap[0]
+
+        if best is None:
+            return None, min_wait
+        heapq.heappop(self._heaps[best.channel.id])
+        return best, 0
+
+    async def _drain(self):
+        while self.get_num_queued():
+            queued, wait = self._pop_next_ready()
+            if not queued:
+                await asyncio.sleep(wait)
+                continue
+
+            if queued.coalesce_key:
+                del self._pending_coalesced[queued.coalesce_key]
+            if all(waiter.done() for waiter in queued.waiters):  # All callers cancelled
+                continue
+
+            self._get_bucket(queued.channel.id).consume()
+            wait_time = time.monotonic() - queued.enqueued_at
+            self.total_wait_time += wait_time
+            self.max_wait_time = max(self.max_wait_time, wait_time)
+
+            msg = queued.msg
+            if len(queued.waiters) > 1:
+                msg += COALESCED_SUFFIX.format(len(queued.waiters))
+
+            try:
+                res = await queued.channel.send(msg, **queued.kwargs)
+            except Exception as e:
+                log.exception(f"Failed to send message to channel {queued.channel.id}")
+                for waiter in queued.waiters:
+                    if not waiter.done():
+                        waiter.set_exception(e)
+                continue
+
+            self.num_sent += 1
+            for waiter in queued.waiters:
+                if not waiter.done():
+                    waiter.set_result(res)
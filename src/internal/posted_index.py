@@ -0,0 +1,25 @@
+from typing import Iterable
+
+from src.utils.leetcode_client import get_slug_from_url
+
+
+class PostedIndex:
+    """
+    Slugs of questions posted from any question bank, so the same question in several banks can be recognized.
+    Keyed by slug rather than url, since urls for one question can differ (ie, trailing /description/).
+    """
+
+    def __init__(self):
+        self._slugs: set[str] = set()
+
+    def add(self, url: str):
+        self._slugs.add(get_slug_from_url(url))
+
+    def add_all(self, urls: Iterable[str]):
+        self._slugs.update(get_slug_from_url(url) for url in urls)
+
+    def __contains__(self, url: str):
+        return get_slug_from_url(url) in self._slugs
+
+    def __len__(self):
+        return len(self._slugs)
@@ -1,10 +1,14 @@
 import asyncio
 import logging
 from dataclasses import dataclass, field
-from typing import Awaitable, Callable, ClassVar, Optional
+from datetime import datetime
+from typing import Awaitable, Callable, ClassVar, List, Optional
 
+from src.utils.clock import Clock
 from src.utils.leetcode_client import LeetcodeClient, QuestionData
+from src.utils.tracing import traced
 from src.types.errors import FailedScrapeError
+from src.types.scheduler_specs import PostSchedulerSpec, SchedulerSpec
 
 # Logging Setup
 log = logging.getLogger("Discord Bot, Posts")
@@ -44,6 +48,7 @@ class PostGenerator:
         get_story_func: Callable[
             [QuestionData], Awaitable[str | None]
         ] = _default_get_story_func,  # Accepts QuestionData and story history
+        leetcode_client: Optional[LeetcodeClient] = None,
     ):
         """
         Only 1 of url or question bank can be specified
@@ -51,15 +56,19 @@ class PostGenerator:
         self.get_url_func = get_url_func
         self.desc = desc
         self.get_story_func = get_story_func
+        self.leetcode_client = leetcode_client
 
     async def __call__(self) -> Post:
         return await self.generate()
 
+    @traced()
     async def generate(self) -> Post:
         url = await self.get_url_func()
         log.info(f"Got url {url}")
         try:
-            question_data = leetcode_client.scrape_question(url)
+            question_data = (self.leetcode_client or leetcode_client).scrape_question(
+                url
+            )
         except Exception:
             raise FailedScrapeError(url)
 
@@ -89,6 +98,7 @@ class Scheduler:
         get_post_func: Callable[[], Awaitable[Post]],
         should_post_func: Callable[[], bool],
         repeats: int = 1,
+        post_date: Optional[datetime] = None,  # For one off posts
     ):
         self.id = (
             Scheduler._id_counter
@@ -98,6 +108,14 @@ class Scheduler:
         self._get_post_func = get_post_func
         self._should_post_func = should_post_func
         self.repeats = repeats
+        self.post_date = post_date
+
+    def _restore_id(self, id: int):
+        """
+        Reuses the id of a restored scheduler, keeping new ids unique
+        """
+        self.id = id
+        Scheduler._id_counter = max(Scheduler._id_counter, id + 1)
 
     async def get_post(self):
         if self.repeats == 0:
@@ -119,6 +137,86 @@ class Scheduler:
     def should_delete(self):
         return self.repeats == 0
 
+    def upcoming_post_times(self, n: int) -> List[datetime]:
+        """
+        Returns up to the next n times this will post, if known
+        """
+        if self.post_date is None or self.repeats == 0:
+            return []
+        return [self.post_date][:n]
+
+    def to_spec(self) -> Optional[SchedulerSpec]:
+        """
+        Serializable state to restore this scheduler from, or None if it can't be restored
+        """
+        return None
+
     # TODO: Work on this!
     def __str__(self):
         return f"{self.id}: Repeats={self.repeats}"
+
+
+class PostScheduler(Scheduler):
+    """
+    Posts a single question at a set date
+    """
+
+    def __init__(
+        self,
+        url: str,
+        post_date: datetime,
+        clock: Clock,
+        desc: Optional[str] = None,
+        story: Optional[str] = None,
+        leetcode_client: Optional[LeetcodeClient] = None,
+    ):
+        self.url = url
+        self.desc = desc
+        self.story = story
+        self.clock = clock
+
+        post_generator = PostGenerator(
+            self._get_url,
+            desc=desc,
+            get_story_func=self._get_story,
+            leetcode_client=leetcode_client,
+        )
+        super().__init__(post_generator, self._should_post, post_date=post_date)
+
+    @classmethod
+    def from_spec(
+        cls,
+        spec: PostSchedulerSpec,
+        clock: Clock,
+        leetcode_client: Optional[LeetcodeClient] = None,
+    ) -> "PostScheduler":
+        scheduler = cls(
+            spec.url,
+            spec.post_date,
+            clock,
+            desc=spec.desc,
+            story=spec.story,
+            leetcode_client=leetcode_client,
+        )
+        scheduler._restore_id(spec.id)
+        return scheduler
+
+    def to_spec(self) -> PostSchedulerSpec:
+        assert self.post_date is not None
+        return PostSchedulerSpec(
+            id=self.id,
+            url=self.url,
+            post_date=self.post_date,
+            desc=self.desc,
+            story=self.story,
+        )
+
+    async def _get_url(self):
+        return self.url
+
+    async def _get_story(self, *args):
+        return self.story
+
+    def _should_post(self):
+        assert self.post_date is not None
+        return self.clock.now() > self.post_date
@@ -1,14 +1,19 @@
 import asyncio
-from dataclasses import dataclass
+from dataclasses import dataclass, field
+from io import StringIO
 import os
-from typing import List
+from collections import defaultdict
+from typing import Collection, Dict, Iterable, List, Optional, Sequence, Tuple
 import logging
 import csv
 import random
 from datetime import datetime
 
 from src.constants.config import QUESTION_BANK_DIR
+from src.internal.posted_index import PostedIndex
 from src.types.errors import NoMoreQuestionsInQuestionBankError
+from src.utils.clock import Clock, system_clock
+from src.utils.leetcode_client import get_slug_from_url, question_metadata_cache
 
 log = logging.getLogger("internal/question_bank.py")
 
@@ -19,40 +24,244 @@ question_bank_lock: asyncio.Lock = asyncio.Lock()
 class Question:
     url: str
     posted: bool = False
+    line: Optional[int] = field(
+        default=None, compare=False, repr=False
+    )  # In the file it was parsed from, for error messages
+
+
+@dataclass(frozen=True)
+class QuestionBankInfo:
+    """
+    Index entry for a question bank, available without parsing it
+    """
+
+    filename: str
+    size: int  # bytes
+    last_updated_time: datetime
+
+
+DIFFICULTIES = ["easy", "medium", "hard"]
+
+
+def get_question_filter_key(question_filter: str) -> str:
+    """
+    Filters are a difficulty (easy, medium, hard) or a leetcode topic slug (ie, dynamic-programming)
+    """
+    question_filter = question_filter.lower()
+    if question_filter in DIFFICULTIES:
+        return f"difficulty:{question_filter}"
+    return f"topic:{question_filter}"
+
+
+class _RandomSet:
+    """
+    Set of ints supporting add, remove and uniform random sampling in constant time
+    """
+
+    def __init__(self, items: Iterable[int] = ()):
+        self._items: List[int] = []
+        self._positions: Dict[int, int] = {}
+        for item in items:
+            self.add(item)
+
+    def add(self, item: int):
+        if item not in self._positions:
+            self._positions[item] = len(self._items)
+            self._items.append(item)
+
+    def remove(self, item: int):
+        pos = self._positions.pop(item, None)
+        if pos is None:
+            return
+        # Move the last item into the hole
+        last = self._items.pop()
+        if pos < len(self._items):
+            self._items[pos] = last
+            self._positions[last] = pos
+
+    def sample(self) -> int:
+        return self._items[random.randrange(len(self._items))]
+
+    def __len__(self):
+        return len(self._items)
+
+    def __contains__(self, item: int):
+        return item in self._positions
 
 
 @dataclass
 class QuestionBank:
     filename: str
-    questions: List[Question]
-    last_updated_time: datetime  # Convert to file, and re-uploaded
+    questions: List[Question]  # Call rebuild_index after changing
+    last_updated_time: datetime  # Changed, or re-uploaded
+    dirty: bool = False  # Has changes not written to disk
+    clock: Clock = field(default=system_clock, repr=False, compare=False)
+    # Serialized csv, and the last_updated_time it was serialized at
+    _csv_cache: Optional[Tuple[datetime, bytes]] = field(
+        default=None, init=False, repr=False, compare=False
+    )
 
-    def get_random_question_url(self) -> str:  # Returns file URL
-        valid_questions = [
-            question for question in self.questions if not question.posted
+    def __post_init__(self):
+        self.rebuild_index()
+
+    def rebuild_index(self):
+        # Indexes into questions, of unposted questions
+        self._unposted = _RandomSet(
+            i for i, question in enumerate(self.questions) if not question.posted
+        )
+        # Filter key (see get_question_filter_key) -> unposted questions matching it
+        self._unposted_by_key: Dict[str, _RandomSet] = defaultdict(_RandomSet)
+        self._keys_by_question: Dict[int, List[str]] = {}
+        # Globally posted questions removed from sampling, see get_random_question_url
+        self._skipped: List[int] = []
+        self.index_metadata()
+
+    def index_metadata(self, not_found_slugs: Collection[str] = ()):
+        """
+        Adds questions with known metadata to the difficulty and topic index. Questions already indexed are skipped.
+        Questions in not_found_slugs don't exist on leetcode, they're indexed under no filters so they aren't
+        looked up again.
+        """
+        for i, question in enumerate(self.questions):
+            if i in self._keys_by_question:
+                continue
+            slug = get_slug_from_url(question.url)
+            metadata = question_metadata_cache.get(slug)
+            if not metadata:
+                if slug in not_found_slugs:
+                    self._keys_by_question[i] = []
+                continue
+
+            keys = [get_question_filter_key(metadata.difficulty)] + [
+                get_question_filter_key(topic) for topic in metadata.topics
+            ]
+            self._keys_by_question[i] = keys
+            if i in self._unposted:
+                for key in keys:
+                    self._unposted_by_key[key].add(i)
+
+    def get_unindexed_urls(self) -> List[str]:
+        """
+        Unposted questions not in the difficulty and topic index yet, filtered draws can't pick them
+        """
+        return [
+            self.questions[i].url
+            for i in range(len(self.questions))
+            if i in self._unposted and i not in self._keys_by_question
         ]
 
-        if len(valid_questions) == 0:
-            raise NoMoreQuestionsInQuestionBankError(self.filename)
+    def get_random_question_url(
+        self,
+        skip_posted: Optional[PostedIndex] = None,
+        question_filter: Optional[str] = None,
+    ) -> str:  # Returns file URL
+        """
+        Samples an unposted question in constant time.
+        If skip_posted is passed, questions already posted from any bank in it are skipped too.
+        If question_filter is passed, only questions of that difficulty or topic are sampled.
+        """
+        if skip_posted is None and self._skipped:
+            # No longer skipping, put them back
+            for i in self._skipped:
+                self._add_unposted(i)
+            self._skipped.clear()
+
+        if question_filter:
+            pool = self._unposted_by_key.get(get_question_filter_key(question_filter))
+        else:
+            pool = self._unposted
+
+        while pool:
+            i = pool.sample()
+            question = self.questions[i]
+            if skip_posted is not None and question.url in skip_posted:
+                # Posted from another bank, never valid while skipping
+                self._remove_unposted(i)
+                self._skipped.append(i)
+                continue
+
+            question.posted = True
+            self._remove_unposted(i)
+            self.dirty = True
+            self.last_updated_time = self.clock.now()
+            return question.url
+
+        raise NoMoreQuestionsInQuestionBankError(self.filename, question_filter)
+
+    def _add_unposted(self, i: int):
+        self._unposted.add(i)
+        for key in self._keys_by_question.get(i, []):
+            self._unposted_by_key[key].add(i)
+
+    def _remove_unposted(self, i: int):
+        self._unposted.remove(i)
+        for key in self._keys_by_question.get(i, []):
+            self._unposted_by_key[key].remove(i)
+
+    def merge_questions(self, questions: List[Question]) -> Tuple[int, int, int]:
+        """
+        Replaces the questions with a re-uploaded list, keeping posted flags of questions in both.
+        Returns the number of questions (added, removed, kept).
+        """
+        posted_by_url: Dict[str, bool] = {}
+        for question in self.questions:
+            posted_by_url[question.url] = (
+                posted_by_url.get(question.url, False) or question.posted
+            )
+
+        added = kept = 0
+        new_urls = set()
+        for question in questions:
+            new_urls.add(question.url)
+            if question.url in posted_by_url:
+                question.posted = question.posted or posted_by_url[question.url]
+                kept += 1
+            else:
+                added += 1
+        removed = sum(1 for url in posted_by_url if url not in new_urls)
+
+        self.questions = questions
+        self.rebuild_index()
+        self.dirty = True
+        self.last_updated_time = self.clock.now()
+        return added, removed, kept
+
+    def snapshot(self) -> Tuple[Tuple[str, bool], ...]:
+        """
+        Immutable copy of the rows, safe to serialize off the event loop
+        """
+        return tuple((q.url, q.posted) for q in self.questions)
+
+    def get_cached_csv(self) -> Optional[bytes]:
+        """
+        Returns the serialized csv if the bank hasn't changed since it was serialized
+        """
+        if self._csv_cache and self._csv_cache[0] == self.last_updated_time:
+            return self._csv_cache[1]
+        return None
+
+    def set_cached_csv(self, serialized_time: datetime, data: bytes):
+        self._csv_cache = (serialized_time, data)
 
-        i = random.randrange(len(valid_questions))
-        question = valid_questions[i]
-        question.posted = True
-        return question.url
 
-    def convert_to_file(self) -> str:  # Returns path to file
-        # Write to /data/question_banks/
-        rows = [[q.url, q.posted] for q in self.questions]
+def serialize_question_bank_rows(rows: Sequence[Tuple[str, bool]]) -> bytes:
+    file = StringIO()
+    writer = csv.writer(file, delimiter=",", lineterminator="\n")
+    writer.writerows(rows)
+    return file.getvalue().encode("utf-8")
 
-        # Create directories if they don't exist
-        os.makedirs(QUESTION_BANK_DIR, exist_ok=True)
 
-        with open(
-            QUESTION_BANK_DIR + self.filename, mode="w", encoding="utf-8"
-        ) as file:
-            writer = csv.writer(file, delimiter=",", lineterminator="\n")
-            writer.writerows(rows)
+def write_question_bank_file(
+    filename: str, rows: Sequence[Tuple[str, bool]]
+) -> str:  # Returns path to file
+    # Write to /data/question_banks/
+    # Create directories if they don't exist
+    os.makedirs(QUESTION_BANK_DIR, exist_ok=True)
 
-        self.last_updated_time = datetime.now()
+    # Write then rename, so readers never see a partial file
+    path = QUESTION_BANK_DIR + filename
+    with open(path + ".tmp", mode="wb") as file:
+        file.write(serialize_question_bank_rows(rows))
+    os.replace(path + ".tmp", path)
 
-        return QUESTION_BANK_DIR + self.filename
+    return path
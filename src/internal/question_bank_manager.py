@@ -1,53 +1,205 @@
 import asyncio
+import codecs
 import os
-from typing import Dict, Iterable
+from collections import OrderedDict
+from dataclasses import replace
+from typing import AsyncIterable, Dict, Iterable, List, Mapping, Optional
 from discord import Attachment
 import logging
 import csv
-from io import StringIO
+import json
+import time
 from datetime import datetime
 
-from src.constants.config import QUESTION_BANK_DIR
-from src.internal.question_bank import Question, QuestionBank
+from src.constants.config import (
+    MAX_LOADED_QUESTION_BANKS,
+    MAX_QUESTION_BANK_UPLOAD_BYTES,
+    QUESTION_BANK_DIR,
+    QUESTION_BANK_OPTIONS_FILE,
+    QUESTION_BANK_LOADER_WORKERS,
+)
+from src.internal.posted_index import PostedIndex
+from src.internal.question_bank import (
+    Question,
+    QuestionBank,
+    QuestionBankInfo,
+    serialize_question_bank_rows,
+    write_question_bank_file,
+)
 from src.types.errors import (
     FailedToUploadQuestionBankError,
+    InvalidQuestionsInQuestionBankError,
     QuestionBankDoesNotExistError,
 )
-from src.utils.discord import get_file
+from src.utils.clock import Clock, system_clock
+from src.utils.discord import stream_file
+from src.utils.leetcode_client import LeetcodeClient, get_slug_from_url
+from src.utils.metrics import InstrumentedLock
 from src.utils.text import get_formatted_question_bank_list
+from src.utils.tracing import traced
 from src.utils.validators import is_url
 
 log = logging.getLogger(__name__)
 
+# utf-32 first, since its little endian BOM starts with utf-16's
+_BYTE_ORDER_MARKS = [
+    (codecs.BOM_UTF32_LE, "utf-32"),
+    (codecs.BOM_UTF32_BE, "utf-32"),
+    (codecs.BOM_UTF8, "utf-8-sig"),
+    (codecs.BOM_UTF16_LE, "utf-16"),
+    (codecs.BOM_UTF16_BE, "utf-16"),
+]
+
 
 class QuestionBankManager:
-    def __init__(self):
-        self.question_banks: Dict[str, QuestionBank] = {}
-        self.state_lock = asyncio.Lock()
+    """
+    Reads of the bank index are lock free: the index is never mutated in place, writers replace it under index_lock.
+    Each bank has its own lock, held while loading or mutating it. Files are written on worker threads from
+    immutable snapshots, outside of any lock.
+    """
+
+    def __init__(
+        self,
+        leetcode_client: Optional[LeetcodeClient] = None,
+        clock: Optional[Clock] = None,
+    ):
+        self.leetcode_client = leetcode_client or LeetcodeClient()
+        self.clock = clock or system_clock  # For banks' last updated times
+        # Every known bank, from disk or uploaded. Cheap, built without parsing. Copy on write.
+        self.question_bank_index: Mapping[str, QuestionBankInfo] = {}
+        # Parsed banks, least recently used first, at most MAX_LOADED_QUESTION_BANKS
+        self.question_banks: OrderedDict[str, QuestionBank] = OrderedDict()
+        self.index_lock = InstrumentedLock(
+            "question_bank_index"
+        )  # Writers of question_bank_index
+        self._bank_locks: Dict[str, asyncio.Lock] = {}
+        self._pending_writes: Dict[str, asyncio.Task] = {}
+        # Questions posted from any bank. Complete once every bank has been loaded, see warm_question_banks.
+        self.posted_index = PostedIndex()
+        self._posted_index_complete = asyncio.Event()
+        self._warming = False
+        # Banks that skip questions already posted from other banks
+        self._skip_globally_posted: set[str] = set()
 
     async def load_question_banks(self):
-        async with self.state_lock:
-            # Load question banks from file
-            log.info(f"Loading question banks from {QUESTION_BANK_DIR}...")
-            # Create directories if they don't exist
-            os.makedirs(QUESTION_BANK_DIR, exist_ok=True)
-
-            question_banks = os.listdir(QUESTION_BANK_DIR)
-            log.info(f"Question banks: {question_banks}")
-
-            for bank in question_banks:
-                log.info(f"Loading {QUESTION_BANK_DIR + bank}")
-                formatted_question_bank = self._csv_to_question_bank(
-                    bank, open(QUESTION_BANK_DIR + bank, "r")
+        """
+        Indexes question banks on disk by name, size and modified time. Banks are parsed on first use,
+        or ahead of time by warm_question_banks.
+        """
+        log.info(f"Indexing question banks in {QUESTION_BANK_DIR}...")
+        # Create directories if they don't exist
+        os.makedirs(QUESTION_BANK_DIR, exist_ok=True)
+
+        index = {}
+        with os.scandir(QUESTION_BANK_DIR) as entries:
+            for entry in entries:
+                if not entry.is_file() or entry.name.endswith(".tmp"):
+                    continue
+                stat = entry.stat()
+                index[entry.name] = QuestionBankInfo(
+                    filename=entry.name,
+                    size=stat.st_size,
+                    last_updated_time=datetime.fromtimestamp(stat.st_mtime),
                 )
-                self.question_banks[bank] = formatted_question_bank
 
-    async def upload_question_bank(self, question_file: Attachment):
+        async with self.index_lock:
+            if index.keys() - self.question_bank_index.keys():
+                self._posted_index_complete.clear()  # New banks to read
+            self.question_bank_index = {**self.question_bank_index, **index}
+
+        log.info(f"Question banks: {list(self.question_bank_index)}")
+
+        self._skip_globally_posted = await asyncio.to_thread(
+            self._load_skip_globally_posted
+        )
+
+    async def warm_question_banks(self):
+        """
+        Parses indexed banks on a pool of worker threads, smallest first. Banks are kept until
+        MAX_LOADED_QUESTION_BANKS are loaded, the rest are only read to fill the posted index.
+        """
+        self._warming = True
+        try:
+            await self._warm_question_banks()
+        finally:
+            self._warming = False
+            self._posted_index_complete.set()
+
+    async def _warm_question_banks(self):
+        infos = sorted(self.question_bank_index.values(), key=lambda info: info.size)
+        infos = [info for info in infos if info.filename not in self.question_banks]
+        num_to_keep = max(0, MAX_LOADED_QUESTION_BANKS - len(self.question_banks))
+        workers = asyncio.Semaphore(QUESTION_BANK_LOADER_WORKERS)
+
+        async def warm(filename: str, keep: bool):
+            async with workers:
+                if filename not in self.question_bank_index:  # Deleted
+                    return
+                async with self._get_bank_lock(filename):
+                    # Skip if deleted, replaced or loaded on demand in the meantime
+                    if (
+                        filename not in self.question_bank_index
+                        or filename in self.question_banks
+                    ):
+                        return
+                    try:
+                        if keep:
+                            await self._get_question_bank(filename)
+                        else:
+                            question_bank = await asyncio.to_thread(
+                                self._load_question_bank_file, filename, self.clock
+                            )
+                            self._index_posted_questions(question_bank)
+                    except Exception as e:
+                        log.exception(f"Failed to load question bank {filename}: {e}")
+
+        await asyncio.gather(
+            *[warm(info.filename, i < num_to_keep) for i, info in enumerate(infos)]
+        )
+        log.info(
+            f"Warmed question banks, {len(self.question_banks)} loaded, {len(self.posted_index)} posted questions"
+        )
+
+    async def index_question_metadata(self, question_bank_name: str):
+        """
+        Looks up difficulty and topics for questions in the bank that aren't indexed yet,
+        so the bank can be sampled by difficulty or topic. Lookup errors are raised.
+        """
+        async with self._get_bank_lock(question_bank_name):
+            question_bank = await self._get_question_bank(question_bank_name)
+            urls = question_bank.get_unindexed_urls()
+        if not urls:
+            return
+
+        log.info(f"Looking up metadata for {len(urls)} questions")
+        metadata = await self.leetcode_client.fetch_question_metadata(
+            get_slug_from_url(url) for url in urls
+        )
+        not_found_slugs = {slug for slug, data in metadata.items() if data is None}
+
+        async with self._get_bank_lock(question_bank_name):
+            question_bank = await self._get_question_bank(question_bank_name)
+            question_bank.index_metadata(not_found_slugs)
+
+    async def set_skip_globally_posted(self, question_bank_name: str, skip: bool):
+        await self._assert_question_bank_exists(question_bank_name)
+        if skip:
+            self._skip_globally_posted.add(question_bank_name)
+        else:
+            self._skip_globally_posted.discard(question_bank_name)
+        await asyncio.to_thread(
+            self._save_skip_globally_posted, sorted(self._skip_globally_posted)
+        )
+
+    async def upload_question_bank(
+        self, question_file: Attachment, validate: bool = False
+    ):
         """
-        Returns if question bank was updated, or created new
+        Returns if question bank was updated, or created new.
+        If validate, checks every question exists on leetcode first.
         """
         try:
-            question_bank = self._get_question_bank_from_attachment(question_file)
+            question_bank = await self._get_question_bank_from_attachment(question_file)
         except ValueError as e:
             log.exception(e)
             raise FailedToUploadQuestionBankError(error_msg=str(e))
@@ -55,101 +207,393 @@ class QuestionBankManager:
             log.exception(e)
             raise FailedToUploadQuestionBankError()
 
-        async with self.state_lock:
-            if question_bank.filename in self.question_banks:
-                msg = f"Successfully uploaded and replaced question bank with ID: {question_bank.filename}"
+        validation_msg = ""
+        if validate:
+            validation_msg = "\n" + await self._validate_question_bank(question_bank)
+
+        # Not on disk yet
+        question_bank.dirty = True
+        filename = question_bank.filename
+
+        async with self._get_bank_lock(filename, create=True):
+            if filename in self.question_bank_index:
+                # Merge into the existing bank, so campaigns using it keep their progress
+                existing = await self._get_question_bank(filename)
+                added, removed, kept = existing.merge_questions(question_bank.questions)
+                question_bank = existing
+                msg = (
+                    f"Successfully uploaded and updated question bank with ID: {filename}\n"
+                    f"Added {added}, removed {removed}, kept {kept} questions"
+                )
             else:
-                msg = f"Successfully uploaded question bank with ID: {question_bank.filename}"
-            self.question_banks[question_bank.filename] = question_bank
+                msg = f"Successfully uploaded question bank with ID: {filename}"
+            await self._set_info(
+                QuestionBankInfo(
+                    filename=filename,
+                    size=question_file.size,
+                    last_updated_time=question_bank.last_updated_time,
+                )
+            )
+            self._add_loaded_question_bank(question_bank)
+            self._persist_question_bank(question_bank)
 
-        return msg
+        return msg + validation_msg
 
-    async def get_question_bank_download_url(self, question_bank_name: str) -> str:
-        async with self.state_lock:
-            await self._assert_question_bank_exists(question_bank_name)
-            file_path = self.question_banks[question_bank_name].convert_to_file()
-            return file_path
+    async def get_question_bank_file(self, question_bank_name: str) -> bytes:
+        """
+        Returns the bank as csv, serialized on a worker thread only if it changed since the last download
+        """
+        async with self._get_bank_lock(question_bank_name):
+            question_bank = await self._get_question_bank(question_bank_name)
+            if (data := question_bank.get_cached_csv()) is not None:
+                return data
+            rows = question_bank.snapshot()
+            serialized_time = question_bank.last_updated_time
+
+        # Serialize outside the lock, so campaigns can keep drawing questions
+        data = await asyncio.to_thread(serialize_question_bank_rows, rows)
+        question_bank.set_cached_csv(serialized_time, data)
+        return data
 
     async def delete_question_bank(self, question_bank_name: str):
-        async with self.state_lock:
+        async with self._get_bank_lock(question_bank_name):
             await self._assert_question_bank_exists(question_bank_name)
 
+            async with self.index_lock:
+                self.question_bank_index = {
+                    name: info
+                    for name, info in self.question_bank_index.items()
+                    if name != question_bank_name
+                }
+            self.question_banks.pop(question_bank_name, None)
+            # Anyone still waiting on it finds the bank gone
+            del self._bank_locks[question_bank_name]
+            if question_bank_name in self._skip_globally_posted:
+                self._skip_globally_posted.discard(question_bank_name)
+                await asyncio.to_thread(
+                    self._save_skip_globally_posted, sorted(self._skip_globally_posted)
+                )
+
+            if pending_write := self._pending_writes.get(question_bank_name):
+                await asyncio.wait([pending_write])
+
             try:
                 os.remove(QUESTION_BANK_DIR + question_bank_name)
             except FileNotFoundError:
                 log.warning(f"Tried to delete, File not found for {question_bank_name}")
                 pass
 
-            del self.question_banks[question_bank_name]
+    @traced()
+    async def get_random_question_url_from_question_bank(
+        self, question_bank_name: str, question_filter: Optional[str] = None
+    ):
+        if question_filter:
+            # Not indexed yet if the background lookup after a restart is still running, or failed
+            await self.index_question_metadata(question_bank_name)
 
-    async def get_random_question_url_from_question_bank(self, question_bank_name: str):
-        async with self.state_lock:
-            await self._assert_question_bank_exists(
-                question_bank_name=question_bank_name
-            )
-            return self.question_banks[question_bank_name].get_random_question_url()
+        skip_posted = None
+        if question_bank_name in self._skip_globally_posted:
+            # Every bank has to be read before the index can tell what was posted elsewhere
+            await self._wait_for_posted_index()
+            skip_posted = self.posted_index
+
+        async with self._get_bank_lock(question_bank_name):
+            question_bank = await self._get_question_bank(question_bank_name)
+            url = question_bank.get_random_question_url(skip_posted, question_filter)
+            self.posted_index.add(url)
+            self._persist_question_bank(question_bank)
+            return url
+
+    async def _wait_for_posted_index(self):
+        # Warms the banks if that isn't already happening. Takes bank locks, so none can be held.
+        if self._posted_index_complete.is_set():
+            return
+        if self._warming:
+            await self._posted_index_complete.wait()
+        else:
+            await self.warm_question_banks()
 
     async def get_question_bank_list_text(self):
-        async with self.state_lock:
-            question_bank_names = list(self.question_banks.values())
-            msg = get_formatted_question_bank_list(question_bank_names)
-        return msg
+        # Lock free read
+        return get_formatted_question_bank_list(list(self.question_bank_index.values()))
+
+    async def _validate_question_bank(self, question_bank: QuestionBank) -> str:
+        """
+        Looks up every slug on leetcode, warming the metadata cache.
+        Raises InvalidQuestionsInQuestionBankError listing lines that don't exist, otherwise returns a summary.
+        """
+        # No need for state lock
+        slugs = [
+            get_slug_from_url(question.url) for question in question_bank.questions
+        ]
+
+        start = time.perf_counter()
+        try:
+            metadata = await self.leetcode_client.fetch_question_metadata(slugs)
+        except Exception as e:
+            log.exception(e)
+            raise FailedToUploadQuestionBankError(
+                error_msg="Failed to look up questions on leetcode."
+            )
+        elapsed = time.perf_counter() - start
+
+        invalid_lines = [
+            f"Line {question.line}: {question.url}"
+            for question, slug in zip(question_bank.questions, slugs)
+            if metadata.get(slug) is None
+        ]
+        if invalid_lines:
+            raise InvalidQuestionsInQuestionBankError(invalid_lines)
 
-    # For internal methods starting with _, lock must be acquired already!
+        num_slugs = len(metadata)
+        rate = num_slugs / elapsed if elapsed > 0 else float("inf")
+        return (
+            f"Validated {num_slugs} questions in {elapsed:.1f}s ({rate:.0f} slugs/sec)"
+        )
+
+    def _get_bank_lock(
+        self, question_bank_name: str, create: bool = False
+    ) -> asyncio.Lock:
+        """
+        Locks are only made for banks in the index, unless create. Raises QuestionBankDoesNotExistError otherwise.
+        """
+        if question_bank_name not in self._bank_locks:
+            if not create:
+                self._raise_if_question_bank_missing(question_bank_name)
+            self._bank_locks[question_bank_name] = InstrumentedLock("question_bank")
+        return self._bank_locks[question_bank_name]
+
+    # For internal methods starting with _, the bank's lock must be acquired already!
     async def _get_question_bank(self, question_bank_name: str):  # For use by Campaigns
-        # STATE LOCK MUST BE ACQUIRED ALREADY
+        """
+        Returns the bank, parsing it from disk first if it isn't loaded
+        """
+        # BANK LOCK MUST BE ACQUIRED ALREADY
         await self._assert_question_bank_exists(question_bank_name)
-        return self.question_banks[question_bank_name]
 
+        if question_bank_name in self.question_banks:
+            self.question_banks.move_to_end(question_bank_name)
+            return self.question_banks[question_bank_name]
+
+        # Make sure an evicted copy has finished writing before reading it back
+        if pending_write := self._pending_writes.get(question_bank_name):
+            await asyncio.wait([pending_write])
+
+        log.info(f"Loading question bank {question_bank_name}")
+        question_bank = await asyncio.to_thread(
+            self._load_question_bank_file, question_bank_name, self.clock
+        )
+        self._add_loaded_question_bank(question_bank)
+        return question_bank
+
+    def _add_loaded_question_bank(self, question_bank: QuestionBank):
+        """
+        Adds as most recently used, evicting least recently used banks over the limit.
+        Banks with changes not on disk are written out when evicted.
+        """
+        # BANK LOCK MUST BE ACQUIRED ALREADY
+        self.question_banks[question_bank.filename] = question_bank
+        self._index_posted_questions(question_bank)
+        while len(self.question_banks) > MAX_LOADED_QUESTION_BANKS:
+            filename, evicted = self.question_banks.popitem(last=False)
+            if evicted.dirty:
+                self._persist_question_bank(evicted)
+            log.info(f"Evicted question bank {filename} from memory")
+
+    def _persist_question_bank(self, question_bank: QuestionBank) -> asyncio.Task[str]:
+        """
+        Snapshots the bank and writes it to disk on a worker thread. Writes of the same bank happen in order.
+        Returns the write task, which resolves to the file path.
+        """
+        # BANK LOCK MUST BE ACQUIRED ALREADY
+        filename = question_bank.filename
+        rows = question_bank.snapshot()
+        question_bank.dirty = False
+        previous_write = self._pending_writes.get(filename)
+
+        async def write():
+            if previous_write:
+                await asyncio.wait([previous_write])
+            try:
+                path = await asyncio.to_thread(write_question_bank_file, filename, rows)
+            except Exception:
+                log.exception(f"Failed to write question bank {filename}")
+                question_bank.dirty = True
+                raise
+            info = self.question_bank_index.get(filename)
+            if info:
+                await self._set_info(
+                    replace(info, last_updated_time=question_bank.last_updated_time)
+                )
+            return path
+
+        task = asyncio.create_task(write())
+        self._pending_writes[filename] = task
+
+        def on_done(task: asyncio.Task):
+            task.cancelled() or task.exception()  # Retrieve, already logged
+            if self._pending_writes.get(filename) is task:
+                del self._pending_writes[filename]
+
+        task.add_done_callback(on_done)
+        return task
+
+    def _index_posted_questions(self, question_bank: QuestionBank):
+        self.posted_index.add_all(
+            question.url for question in question_bank.questions if question.posted
+        )
+
+    @staticmethod
+    def _load_skip_globally_posted() -> set[str]:
+        try:
+            with open(QUESTION_BANK_OPTIONS_FILE, "r") as file:
+                return set(json.load(file).get("skip_globally_posted", []))
+        except FileNotFoundError:
+            return set()
+
+    @staticmethod
+    def _save_skip_globally_posted(question_bank_names: List[str]):
+        os.makedirs(os.path.dirname(QUESTION_BANK_OPTIONS_FILE), exist_ok=True)
+        with open(QUESTION_BANK_OPTIONS_FILE, "w") as file:
+            json.dump({"skip_globally_posted": question_bank_names}, file)
+
+    async def _set_info(self, info: QuestionBankInfo):
+        async with self.index_lock:
+            self.question_bank_index = {
+                **self.question_bank_index,
+                info.filename: info,
+            }
+
+    @staticmethod
+    def _load_question_bank_file(
+        filename: str, clock: Clock = system_clock
+    ) -> QuestionBank:
+        # Runs on a worker thread, no access to manager state
+        with open(QUESTION_BANK_DIR + filename, "r") as file:
+            return QuestionBankManager._csv_to_question_bank(filename, file, clock)
+
+    @traced()
     async def _assert_question_bank_exists(self, question_bank_name: str):
         """
         raises QuestionBankDoesNotExistError if doesn't exist
         """
-        # STATE LOCK MUST BE ACQUIRED ALREADY
-        if question_bank_name not in self.question_banks:
+        self._raise_if_question_bank_missing(question_bank_name)
+
+    def _raise_if_question_bank_missing(self, question_bank_name: str):
+        # Lock free read
+        if question_bank_name not in self.question_bank_index:
             available_question_banks = get_formatted_question_bank_list(
-                list(self.question_banks.values())
+                list(self.question_bank_index.values())
             )
             raise QuestionBankDoesNotExistError(
                 question_bank_name, available_question_banks=available_question_banks
             )
 
-    @staticmethod
-    def _get_question_bank_from_attachment(question_file: Attachment) -> QuestionBank:
+    async def _get_question_bank_from_attachment(
+        self,
+        question_file: Attachment,
+    ) -> QuestionBank:
         # No need for state lock
-        log.info("Fetching question file")
-        raw_file = get_file(question_file.url)
+        if question_file.size > MAX_QUESTION_BANK_UPLOAD_BYTES:
+            raise ValueError(
+                f"File is {question_file.size} bytes, max is {MAX_QUESTION_BANK_UPLOAD_BYTES}"
+            )
 
-        log.info("Converting raw file to List of Questions")
+        log.info("Streaming question file")
+        return await QuestionBankManager._stream_to_question_bank(
+            question_file.filename, stream_file(question_file.url), clock=self.clock
+        )
 
-        string_content = None
-        try:
-            log.info("Trying to decode bytes using utf-8")
-            string_content = raw_file.decode()
-        except UnicodeDecodeError:
-            log.warning("Failed to decode using utf-8")
-            pass
+    @staticmethod
+    async def _stream_to_question_bank(
+        filename: str,
+        chunks: AsyncIterable[bytes],
+        max_bytes: int = MAX_QUESTION_BANK_UPLOAD_BYTES,
+        clock: Clock = system_clock,
+    ) -> QuestionBank:
+        """
+        Decodes and parses chunks into questions as they arrive, without holding the whole file in memory.
+        Encoding is detected from the byte order mark, defaulting to utf-8.
+        """
+        questions: List[Question] = []
+        decoder = None
+        head = b""  # Bytes held back until there's enough to detect a BOM
+        pending = ""  # Trailing partial line
+        num_lines = 0  # Parsed so far
+        num_bytes = 0
 
-        if not string_content:
-            log.info("Trying to decode bytes using utf-16")
-            string_content = raw_file.decode(encoding="utf-16")
+        def parse_lines(text: str, final: bool = False):
+            nonlocal pending, num_lines
+            lines = (pending + text).splitlines(keepends=True)
+            # Hold back the last line unless it's complete, \r could be the start of \r\n
+            pending = "" if final or not lines or lines[-1][-1] == "\n" else lines.pop()
+            questions.extend(
+                QuestionBankManager._parse_questions(lines, first_line=num_lines + 1)
+            )
+            num_lines += len(lines)
 
-        file = StringIO(string_content)
-        return QuestionBankManager._csv_to_question_bank(question_file.filename, file)
+        async for chunk in chunks:
+            num_bytes += len(chunk)
+            if num_bytes > max_bytes:
+                raise ValueError(f"File is larger than max of {max_bytes} bytes")
 
-    @staticmethod
-    def _csv_to_question_bank(filename: str, file: Iterable[str]):
-        csv_data = csv.reader(file, delimiter=",")
+            if decoder is None:
+                head += chunk
+                if len(head) < 4:
+                    continue
+                chunk, head = head, b""
+                decoder = _get_incremental_decoder(chunk)
 
-        questions = []
+            parse_lines(decoder.decode(chunk))
 
-        for args in csv_data:
+        if decoder is None:
+            decoder = _get_incremental_decoder(head)
+            parse_lines(decoder.decode(head))
+        parse_lines(decoder.decode(b"", final=True), final=True)
+
+        log.info(f"Parsed {len(questions)} questions from {num_bytes} bytes")
+        return QuestionBank(
+            filename=filename,
+            questions=questions,
+            last_updated_time=clock.now(),
+            clock=clock,
+        )
+
+    @staticmethod
+    def _parse_questions(lines: Iterable[str], first_line: int = 1) -> List[Question]:
+        questions = []
+        reader = csv.reader(lines, delimiter=",")
+        for args in reader:
+            if not args:  # Blank line
+                continue
             url = args[0]
             if not is_url(url):
                 raise ValueError("Url is not valid!")
             posted = False if len(args) == 1 else args[1] == "True"
-            questions.append(Question(url=url, posted=posted))
+            line = first_line + reader.line_num - 1
+            questions.append(Question(url=url, posted=posted, line=line))
+        return questions
 
+    @staticmethod
+    def _csv_to_question_bank(
+        filename: str, file: Iterable[str], clock: Clock = system_clock
+    ):
         return QuestionBank(
-            filename=filename, questions=questions, last_updated_time=datetime.now()
+            filename=filename,
+            questions=QuestionBankManager._parse_questions(file),
+            last_updated_time=clock.now(),
+            clock=clock,
         )
+
+
+def _get_incremental_decoder(head: bytes) -> codecs.IncrementalDecoder:
+    """
+    Picks the encoding from the byte order mark at the start of head, utf-8 if there isn't one
+    """
+    encoding = "utf-8"
+    for bom, bom_encoding in _BYTE_ORDER_MARKS:
+        if head.startswith(bom):
+            encoding = bom_encoding
+            break
+    log.info(f"Decoding question file using {encoding}")
+    return codecs.getincrementaldecoder(encoding)()
@@ -0,0 +1,154 @@
+import asyncio
+import logging
+import os
+from enum import Enum
+from typing import Dict, Iterable, List, Optional
+
+from pydantic import ValidationError
+
+from src.constants.config import (
+    SCHEDULER_LOG_COMPACT_MIN_RECORDS,
+    SCHEDULER_STATE_FILE,
+)
+from src.types.scheduler_specs import CampaignSpec, SchedulerLogRecord, SchedulerSpec
+from src.utils.metrics import InstrumentedLock
+
+log = logging.getLogger(__name__)
+
+
+class CatchUpPolicy(Enum):
+    SKIP = "skip"  # Drop posts missed while down, resume at the next post time
+    POST_ONCE = "post_once"  # Post once for everything missed, then resume
+
+
+class SchedulerStore:
+    """
+    Append only log of scheduler changes, replayed on startup.
+    Campaign progress is logged as a small delta, the log is compacted to one line per scheduler once mostly stale.
+    """
+
+    def __init__(self, path: str = SCHEDULER_STATE_FILE):
+        self.path = path
+        self._specs: Dict[int, SchedulerSpec] = {}  # As of the end of the log
+        self._num_records = 0  # Lines in the log
+        self._lock = InstrumentedLock("scheduler_store")
+
+    def load(self) -> List[SchedulerSpec]:
+        """
+        Replays the log, returns specs ordered by id
+        """
+        self._specs = {}
+        self._num_records = 0
+        if not os.path.exists(self.path):
+            return []
+
+        with open(self.path, mode="r", encoding="utf-8") as file:
+            for line in file:
+                if not line.strip():
+                    continue
+                try:
+                    record = SchedulerLogRecord.model_validate_json(line)
+                except ValidationError:
+                    # Likely a partial line from a crash mid-write
+                    log.warning(f"Skipping unreadable scheduler log line: {line[:100]}")
+                    continue
+                self._apply(record)
+                self._num_records += 1
+
+        return [self._specs[id] for id in sorted(self._specs)]
+
+    async def save(self, specs: Iterable[SchedulerSpec]):
+        """
+        Logs the schedulers' current state in one write, as progress deltas if only their progress changed
+        """
+        async with self._lock:
+            records = []
+            for spec in specs:
+                record = self._get_record(spec)
+                if record is None:
+                    continue  # Unchanged
+                self._apply(record)
+                records.append(record)
+            await self._write(records)
+
+    async def delete(self, id: int):
+        async with self._lock:
+            if id not in self._specs:
+                return
+            record = SchedulerLogRecord(op="delete", id=id)
+            self._apply(record)
+            await self._write([record])
+
+    def _get_record(self, spec: SchedulerSpec) -> Optional[SchedulerLogRecord]:
+        saved = self._specs.get(spec.id)
+        if saved == spec:
+            return None
+
+        if isinstance(saved, CampaignSpec) and isinstance(spec, CampaignSpec):
+            num_saved_stories = len(saved.story_history)
+            progress_only = spec.model_copy(
+                update={
+                    "repeats": saved.repeats,
+                    "next_date": saved.next_date,
+                    "story_history": spec.story_history[:num_saved_stories],
+                }
+            )
+            if progress_only == saved:
+                return SchedulerLogRecord(
+                    op="progress",
+                    id=spec.id,
+                    repeats=spec.repeats,
+                    next_date=spec.next_date,
+                    new_stories=spec.story_history[num_saved_stories:],
+                )
+
+        return SchedulerLogRecord(op="put", id=spec.id, spec=spec.model_copy(deep=True))
+
+    def _apply(self, record: SchedulerLogRecord):
+        if record.op == "put" and record.spec is not None:
+            self._specs[record.id] = record.spec
+        elif record.op == "delete":
+            self._specs.pop(record.id, None)
+        elif record.op == "progress":
+            spec = self._specs.get(record.id)
+            if not isinstance(spec, CampaignSpec):
+                log.warning(f"Progress for unknown campaign {record.id}, ignoring")
+                return
+            spec.repeats = (
+                record.repeats if record.repeats is not None else spec.repeats
+            )
+            spec.next_date = record.next_date or spec.next_date
+            spec.story_history.extend(record.new_stories)
+
+    async def _write(self, records: List[SchedulerLogRecord]):
+        # STORE LOCK MUST BE ACQUIRED ALREADY
+        if not records:
+            return
+        self._num_records += len(records)
+        if (
+            self._num_records > SCHEDULER_LOG_COMPACT_MIN_RECORDS
+            and self._num_records > 2 * len(self._specs)
+        ):
+            # Snapshot on the loop, so later changes don't race the write
+            lines = [
+                SchedulerLogRecord(op="put", id=spec.id, spec=spec).model_dump_json()
+                for spec in self._specs.values()
+            ]
+            await asyncio.to_thread(self._write_compacted, lines)
+            self._num_records = len(lines)
+            log.info(f"Compacted scheduler log to {len(lines)} records")
+        else:
+            lines = [record.model_dump_json() for record in records]
+            await asyncio.to_thread(self._append, lines)
+
+    def _append(self, lines: List[str]):
+        os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+        with open(self.path, mode="a", encoding="utf-8") as file:
+            file.writelines(line + "\n" for line in lines)
+
+    def _write_compacted(self, lines: List[str]):
+        # Write then rename, so a crash never loses the log
+        os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+        with open(self.path + ".tmp", mode="w", encoding="utf-8") as file:
+            file.writelines(line + "\n" for line in lines)
+        os.replace(self.path + ".tmp", self.path)
@@ -1,44 +1,82 @@
-import asyncio
-from collections import defaultdict
 import logging
-from pydantic import BaseModel
-from typing import Dict
+from typing import Dict, Optional
+
+from src.constants.config import STATS_MAX_ARCHIVED_POSTS, STATS_RETAINED_POSTS
+from src.utils.metrics import InstrumentedLock
 
 log = logging.getLogger(__name__)
 
 QUESTION_COMPLETE_EMOJIS = ["✅"]
+_QUESTION_COMPLETE_EMOJIS = frozenset(QUESTION_COMPLETE_EMOJIS)
 
 
-class UserStats(BaseModel):
-    user_name: str
-    total_completed: int
-    streak: int
+class UserStats:
+    """
+    Snapshot of a user's stats, returned by StatsManager
+    """
 
-    reactions: Dict[int, set[str]] = defaultdict(set)  # Post id to reactions list
+    __slots__ = ("user_name", "total_completed", "streak")
 
-    def is_question_complete(self, post_id: int):
-        for emoji in QUESTION_COMPLETE_EMOJIS:
-            if emoji in self.reactions[post_id]:
-                return True
-        return False
+    def __init__(self, user_name: str, total_completed: int, streak: int):
+        self.user_name = user_name
+        self.total_completed = total_completed
+        self.streak = streak
 
 
-class StatsManager:
-    _users: Dict[str, UserStats] = {}
-    _state_lock = asyncio.Lock()
+class _UserRecord:
+    """
+    A user's stats as StatsManager keeps them, changed on every reaction so kept light
+    """
+
+    __slots__ = ("user_name", "total_completed", "streak", "reactions")
 
-    _post_ids: set[int] = set()  # Track post ids
+    def __init__(self, user_name: str):
+        self.user_name = user_name
+        self.total_completed = 0
+        self.streak = 0
+        self.reactions: Dict[int, set[str]] = {}  # Post id to emojis
 
-    _users_who_completed_streak = set()
-    _current_post_id = None
+    def is_question_complete(self, post_id: int) -> bool:
+        emojis = self.reactions.get(post_id)
+        return emojis is not None and not _QUESTION_COMPLETE_EMOJIS.isdisjoint(emojis)
+
+    def to_user_stats(self) -> UserStats:
+        return UserStats(self.user_name, self.total_completed, self.streak)
+
+
+class StatsManager:
+    """
+    Reactions are kept per user for the last retained_posts posts. Older posts are archived, keeping only how many
+    users completed them, and their reactions are freed. Users' totals already count them. A late complete emoji on
+    an archived post counts as completing or undoing it, since Discord only reports a user adding an emoji once
+    until they remove it (exact with one complete emoji). Past max_archived_posts, the oldest are forgotten and
+    reactions to them ignored.
+    """
+
+    def __init__(
+        self,
+        retained_posts: int = STATS_RETAINED_POSTS,
+        max_archived_posts: int = STATS_MAX_ARCHIVED_POSTS,
+    ):
+        self.retained_posts = max(1, retained_posts)  # The current post is always kept
+        self.max_archived_posts = max_archived_posts
+
+        self._users: Dict[str, _UserRecord] = {}
+        self._state_lock = InstrumentedLock("stats_state")
+
+        self._post_ids: Dict[int, None] = {}  # Retained post ids, oldest first
+        # Post id to number completed, oldest first
+        self._archived_posts: Dict[int, int] = {}
+
+        self._users_who_completed_streak: set[str] = set()
+        self._current_post_id: Optional[int] = None
 
     # MUST BE CALLED holding lock!
     def _get_user(self, user_name: str):
         if user_name in self._users:
             return self._users[user_name]
 
-        res = UserStats(user_name=user_name, total_completed=0, streak=0)
-        self._users[user_name] = res
+        res = self._users[user_name] = _UserRecord(user_name)
         return res
 
     async def init(self, members: list[str]):
@@ -46,17 +84,44 @@ class StatsManager:
             _ = self._get_user(member)
             log.info(f"Added user: {member}")
 
+    # MUST BE CALLED holding lock!
+    def _log_archived_reaction(
+        self, user_name: str, post_id: int, emoji: str, added: bool
+    ):
+        if emoji not in _QUESTION_COMPLETE_EMOJIS:
+            return
+        user_stats = self._get_user(user_name)
+        if added:
+            user_stats.total_completed += 1
+            self._archived_posts[post_id] += 1
+        else:
+            user_stats.total_completed = max(0, user_stats.total_completed - 1)
+            self._archived_posts[post_id] = max(0, self._archived_posts[post_id] - 1)
+        log.info(
+            "%s late reaction to archived post %d, total count: %d",
+            user_name,
+            post_id,
+            user_stats.total_completed,
+        )
+
     async def log_user_reaction_remove(self, user_name: str, post_id: int, emoji: str):
         async with self._state_lock:
             if post_id not in self._post_ids:
+                if post_id in self._archived_posts:
+                    self._log_archived_reaction(user_name, post_id, emoji, added=False)
                 return
 
             user_stats = self._get_user(user_name)
 
             # If question is complete and is no longer complete, adjust sums
-            user_stats.reactions[post_id].remove(emoji)
-
-            if not user_stats.is_question_complete(post_id):
+            was_complete = user_stats.is_question_complete(post_id)
+            emojis = user_stats.reactions.get(post_id)
+            if emojis is not None:
+                emojis.discard(emoji)
+                if not emojis:
+                    del user_stats.reactions[post_id]
+
+            if was_complete and not user_stats.is_question_complete(post_id):
                 user_stats.total_completed -= 1
 
                 if self._current_post_id == post_id:
@@ -64,12 +129,17 @@ class StatsManager:
                     user_stats.streak -= 1
 
                 log.info(
-                    f"{user_name} question complete undone, total count: {user_stats.total_completed} streak: {user_stats.streak}"
+                    "%s question complete undone, total count: %d streak: %d",
+                    user_name,
+                    user_stats.total_completed,
+                    user_stats.streak,
                 )
 
     async def log_user_reaction_add(self, user_name: str, post_id: int, emoji: str):
         async with self._state_lock:
             if post_id not in self._post_ids:
+                if post_id in self._archived_posts:
+                    self._log_archived_reaction(user_name, post_id, emoji, added=True)
                 return
 
             user_stats = self._get_user(user_name)
@@ -86,10 +156,16 @@ class StatsManager:
                     user_stats.streak += 1
 
                 log.info(
-                    f"{user_name} completed a question! total count: {user_stats.total_completed} streak: {user_stats.streak}"
+                    "%s completed a question! total count: %d streak: %d",
+                    user_name,
+                    user_stats.total_completed,
+                    user_stats.streak,
                 )
 
-            user_stats.reactions[post_id].add(emoji)
+            emojis = user_stats.reactions.get(post_id)
+            if emojis is None:
+                emojis = user_stats.reactions[post_id] = set()
+            emojis.add(emoji)
 
     async def handle_new_post(self, post_id: int):
         """
@@ -97,7 +173,7 @@ class StatsManager:
         """
         async with self._state_lock:
             self._current_post_id = post_id
-            self._post_ids.add(post_id)
+            self._post_ids[post_id] = None
 
             for user, stats in self._users.items():
                 if user not in self._users_who_completed_streak and stats.streak != 0:
@@ -105,22 +181,40 @@ class StatsManager:
                     self._users[user].streak = 0
 
             self._users_who_completed_streak.clear()
+            self._compact()
 
-    async def get_user_stats(self):  # returns copies of user stats
+    # MUST BE CALLED holding lock!
+    def _compact(self):
         """
-        Returns copies of user stats
+        Archives posts past the retention window, freeing their reactions
         """
-        res = []
-        async with self._state_lock:
+        while len(self._post_ids) > self.retained_posts:
+            post_id = next(iter(self._post_ids))
+            del self._post_ids[post_id]
+            num_finished = 0
             for stats in self._users.values():
-                res.append(stats.model_copy())
-        return res
+                if stats.is_question_complete(post_id):
+                    num_finished += 1
+                stats.reactions.pop(post_id, None)
+            self._archived_posts[post_id] = num_finished
+
+        while len(self._archived_posts) > self.max_archived_posts:
+            del self._archived_posts[next(iter(self._archived_posts))]
+
+    async def get_user_stats(self) -> list[UserStats]:
+        """
+        Returns snapshots of user stats
+        """
+        async with self._state_lock:
+            return [stats.to_user_stats() for stats in self._users.values()]
 
     async def get_num_users_finished_question(self, post_id: int):
         """
         Returns number of users that finished the question, total users
         """
         async with self._state_lock:
+            if post_id in self._archived_posts:
+                return self._archived_posts[post_id], len(self._users)
             if post_id not in self._post_ids:
                 raise RuntimeError(f"Post id {post_id} invalid!")
             num_finished = 0
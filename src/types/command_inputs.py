@@ -22,3 +22,4 @@ class CampaignCommandArgs(BaseCommandInputModel):
     question_bank_name: str
     length: int
     story_prompt: Optional[str] = None
+    question_filter: Optional[str] = None
@@ -1,4 +1,5 @@
 from datetime import datetime
+from typing import Optional
 
 
 def _format_error_text(msg: str = "An unexpected error occurred"):
@@ -73,6 +74,11 @@ class FailedToGetPostError(Error):
         super().__init__(msg)
 
 
+class SchedulerDoesNotExistError(Error):
+    def __init__(self, scheduler_id: int):
+        super().__init__(f"Scheduler {scheduler_id} does not exist.")
+
+
 class FailedToUploadQuestionBankError(Error):
     def __init__(self, error_msg: str = ""):
         displayed_msg = "Failed to upload question bank, please make sure question bank file is in csv format with line structure url<,optional completed?>"
@@ -83,6 +89,25 @@ class FailedToUploadQuestionBankError(Error):
         )
 
 
+class FailedToParseQuestionFilterError(Error):
+    def __init__(self, question_filter: str):
+        displayed_msg = """Failed to parse question filter.
+Supported formats:
+- easy, medium or hard, or a leetcode topic slug (ie, dynamic-programming) for every day
+- <days>=<filter> for specific days (ie, Mo=easy,Fr=hard)
+- Comma separated combinations of the above (ie, MoTu=easy,arrays)
+"""
+        super().__init__(f"Invalid question filter: {question_filter}", displayed_msg)
+
+
+class InvalidQuestionsInQuestionBankError(Error):
+    def __init__(self, invalid_rows: list[str]):
+        super().__init__(
+            f"{len(invalid_rows)} questions in the question bank don't exist on leetcode, upload cancelled.",
+            additional_messages="\n".join(invalid_rows),
+        )
+
+
 class QuestionBankDoesNotExistError(Error):
     def __init__(self, name: str, available_question_banks: str):
         super().__init__(
@@ -92,8 +117,34 @@ class QuestionBankDoesNotExistError(Error):
 
 
 class NoMoreQuestionsInQuestionBankError(Error):
-    def __init__(self, bank_name: str):
-        super().__init__(f"Question bank {bank_name} has no more questions!")
+    def __init__(self, bank_name: str, question_filter: Optional[str] = None):
+        if question_filter:
+            super().__init__(
+                f"Question bank {bank_name} has no more {question_filter} questions!"
+            )
+        else:
+            super().__init__(f"Question bank {bank_name} has no more questions!")
+
+
+class UnknownTraceError(Error):
+    def __init__(self, which: str):
+        displayed_msg = f"""Unknown trace {which}.
+Supported:
+- last (most recent slow command)
+"""
+        super().__init__(f"Unknown trace: {which}", displayed_msg)
+
+
+class InvalidProfileDurationError(Error):
+    def __init__(self, seconds: float, max_seconds: float):
+        super().__init__(
+            f"Profile duration must be between 0 and {max_seconds:.0f} seconds, got {seconds}."
+        )
+
+
+class ProfileAlreadyRunningError(Error):
+    def __init__(self):
+        super().__init__("A profile is already running, try again once it finishes.")
 
 
 class UnexpectedError(Error):
@@ -0,0 +1,45 @@
+from datetime import datetime, time
+from typing import Annotated, List, Literal, Optional, Tuple, Union
+from pydantic import BaseModel, Field
+
+
+class PostSchedulerSpec(BaseModel):
+    kind: Literal["post"] = "post"
+    id: int
+    url: str
+    post_date: datetime
+    desc: Optional[str] = None
+    story: Optional[str] = None
+
+
+class CampaignSpec(BaseModel):
+    kind: Literal["campaign"] = "campaign"
+    id: int
+    question_bank_name: str
+    days: List[int]
+    time: time
+    length: int
+    repeats: int  # Remaining, including the story ending
+    next_date: datetime
+    story_prompt: Optional[str] = None
+    question_filters: List[Tuple[Optional[int], str]] = []  # (weekday, filter)
+    story_history: List[str] = []
+
+
+SchedulerSpec = Annotated[
+    Union[PostSchedulerSpec, CampaignSpec], Field(discriminator="kind")
+]
+
+
+class SchedulerLogRecord(BaseModel):
+    """
+    One line of the scheduler log.
+    put replaces the whole spec, progress updates a campaign after a post, delete removes it.
+    """
+
+    op: Literal["put", "progress", "delete"]
+    id: int
+    spec: Optional[SchedulerSpec] = None
+    repeats: Optional[int] = None
+    next_date: Optional[datetime] = None
+    new_stories: List[str] = []
@@ -1,7 +1,47 @@
-import boto3
+from concurrent.futures import Future, ThreadPoolExecutor
+import functools
+import threading
+from typing import Dict
 
+# Fetched on worker threads, so startup can fetch several secrets at once and log in meanwhile
+_executor = ThreadPoolExecutor(max_workers=4, thread_name_prefix="ssm")
+_futures: Dict[str, Future] = {}
+_futures_lock = threading.Lock()
 
-def get_from_ssm(id: str):
-    ssm = boto3.client("ssm", region_name="us-east-1")
-    param = ssm.get_parameter(Name=f"/lc-discord-bot/{id}", WithDecryption=True)
+
+@functools.cache
+def _get_ssm_client():
+    # boto3 is slow to import and only needed in prod, clients are thread safe
+    import boto3
+
+    return boto3.client("ssm", region_name="us-east-1")
+
+
+def _fetch_from_ssm(id: str) -> str:
+    param = _get_ssm_client().get_parameter(
+        Name=f"/lc-discord-bot/{id}", WithDecryption=True
+    )
     return param["Parameter"]["Value"]
+
+
+def prefetch_from_ssm(*ids: str):
+    """
+    Starts fetching parameters in the background, get_from_ssm then waits for them
+    """
+    with _futures_lock:
+        for id in ids:
+            if id not in _futures:
+                _futures[id] = _executor.submit(_fetch_from_ssm, id)
+
+
+def get_from_ssm(id: str) -> str:
+    prefetch_from_ssm(id)
+    future = _futures[id]
+    try:
+        return future.result()
+    except Exception:
+        # Let the next call retry
+        with _futures_lock:
+            if _futures.get(id) is future:
+                del _futures[id]
+        raise
@@ -0,0 +1,32 @@
+from datetime import datetime, timedelta
+from typing import Protocol
+
+
+class Clock(Protocol):
+    def now(self) -> datetime: ...
+
+
+class SystemClock:
+    def now(self) -> datetime:
+        return datetime.now()
+
+
+class VirtualClock:
+    """
+    Clock that only moves when told to, for tests and simulations
+    """
+
+    def __init__(self, start: datetime):
+        self._now = start
+
+    def now(self) -> datetime:
+        return self._now
+
+    def set(self, date: datetime):
+        self._now = date
+
+    def advance(self, delta: timedelta):
+        self._now += delta
+
+
+system_clock = SystemClock()
@@ -1,11 +1,16 @@
-import requests
 import logging
+from typing import AsyncIterator
+
+import aiohttp
 
 log = logging.getLogger("utils/discord.py")
 
 
-def get_file(url: str):
+async def stream_file(url: str, chunk_size: int = 64 * 1024) -> AsyncIterator[bytes]:
     log.info(f"Making request to {url}")
-    res = requests.get(url)
-    log.info(res.status_code)
-    return res.content
+    async with aiohttp.ClientSession() as session:
+        async with session.get(url) as res:
+            log.info(res.status)
+            res.raise_for_status()
+            async for chunk in res.content.iter_chunked(chunk_size):
+                yield chunk
@@ -1,4 +1,5 @@
 import os
+from typing import Optional
 
 
 def get_int_from_env(var: str) -> int:
@@ -13,3 +14,7 @@ def get_from_env(var: str) -> str:
     if not x:
         raise RuntimeError(f"{var} missing from environment!")
     return x
+
+
+def get_optional_from_env(var: str, default: Optional[str] = None) -> Optional[str]:
+    return os.getenv(var) or default
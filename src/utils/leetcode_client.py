@@ -1,9 +1,23 @@
 # For scraping leetcode.com
+import asyncio
 import json
+import logging
 import re
 from dataclasses import dataclass
+from typing import Dict, Iterable, List, Optional, Tuple
 
-import requests
+import aiohttp
+
+from src.constants.config import (
+    LEETCODE_GRAPHQL_URL,
+    QUESTION_LOOKUP_BATCH_SIZE,
+    QUESTION_LOOKUP_CONCURRENCY,
+)
+from src.utils.environment import get_optional_from_env
+from src.utils.metrics import track_upstream
+from src.utils.tracing import traced
+
+log = logging.getLogger(__name__)
 
 
 @dataclass(frozen=True)
@@ -15,22 +29,54 @@ class QuestionData:
     url: str
 
 
+@dataclass(frozen=True)
+class QuestionMetadata:
+    slug: str
+    id: str
+    title: str
+    difficulty: str
+    topics: Tuple[str, ...] = ()  # Topic tag slugs, ie dynamic-programming
+
+
+# Slug -> metadata, shared by all clients. Filled by scrapes and batch lookups.
+question_metadata_cache: Dict[str, QuestionMetadata] = {}
+
+
+def _get_requests():
+    # Slow to import, and only needed once a question is scraped
+    import requests
+
+    return requests
+
+
+def get_slug_from_url(url: str):
+    return url.split("problems/")[-1].split("/")[0]
+
+
 class LeetcodeClient:
-    def __init__(self):
-        self.base_url = "https://leetcode.com/graphql/"
+    def __init__(self, base_url: Optional[str] = None):
+        """
+        base_url defaults to the LEETCODE_GRAPHQL_URL env var if set, ie to point at a local stand-in
+        """
+        self.base_url = base_url or get_optional_from_env(
+            "LEETCODE_GRAPHQL_URL", LEETCODE_GRAPHQL_URL
+        )
 
     def _get_question_title_data(self, titleSlug: str):
         url = self.base_url
         payload = (
-            '{"query":"query questionTitle($titleSlug: String!) {\\n  question(titleSlug: $titleSlug) {\\n    questionId\\n    questionFrontendId\\n    title\\n    titleSlug\\n    isPaidOnly\\n    difficulty\\n    likes\\n    dislikes\\n  }\\n}","variables":{"titleSlug":"'
+            '{"query":"query questionTitle($titleSlug: String!) {\\n  question(titleSlug: $titleSlug) {\\n    questionId\\n    questionFrontendId\\n    title\\n    titleSlug\\n    isPaidOnly\\n    difficulty\\n    likes\\n    dislikes\\n    topicTags {\\n      slug\\n    }\\n  }\\n}","variables":{"titleSlug":"'
             + titleSlug
             + '"}}'
         )
         headers = {
             "Content-Type": "application/json",
         }
-        response = requests.request("POST", url, headers=headers, data=payload)
-        text = json.loads(response.text)
+        with track_upstream("leetcode", "question_title"):
+            response = _get_requests().request(
+                "POST", url, headers=headers, data=payload
+            )
+            text = json.loads(response.text)
         return text
 
     def _get_question_content_data(self, titleSlug: str):
@@ -43,13 +89,96 @@ class LeetcodeClient:
         headers = {
             "Content-Type": "application/json",
         }
-        response = requests.request("POST", url, headers=headers, data=payload)
-        text = json.loads(response.text)
+        with track_upstream("leetcode", "question_content"):
+            response = _get_requests().request(
+                "POST", url, headers=headers, data=payload
+            )
+            text = json.loads(response.text)
         return text
 
     def _get_slug_from_url(self, url: str):
-        return url.split("problems/")[1].split("/")[0]
+        return get_slug_from_url(url)
 
+    async def _post_graphql(
+        self, session: aiohttp.ClientSession, query: str, variables: dict
+    ):
+        with track_upstream("leetcode", "question_metadata_batch"):
+            async with session.post(
+                self.base_url, json={"query": query, "variables": variables}
+            ) as response:
+                response.raise_for_status()
+                return await response.json()
+
+    async def _fetch_metadata_batch(
+        self, session: aiohttp.ClientSession, slugs: List[str]
+    ) -> Dict[str, Optional[QuestionMetadata]]:
+        # One request for the whole batch, using an aliased field per slug
+        params = ", ".join(f"$s{i}: String!" for i in range(len(slugs)))
+        fields = " ".join(
+            f"q{i}: question(titleSlug: $s{i}) {{ questionFrontendId title titleSlug difficulty topicTags {{ slug }} }}"
+            for i in range(len(slugs))
+        )
+        query = f"query questionTitles({params}) {{ {fields} }}"
+        variables = {f"s{i}": slug for i, slug in enumerate(slugs)}
+
+        data = (await self._post_graphql(session, query, variables)).get("data") or {}
+
+        res = {}
+        for i, slug in enumerate(slugs):
+            question = data.get(f"q{i}")
+            if not question:
+                res[slug] = None  # No such question
+                continue
+            metadata = QuestionMetadata(
+                slug=slug,
+                id=question["questionFrontendId"],
+                title=question["title"],
+                difficulty=question["difficulty"],
+                topics=tuple(tag["slug"] for tag in question.get("topicTags") or []),
+            )
+            question_metadata_cache[slug] = metadata
+            res[slug] = metadata
+        return res
+
+    @traced()
+    async def fetch_question_metadata(
+        self,
+        slugs: Iterable[str],
+        batch_size: int = QUESTION_LOOKUP_BATCH_SIZE,
+        concurrency: int = QUESTION_LOOKUP_CONCURRENCY,
+    ) -> Dict[str, Optional[QuestionMetadata]]:
+        """
+        Looks up slugs in batches, at most concurrency requests at a time. Cached slugs aren't requested.
+        Returns slug -> metadata, or None if the slug doesn't exist.
+        """
+        res: Dict[str, Optional[QuestionMetadata]] = {}
+        to_fetch = []
+        for slug in dict.fromkeys(slugs):  # Dedupe, keep order
+            if slug in question_metadata_cache:
+                res[slug] = question_metadata_cache[slug]
+            else:
+                to_fetch.append(slug)
+
+        batches = [
+            to_fetch[i : i + batch_size] for i in range(0, len(to_fetch), batch_size)
+        ]
+        semaphore = asyncio.Semaphore(concurrency)
+
+        async with aiohttp.ClientSession() as session:
+
+            async def fetch(batch: List[str]):
+                async with semaphore:
+                    return await self._fetch_metadata_batch(session, batch)
+
+            for batch_res in await asyncio.gather(*[fetch(b) for b in batches]):
+                res.update(batch_res)
+
+        log.info(
+            f"Looked up {len(res)} slugs, {len(to_fetch)} in {len(batches)} requests"
+        )
+        return res
+
+    @traced()
     def scrape_question(self, url: str):
         slug = self._get_slug_from_url(url)
         title_data = self._get_question_title_data(slug)
@@ -61,6 +190,17 @@ class LeetcodeClient:
         content = re.sub(r"&lt;", "<", content)
         content = re.sub(r"&gt;", ">", content)
 
+        question_metadata_cache[slug] = QuestionMetadata(
+            slug=slug,
+            id=title_data["data"]["question"]["questionFrontendId"],
+            title=title_data["data"]["question"]["title"],
+            difficulty=title_data["data"]["question"]["difficulty"],
+            topics=tuple(
+                tag["slug"]
+                for tag in title_data["data"]["question"].get("topicTags") or []
+            ),
+        )
+
         return QuestionData(
             title_data["data"]["question"]["questionFrontendId"],
             title_data["data"]["question"]["title"],
@@ -0,0 +1,187 @@
+import atexit
+from datetime import datetime, timezone
+import json
+import logging
+import logging.handlers
+import queue
+import sys
+from typing import Dict, Mapping, Optional, Tuple
+
+from src.constants.config import (
+    LOG_PAYLOAD_MAX_CHARS,
+    LOG_QUEUE_SIZE,
+    LOG_RATE_LIMITS,
+    LOG_SAMPLE_RATES,
+)
+from src.internal.message_queue import TokenBucket
+
+# Attributes every LogRecord has, anything else was passed in extra
+_RECORD_ATTRIBUTES = set(vars(logging.makeLogRecord({}))) | {"message", "asctime"}
+
+
+def truncate(value: object, max_chars: int = LOG_PAYLOAD_MAX_CHARS) -> str:
+    text = value if isinstance(value, str) else str(value)
+    if len(text) <= max_chars:
+        return text
+    return f"{text[:max_chars]}... ({len(text) - max_chars} more chars)"
+
+
+def _get_extras(record: logging.LogRecord) -> Dict[str, object]:
+    return {k: v for k, v in vars(record).items() if k not in _RECORD_ATTRIBUTES}
+
+
+class TextFormatter(logging.Formatter):
+    """
+    Like the basicConfig format, with payloads truncated and extra fields appended as key=value
+    """
+
+    def __init__(self, max_chars: int = LOG_PAYLOAD_MAX_CHARS):
+        super().__init__("%(levelname)s:%(name)s:%(message)s")
+        self.max_chars = max_chars
+
+    def formatMessage(self, record: logging.LogRecord) -> str:
+        record.message = truncate(record.message, self.max_chars)
+        text = super().formatMessage(record)
+        for key, value in _get_extras(record).items():
+            text += f" {key}={truncate(value, self.max_chars)}"
+        return text
+
+
+class JsonFormatter(logging.Formatter):
+    """
+    One JSON object per line, with extra fields as keys. Long messages and fields are truncated.
+    """
+
+    def __init__(self, max_chars: int = LOG_PAYLOAD_MAX_CHARS):
+        super().__init__()
+        self.max_chars = max_chars
+
+    def format(self, record: logging.LogRecord) -> str:
+        data: Dict[str, object] = {
+            "time": datetime.fromtimestamp(record.created, timezone.utc).isoformat(),
+            "level": record.levelname,
+            "logger": record.name,
+            "message": truncate(record.getMessage(), self.max_chars),
+        }
+        for key, value in _get_extras(record).items():
+            if not isinstance(value, (int, float, bool)) and value is not None:
+                value = truncate(value, self.max_chars)
+            data[key] = value
+        if record.exc_info:
+            data["exc_info"] = self.formatException(record.exc_info)
+        if record.stack_info:
+            data["stack_info"] = self.formatStack(record.stack_info)
+        return json.dumps(data, ensure_ascii=False)
+
+
+class SamplingFilter(logging.Filter):
+    """
+    Thins out records below WARNING from noisy loggers. Sample rates keep that fraction of records, evenly spaced.
+    Rate limits are (records per second, burst), past which records are dropped. Both apply to child loggers too.
+    The next record kept from a logger notes how many were dropped before it, as num_dropped.
+    """
+
+    def __init__(
+        self,
+        sample_rates: Mapping[str, float] = LOG_SAMPLE_RATES,
+        rate_limits: Mapping[str, Tuple[float, int]] = LOG_RATE_LIMITS,
+    ):
+        super().__init__()
+        self.sample_rates = dict(sample_rates)
+        self.rate_limits = dict(rate_limits)
+        self._sample_credit: Dict[str, float] = {}
+        self._buckets: Dict[str, TokenBucket] = {}
+        self._num_dropped: Dict[str, int] = {}
+        # Logger name -> configured name it falls under, or None
+        self._config_names: Dict[str, Optional[str]] = {}
+
+    def _get_config_name(self, logger_name: str) -> Optional[str]:
+        if logger_name not in self._config_names:
+            name: Optional[str] = logger_name
+            while (
+                name and name not in self.sample_rates and name not in self.rate_limits
+            ):
+                name = name.rpartition(".")[0]
+            self._config_names[logger_name] = name or None
+        return self._config_names[logger_name]
+
+    def _keep(self, name: str) -> bool:
+        if name in self.sample_rates:
+            credit = self._sample_credit.get(name, 1.0)  # Keep the first
+            if credit < 1.0:
+                self._sample_credit[name] = credit + self.sample_rates[name]
+                return False
+            self._sample_credit[name] = credit - 1.0 + self.sample_rates[name]
+
+        if name in self.rate_limits:
+            bucket = self._buckets.get(name)
+            if bucket is None:
+                bucket = self._buckets[name] = TokenBucket(*self.rate_limits[name])
+            if bucket.get_wait_time() > 0:
+                return False
+            bucket.consume()
+        return True
+
+    def filter(self, record: logging.LogRecord) -> bool:
+        if record.levelno >= logging.WARNING:
+            return True
+        name = self._get_config_name(record.name)
+        if name is None:
+            return True
+
+        if not self._keep(name):
+            self._num_dropped[name] = self._num_dropped.get(name, 0) + 1
+            return False
+        if num_dropped := self._num_dropped.pop(name, 0):
+            record.num_dropped = num_dropped
+        return True
+
+
+class LogQueueHandler(logging.handlers.QueueHandler):
+    """
+    Hands records to the listener thread as is, so formatting and writing happen off the caller's thread.
+    Since args are formatted later, only log values that won't change. Drops records if the queue is full,
+    rather than blocking.
+    """
+
+    def __init__(self, log_queue: queue.Queue):
+        super().__init__(log_queue)
+        self.num_dropped = 0
+
+    def prepare(self, record: logging.LogRecord) -> logging.LogRecord:
+        return record
+
+    def enqueue(self, record: logging.LogRecord):
+        try:
+            self.queue.put_nowait(record)
+        except queue.Full:
+            self.num_dropped += 1
+
+
+def setup_logging(
+    level: int = logging.INFO,
+    json_output: bool = False,
+    stream=None,  # stderr by default, like basicConfig
+    queue_size: int = LOG_QUEUE_SIZE,
+) -> logging.handlers.QueueListener:
+    """
+    Replaces the root logger's handlers with a queue, drained to stream by a listener thread.
+    The listener is stopped, flushing the queue, at exit.
+    """
+    output = logging.StreamHandler(stream or sys.stderr)
+    output.setFormatter(JsonFormatter() if json_output else TextFormatter())
+
+    log_queue: queue.Queue = queue.Queue(queue_size)
+    handler = LogQueueHandler(log_queue)
+    handler.addFilter(SamplingFilter())
+
+    root = logging.getLogger()
+    for old_handler in root.handlers[:]:
+        root.removeHandler(old_handler)
+    root.addHandler(handler)
+    root.setLevel(level)
+
+    listener = logging.handlers.QueueListener(log_queue, output)
+    listener.start()
+    atexit.register(listener.stop)
+    return listener
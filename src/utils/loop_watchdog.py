@@ -0,0 +1,190 @@
+import asyncio
+from collections import deque
+from dataclasses import dataclass
+import logging
+import os
+import sys
+import threading
+import time
+import traceback
+from types import FrameType
+from typing import Deque, Dict, List, Optional
+
+from src.constants.config import (
+    LOOP_LAG_HISTORY,
+    LOOP_LAG_SAMPLE_INTERVAL,
+    LOOP_LAG_THRESHOLD,
+)
+
+log = logging.getLogger(__name__)
+
+# Frames under here, outside installed packages, are ours
+PROJECT_ROOT = os.path.dirname(
+    os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+)
+
+
+@dataclass
+class BlockingSite:
+    """
+    A call site seen blocking the loop, aggregated over stalls
+    """
+
+    site: str  # path:line in function
+    num_stalls: int = 0
+    blocked_time: float = 0.0  # seconds, summed over samples
+    max_stall: float = 0.0  # seconds, longest single stall seen here
+    task_name: Optional[str] = None  # Task running when last seen
+    stack: str = ""  # Formatted stack of the longest stall
+
+
+def _is_project_frame(frame: FrameType) -> bool:
+    filename = os.path.abspath(frame.f_code.co_filename)
+    return filename.startswith(PROJECT_ROOT) and "site-packages" not in filename
+
+
+def is_idle_frame(frame: FrameType) -> bool:
+    # Waiting in the selector, the heartbeat is about to run
+    return os.path.basename(frame.f_code.co_filename) == "selectors.py"
+
+
+def _get_site(frame: FrameType) -> str:
+    """
+    Innermost project frame of the stack, since library frames (ie, a socket read) don't say who blocked.
+    Falls back to the innermost frame.
+    """
+    site_frame = frame
+    current: Optional[FrameType] = frame
+    while current is not None:
+        if _is_project_frame(current):
+            site_frame = current
+            break
+        current = current.f_back
+    filename = os.path.relpath(site_frame.f_code.co_filename, PROJECT_ROOT)
+    return f"{filename}:{site_frame.f_lineno} in {site_frame.f_code.co_name}"
+
+
+class LoopWatchdog:
+    """
+    Measures event loop lag with a heartbeat task. A watcher thread checks the heartbeat, and while the loop
+    is stuck for longer than the threshold, samples the loop thread's stack to find what's blocking it.
+    """
+
+    def __init__(
+        self,
+        threshold: float = LOOP_LAG_THRESHOLD,
+        interval: float = LOOP_LAG_SAMPLE_INTERVAL,
+        history: int = LOOP_LAG_HISTORY,
+    ):
+        self.threshold = threshold  # seconds
+        self.interval = interval  # seconds
+        self.lags: Deque[float] = deque(maxlen=history)  # seconds, most recent last
+        self.max_lag = 0.0
+        self.num_stalls = 0
+        self.sites: Dict[str, BlockingSite] = {}
+
+        self._lock = threading.Lock()  # On sites, shared with the watcher thread
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._loop_thread_id: Optional[int] = None
+        self._last_beat = time.perf_counter()
+        self._heartbeat_task: Optional[asyncio.Task] = None
+        self._watcher: Optional[threading.Thread] = None
+        self._stopped = threading.Event()
+
+    @property
+    def running(self) -> bool:
+        return self._heartbeat_task is not None and not self._heartbeat_task.done()
+
+    def start(self):
+        """
+        Must be called from the loop to watch
+        """
+        if self.running:
+            return
+        self._loop = asyncio.get_running_loop()
+        self._loop_thread_id = threading.get_ident()
+        self._last_beat = time.perf_counter()
+        self._stopped.clear()
+        self._heartbeat_task = asyncio.create_task(self._heartbeat())
+        self._watcher = threading.Thread(
+            target=self._watch, name="loop-watchdog", daemon=True
+        )
+        self._watcher.start()
+
+    def stop(self):
+        self._stopped.set()
+        if self._heartbeat_task:
+            self._heartbeat_task.cancel()
+        if self._watcher:
+            self._watcher.join()
+
+    async def _heartbeat(self):
+        while True:
+            start = time.perf_counter()
+            await asyncio.sleep(self.interval)
+            self._last_beat = time.perf_counter()
+            # A sleep overshooting its deadline means something held the loop
+            lag = self._last_beat - start - self.interval
+            self.lags.append(lag)
+            self.max_lag = max(self.max_lag, lag)
+
+    def _watch(self):
+        in_stall = False
+        stall_sites: set[str] = set()  # Sites seen in the current stall
+        while not self._stopped.wait(self.interval / 2):
+            stalled_for = time.perf_counter() - self._last_beat - self.interval
+            if stalled_for < self.threshold:
+                in_stall = False
+                stall_sites.clear()
+                continue
+
+            frame = sys._current_frames().get(self._loop_thread_id)
+            if frame is None or is_idle_frame(frame):
+                continue
+            site = _get_site(frame)
+            if not in_stall:
+                in_stall = True
+                self.num_stalls += 1
+                log.warning(f"Event loop blocked for {stalled_for:.3f}s at {site}")
+
+            with self._lock:
+                blocking_site = self.sites.setdefault(site, BlockingSite(site))
+                if site not in stall_sites:
+                    stall_sites.add(site)
+                    blocking_site.num_stalls += 1
+                blocking_site.blocked_time += self.interval / 2
+                blocking_site.task_name = self._get_current_task_name()
+                if stalled_for > blocking_site.max_stall:
+                    blocking_site.max_stall = stalled_for
+                    blocking_site.stack = "".join(traceback.format_stack(frame))
+
+    def _get_current_task_name(self) -> Optional[str]:
+        try:
+            task = asyncio.current_task(self._loop)
+        except RuntimeError:
+            return None
+        return task.get_name() if task else None
+
+    def get_offenders(self, n: int) -> List[BlockingSite]:
+        """
+        Returns the n sites that blocked the loop longest in total, copies
+        """
+        with self._lock:
+            sites = sorted(
+                self.sites.values(), key=lambda s: s.blocked_time, reverse=True
+            )
+            return [BlockingSite(**vars(site)) for site in sites[:n]]
+
+    def get_lag_percentile(self, percentile: float) -> float:
+        if not self.lags:
+            return 0.0
+        lags = sorted(self.lags)
+        return lags[min(len(lags) - 1, int(len(lags) * percentile))]
+
+    def get_stats_text(self):
+        return (
+            f"p50={self.get_lag_percentile(0.5) * 1000:.1f}ms "
+            f"p99={self.get_lag_percentile(0.99) * 1000:.1f}ms "
+            f"max={self.max_lag * 1000:.1f}ms stalls={self.num_stalls} "
+            f"(over {self.threshold * 1000:.0f}ms)"
+        )
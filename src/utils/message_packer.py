@@ -0,0 +1,72 @@
+from typing import List
+
+from src.constants.config import DISCORD_MESSAGE_LIMIT
+
+CODE_BLOCK_FENCE = "```"
+_CLOSING_FENCE = "\n" + CODE_BLOCK_FENCE
+
+
+def pack_message(text: str, limit: int = DISCORD_MESSAGE_LIMIT) -> List[str]:
+    """
+    Splits text at line boundaries into the fewest messages of at most limit characters.
+    Lines longer than a message are hard split, filling each message with no separator added.
+    Code blocks split across messages are closed, then reopened with their original fence (including language).
+    """
+    if len(text) <= limit:
+        return [text]
+
+    messages: List[str] = []
+    current = ""
+    open_fence = None  # Opening fence line of the code block current ends inside
+
+    def flush():
+        nonlocal current
+        messages.append(current + (_CLOSING_FENCE if open_fence else ""))
+        current = open_fence or ""
+
+    def is_fresh():
+        return current == (open_fence or "")
+
+    for line in text.split("\n"):
+        if line.startswith(CODE_BLOCK_FENCE):
+            fence_after = None if open_fence else line
+        else:
+            fence_after = open_fence
+        reserved_len = len(_CLOSING_FENCE) if fence_after else 0
+
+        def fits():
+            sep_len = 1 if current else 0
+            return len(current) + sep_len + len(line) + reserved_len <= limit
+
+        fresh_len = len(open_fence) + 1 if open_fence else 0
+        fits_fresh = fresh_len + len(line) + reserved_len <= limit
+        if not fits() and fits_fresh and not is_fresh():
+            flush()
+        if fits():
+            current += ("\n" if current else "") + line
+            open_fence = fence_after
+            continue
+
+        # Hard split, each piece fills the rest of the current message
+        remaining = line
+        sep = "\n" if current else ""
+        while remaining:
+            closing_len = len(_CLOSING_FENCE) if open_fence else 0
+            space = limit - len(current) - len(sep) - closing_len
+            if space <= 0:
+                if is_fresh():
+                    raise ValueError(f"Message limit {limit} is too small")
+                flush()
+                sep = "\n" if current else ""
+                continue
+            current += sep + remaining[:space]
+            remaining = remaining[space:]
+            sep = ""
+            if remaining:
+                flush()
+                sep = "\n" if current else ""
+        open_fence = fence_after
+
+    if current:
+        messages.append(current + (_CLOSING_FENCE if open_fence else ""))
+    return messages
@@ -0,0 +1,243 @@
+import asyncio
+from bisect import bisect_left
+from contextlib import contextmanager
+import logging
+import time
+from typing import TYPE_CHECKING, Dict, List, Optional, Sequence, Tuple
+
+from src.utils.tracing import span
+
+if TYPE_CHECKING:
+    from aiohttp import web
+
+log = logging.getLogger(__name__)
+
+# Prometheus defaults, in seconds
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10)
+# For waits that are usually near zero
+FAST_BUCKETS = (1e-5, 1e-4, 0.001, 0.005, 0.01, 0.05, 0.1, 0.5, 1, 5)
+
+
+def _escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def _format_labels(names: Sequence[str], values: Sequence[str]) -> str:
+    if not names:
+        return ""
+    pairs = ",".join(f'{n}="{_escape(str(v))}"' for n, v in zip(names, values))
+    return "{" + pairs + "}"
+
+
+def _format_value(value: float) -> str:
+    return str(int(value)) if value == int(value) else repr(value)
+
+
+class Counter:
+    def __init__(self, name: str, help: str, label_names: Sequence[str] = ()):
+        self.name = name
+        self.help = help
+        self.label_names = tuple(label_names)
+        self._values: Dict[Tuple[str, ...], float] = {}
+
+    def inc(self, *label_values: str, amount: float = 1.0):
+        self._values[label_values] = self._values.get(label_values, 0.0) + amount
+
+    def get(self, *label_values: str) -> float:
+        return self._values.get(label_values, 0.0)
+
+    def render(self) -> List[str]:
+        lines = [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} counter"]
+        for label_values, value in sorted(self._values.items()):
+            labels = _format_labels(self.label_names, label_values)
+            lines.append(f"{self.name}{labels} {_format_value(value)}")
+        return lines
+
+
+class HistogramSeries:
+    """
+    One label combination of a histogram. Hot paths can hold on to it to skip the label lookup.
+    """
+
+    __slots__ = ("buckets", "bucket_counts", "sum", "count")
+
+    def __init__(self, buckets: Tuple[float, ...]):
+        self.buckets = buckets
+        self.bucket_counts = [0] * (len(buckets) + 1)  # Not cumulative, last is +Inf
+        self.sum = 0.0
+        self.count = 0
+
+    def observe(self, value: float):
+        # Buckets are upper bounds, inclusive
+        self.bucket_counts[bisect_left(self.buckets, value)] += 1
+        self.sum += value
+        self.count += 1
+
+
+class Histogram:
+    def __init__(
+        self,
+        name: str,
+        help: str,
+        label_names: Sequence[str] = (),
+        buckets: Sequence[float] = DEFAULT_BUCKETS,
+    ):
+        self.name = name
+        self.help = help
+        self.label_names = tuple(label_names)
+        self.buckets = tuple(sorted(buckets))
+        self._series: Dict[Tuple[str, ...], HistogramSeries] = {}
+
+    def labels(self, *label_values: str) -> HistogramSeries:
+        series = self._series.get(label_values)
+        if series is None:
+            series = self._series[label_values] = HistogramSeries(self.buckets)
+        return series
+
+    def observe(self, value: float, *label_values: str):
+        self.labels(*label_values).observe(value)
+
+    @contextmanager
+    def time(self, *label_values: str):
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(time.perf_counter() - start, *label_values)
+
+    def get_count(self, *label_values: str) -> int:
+        series = self._series.get(label_values)
+        return series.count if series else 0
+
+    def render(self) -> List[str]:
+        lines = [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} histogram"]
+        names = self.label_names + ("le",)
+        for label_values, series in sorted(self._series.items()):
+            cumulative = 0
+            for bound, count in zip(
+                [*map(_format_value, self.buckets), "+Inf"], series.bucket_counts
+            ):
+                cumulative += count
+                labels = _format_labels(names, label_values + (bound,))
+                lines.append(f"{self.name}_bucket{labels} {cumulative}")
+            labels = _format_labels(self.label_names, label_values)
+            lines.append(f"{self.name}_sum{labels} {_format_value(series.sum)}")
+            lines.append(f"{self.name}_count{labels} {series.count}")
+        return lines
+
+
+class MetricsRegistry:
+    def __init__(self):
+        self.metrics: List[Counter | Histogram] = []
+
+    def counter(self, name: str, help: str, label_names: Sequence[str] = ()):
+        metric = Counter(name, help, label_names)
+        self.metrics.append(metric)
+        return metric
+
+    def histogram(
+        self,
+        name: str,
+        help: str,
+        label_names: Sequence[str] = (),
+        buckets: Sequence[float] = DEFAULT_BUCKETS,
+    ):
+        metric = Histogram(name, help, label_names, buckets)
+        self.metrics.append(metric)
+        return metric
+
+    def render(self) -> str:
+        """
+        Prometheus text exposition format
+        """
+        lines = []
+        for metric in self.metrics:
+            lines.extend(metric.render())
+        return "\n".join(lines) + "\n"
+
+
+registry = MetricsRegistry()
+
+COMMAND_LATENCY = registry.histogram(
+    "lcbot_command_seconds", "Bot command handling time", ["command", "outcome"]
+)
+SCHEDULER_TICK = registry.histogram(
+    "lcbot_scheduler_tick_seconds", "Time to check and run due schedulers"
+)
+UPSTREAM_LATENCY = registry.histogram(
+    "lcbot_upstream_request_seconds",
+    "LeetCode and OpenAI request time",
+    ["service", "operation", "outcome"],
+)
+REACTIONS = registry.counter(
+    "lcbot_reactions_total", "Reactions handled on posts", ["action"]
+)
+LOCK_WAIT = registry.histogram(
+    "lcbot_lock_wait_seconds", "Time waiting to acquire a lock", ["lock"], FAST_BUCKETS
+)
+
+
+@contextmanager
+def track_upstream(service: str, operation: str):
+    """
+    Times a request to LeetCode or OpenAI, labelled by whether it raised. Also a span in the current trace.
+    """
+    start = time.perf_counter()
+    outcome = "error"
+    try:
+        with span(f"{service}.{operation}"):
+            yield
+        outcome = "ok"
+    finally:
+        UPSTREAM_LATENCY.observe(
+            time.perf_counter() - start, service, operation, outcome
+        )
+
+
+class InstrumentedLock(asyncio.Lock):
+    """
+    asyncio.Lock recording wait times of `async with` acquires in LOCK_WAIT
+    """
+
+    def __init__(self, name: str):
+        super().__init__()
+        self.name = name
+        self._waits = LOCK_WAIT.labels(name)
+
+    # Instead of acquire, to not add a coroutine layer to every acquire on hot paths
+    async def __aenter__(self):
+        if not self.locked():
+            # Acquires without waiting, so skip the clock
+            await self.acquire()
+            self._waits.observe(0.0)
+            return
+        start = time.perf_counter()
+        await self.acquire()
+        self._waits.observe(time.perf_counter() - start)
+
+
+async def start_metrics_server(
+    port: int,
+    metrics_registry: Optional[MetricsRegistry] = None,
+    host: Optional[str] = None,  # All interfaces
+) -> "web.AppRunner":
+    """
+    Serves /metrics on port until the returned runner is cleaned up
+    """
+    # Only imported if metrics are served, it's slow
+    from aiohttp import web
+
+    metrics_registry = metrics_registry or registry
+
+    async def handle_metrics(request: web.Request) -> web.Response:
+        return web.Response(
+            text=metrics_registry.render(), content_type="text/plain", charset="utf-8"
+        )
+
+    app = web.Application()
+    app.add_routes([web.get("/metrics", handle_metrics)])
+    runner = web.AppRunner(app)
+    await runner.setup()
+    await web.TCPSite(runner, host=host, port=port).start()
+    log.info(f"Serving metrics on port {port}")
+    return runner
@@ -1,36 +1,81 @@
+import functools
 import logging
-from openai import OpenAI
+from typing import Optional
 
 from src.utils.boto3 import get_from_ssm
-from src.utils.environment import get_from_env
+from src.utils.environment import get_from_env, get_optional_from_env
+from src.utils.metrics import track_upstream
+from src.utils.response_cache import ResponseCache, response_cache
+from src.utils.tracing import traced
 import src.internal.settings as settings
 
 log = logging.getLogger(__name__)
 
 
 class OpenAIClient:
-    def __init__(self):
-        if settings.is_dev:
-            log.info("Creating openai client using dev flag")
-            api_key = get_from_env("OPENAI_API_KEY")
-        else:
-            api_key = get_from_ssm("OPENAI_API_KEY")
-
-        self.client = OpenAI(api_key=api_key)
+    def __init__(
+        self,
+        cache: Optional[ResponseCache] = None,
+        base_url: Optional[str] = None,
+        api_key: Optional[str] = None,
+    ):
+        """
+        base_url defaults to the OPENAI_BASE_URL env var if set, ie to point at a local stand-in
+        """
+        if api_key is None:
+            if settings.is_dev:
+                log.info("Creating openai client using dev flag")
+                api_key = get_from_env("OPENAI_API_KEY")
+            else:
+                api_key = get_from_ssm("OPENAI_API_KEY")
+
+        # Slow to import, so only once a client is needed
+        from openai import OpenAI
+
+        self.client = OpenAI(
+            api_key=api_key,
+            base_url=base_url or get_optional_from_env("OPENAI_BASE_URL"),
+        )
         # self.model = "gpt-4.1-mini"
         self.model = "gpt-4.1"
+        self.cache = cache or response_cache
+
+    @traced()
+    def generate(self, inputs, bypass_cache: bool = False) -> str:
+        """
+        Returns the output text. Responses are cached by model + inputs, pass bypass_cache to force a fresh completion.
+        """
+        key = ResponseCache.make_key(self.model, inputs)
+        if not bypass_cache:
+            cached = self.cache.get(key)
+            if cached is not None:
+                log.info(f"LLM response cache hit: {self.cache.get_stats_text()}")
+                return cached
+            log.info(f"LLM response cache miss: {self.cache.get_stats_text()}")
 
-    def generate(self, inputs):
-        response = self.client.responses.create(model=self.model, input=inputs)
-        return response
-
-    def test(self, prompt=None):
-        response = self.client.responses.create(
-            model=self.model,
-            input=(
-                (prompt or "Write a story about a leetcode question two sum")
-                + " And make it maximum 1500 characters"
-            ),
+        with track_upstream("openai", "responses"):
+            response = self.client.responses.create(model=self.model, input=inputs)
+        log.info(
+            "OpenAI response %s",
+            response.id,
+            extra={"usage": response.usage, "output_text": response.output_text},
         )
-        log.info(response.output_text)
+        self.cache.put(key, response.output_text)
         return response.output_text
+
+    def test(self, prompt=None, bypass_cache: bool = False):
+        output_text = self.generate(
+            (prompt or "Write a story about a leetcode question two sum")
+            + " And make it maximum 1500 characters",
+            bypass_cache=bypass_cache,
+        )
+        log.info("Test output", extra={"output_text": output_text})
+        return output_text
+
+
+@functools.cache
+def get_openai_client() -> OpenAIClient:
+    """
+    Client shared by everything that didn't get one passed in, created on first use
+    """
+    return OpenAIClient()
@@ -0,0 +1,195 @@
+import asyncio
+from collections import Counter
+from dataclasses import dataclass, field
+import linecache
+import os
+import sys
+import threading
+import time
+import tracemalloc
+from types import FrameType
+from typing import Dict, List, Optional, Tuple
+
+from src.constants.config import (
+    PROFILE_SAMPLE_INTERVAL,
+    PROFILE_TRACEMALLOC_FRAMES,
+)
+from src.utils.loop_watchdog import PROJECT_ROOT, is_idle_frame
+
+
+def short_path(filename: str) -> str:
+    """
+    Relative to the project for our files, otherwise just the file name
+    """
+    if filename.startswith(PROJECT_ROOT):
+        return os.path.relpath(filename, PROJECT_ROOT)
+    return os.path.basename(filename)
+
+
+def _get_function_name(frame: FrameType) -> str:
+    code = frame.f_code
+    return f"{code.co_name} ({short_path(code.co_filename)}:{code.co_firstlineno})"
+
+
+@dataclass
+class FunctionStats:
+    function: str  # name (file:line)
+    self_samples: int = 0  # Samples with this function running
+    total_samples: int = 0  # Samples with this function anywhere on the stack
+
+
+@dataclass
+class CpuProfile:
+    """
+    Stacks of the event loop thread sampled every interval, outermost frame first. Samples idle in the
+    selector aren't counted, so this is where the loop spent its busy time.
+    """
+
+    seconds: float
+    interval: float
+    stacks: Counter = field(
+        default_factory=Counter
+    )  # Tuple of function names -> samples
+    num_idle_samples: int = 0
+
+    @property
+    def num_samples(self) -> int:
+        return sum(self.stacks.values())
+
+    def get_top(self, n: int) -> List[FunctionStats]:
+        """
+        Returns the n functions with the most samples of their own
+        """
+        functions: Dict[str, FunctionStats] = {}
+        for stack, count in self.stacks.items():
+            for function in set(stack):  # Once per sample, even if recursive
+                functions.setdefault(function, FunctionStats(function))
+                functions[function].total_samples += count
+            functions[stack[-1]].self_samples += count
+        return sorted(
+            functions.values(),
+            key=lambda f: (f.self_samples, f.total_samples),
+            reverse=True,
+        )[:n]
+
+    def get_folded_text(self) -> str:
+        """
+        One line per stack, functions separated by ;, then the sample count. Input for flame graph tools.
+        """
+        return "\n".join(
+            f"{';'.join(stack)} {count}" for stack, count in self.stacks.most_common()
+        )
+
+
+class _LoopSampler:
+    def __init__(self, thread_id: int, interval: float):
+        self.thread_id = thread_id
+        self.interval = interval
+        self.stacks: Counter = Counter()
+        self.num_idle_samples = 0
+        self._stopped = threading.Event()
+        self._thread = threading.Thread(
+            target=self._sample, name="cpu-profiler", daemon=True
+        )
+
+    def start(self):
+        self._thread.start()
+
+    def stop(self):
+        self._stopped.set()
+        self._thread.join()
+
+    def _sample(self):
+        while not self._stopped.wait(self.interval):
+            frame: Optional[FrameType] = sys._current_frames().get(self.thread_id)
+            if frame is None:
+                continue
+            if is_idle_frame(frame):
+                self.num_idle_samples += 1
+                continue
+            stack = []
+            while frame is not None:
+                stack.append(_get_function_name(frame))
+                frame = frame.f_back
+            self.stacks[tuple(reversed(stack))] += 1
+
+
+async def profile_cpu(
+    seconds: float, interval: float = PROFILE_SAMPLE_INTERVAL
+) -> CpuProfile:
+    """
+    Samples the running loop's thread from another thread for seconds, so the loop keeps going meanwhile
+    """
+    sampler = _LoopSampler(threading.get_ident(), interval)
+    sampler.start()
+    try:
+        await asyncio.sleep(seconds)
+    finally:
+        sampler.stop()
+    return CpuProfile(seconds, interval, sampler.stacks, sampler.num_idle_samples)
+
+
+@dataclass
+class MemoryProfile:
+    """
+    Memory allocated during the capture and still held at the end, by allocation site
+    """
+
+    seconds: float
+    growth: List[tracemalloc.StatisticDiff]  # Largest growth first
+    traced_memory: Tuple[int, int]  # bytes, current and peak while tracing
+
+    def get_top(self, n: int) -> List[tracemalloc.StatisticDiff]:
+        return [stat for stat in self.growth if stat.size_diff > 0][:n]
+
+    def get_report_text(self, n: int) -> str:
+        """
+        Top n sites by growth, with their tracebacks
+        """
+        lines = []
+        for i, stat in enumerate(self.get_top(n)):
+            lines.append(
+                f"#{i + 1}: +{stat.size_diff / 1024:.1f} KiB in +{stat.count_diff} blocks "
+                f"(now {stat.size / 1024:.1f} KiB)"
+            )
+            for frame in stat.traceback:  # Innermost last
+                lines.append(f"  {short_path(frame.filename)}:{frame.lineno}")
+                source = linecache.getline(frame.filename, frame.lineno).strip()
+                if source:
+                    lines.append(f"    {source}")
+        return "\n".join(lines)
+
+
+# Allocations by the import system and tracemalloc itself are noise
+_MEMORY_FILTERS = [
+    tracemalloc.Filter(False, "<frozen importlib._bootstrap>"),
+    tracemalloc.Filter(False, "<frozen importlib._bootstrap_external>"),
+    tracemalloc.Filter(False, tracemalloc.__file__),
+    tracemalloc.Filter(False, "<unknown>"),
+]
+
+
+async def profile_memory(
+    seconds: float, frames: int = PROFILE_TRACEMALLOC_FRAMES
+) -> MemoryProfile:
+    """
+    Traces allocations for seconds, diffing snapshots from the start and end.
+    Stops tracing after, unless it was already on.
+    """
+    was_tracing = tracemalloc.is_tracing()
+    if not was_tracing:
+        tracemalloc.start(frames)
+    try:
+        start = time.perf_counter()
+        before = tracemalloc.take_snapshot().filter_traces(_MEMORY_FILTERS)
+        await asyncio.sleep(max(0.0, seconds - (time.perf_counter() - start)))
+        after = tracemalloc.take_snapshot().filter_traces(_MEMORY_FILTERS)
+        traced_memory = tracemalloc.get_traced_memory()
+    finally:
+        if not was_tracing:
+            tracemalloc.stop()
+
+    # Group by the full traceback, the innermost line alone is often a library helper
+    growth = after.compare_to(before, "traceback")
+    growth.sort(key=lambda stat: stat.size_diff, reverse=True)
+    return MemoryProfile(seconds, growth, traced_memory)
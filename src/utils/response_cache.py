@@ -0,0 +1,135 @@
+import hashlib
+import json
+import logging
+import os
+from collections import OrderedDict
+from typing import Any, Optional
+
+from src.constants.config import LLM_CACHE_DIR, LLM_CACHE_MAX_BYTES
+
+log = logging.getLogger(__name__)
+
+
+class ResponseCache:
+    """
+    Content-addressed on-disk cache for LLM responses.
+    Entries are keyed by a hash of the model and input messages. Total size is bounded by max_bytes,
+    and the least recently used entries are evicted first.
+    """
+
+    def __init__(
+        self, cache_dir: str = LLM_CACHE_DIR, max_bytes: int = LLM_CACHE_MAX_BYTES
+    ):
+        self.cache_dir = cache_dir
+        self.max_bytes = max_bytes
+
+        self.hits = 0
+        self.misses = 0
+
+        # key -> size in bytes, least recently used first. Loaded lazily from disk.
+        self._entries: Optional[OrderedDict[str, int]] = None
+        self._total_bytes = 0
+
+    @staticmethod
+    def make_key(model: str, inputs: Any) -> str:
+        payload = json.dumps(
+            {"model": model, "input": inputs},
+            sort_keys=True,
+            separators=(",", ":"),
+            ensure_ascii=False,
+        )
+        return hashlib.sha256(payload.encode()).hexdigest()
+
+    @property
+    def hit_rate(self) -> float:
+        total = self.hits + self.misses
+        return self.hits / total if total else 0.0
+
+    def get_stats_text(self):
+        entries = self._load_index()
+        return (
+            f"hits={self.hits} misses={self.misses} hit_rate={self.hit_rate:.2f} "
+            f"entries={len(entries)} bytes={self._total_bytes}/{self.max_bytes}"
+        )
+
+    def get(self, key: str) -> Optional[str]:
+        entries = self._load_index()
+        if key not in entries:
+            self.misses += 1
+            return None
+
+        path = self._get_path(key)
+        try:
+            with open(path, "r", encoding="utf-8") as file:
+                text = file.read()
+            os.utime(path)  # Keep recency across restarts
+        except FileNotFoundError:
+            log.warning(f"Cache entry {key} missing from disk")
+            self._total_bytes -= entries.pop(key)
+            self.misses += 1
+            return None
+
+        entries.move_to_end(key)
+        self.hits += 1
+        return text
+
+    def put(self, key: str, text: str):
+        data = text.encode("utf-8")
+        if len(data) > self.max_bytes:
+            log.warning(f"Response of {len(data)} bytes too large to cache")
+            return
+
+        entries = self._load_index()
+        path = self._get_path(key)
+        tmp_path = path + ".tmp"
+        with open(tmp_path, "wb") as file:
+            file.write(data)
+        os.replace(tmp_path, path)
+
+        if key in entries:
+            self._total_bytes -= entries.pop(key)
+        entries[key] = len(data)
+        self._total_bytes += len(data)
+
+        self._evict()
+
+    def _evict(self):
+        entries = self._load_index()
+        while self._total_bytes > self.max_bytes:
+            key, size = entries.popitem(last=False)
+            self._total_bytes -= size
+            try:
+                os.remove(self._get_path(key))
+            except FileNotFoundError:
+                pass
+            log.info(f"Evicted LLM cache entry {key}")
+
+    def _get_path(self, key: str):
+        return os.path.join(self.cache_dir, key)
+
+    def _load_index(self) -> OrderedDict[str, int]:
+        if self._entries is not None:
+            return self._entries
+
+        os.makedirs(self.cache_dir, exist_ok=True)
+        files = [
+            entry
+            for entry in os.scandir(self.cache_dir)
+            if entry.is_file() and not entry.name.endswith(".tmp")
+        ]
+        files.sort(key=lambda entry: entry.stat().st_mtime)
+
+        self._entries = OrderedDict()
+        self._total_bytes = 0
+        for entry in files:
+            size = entry.stat().st_size
+            self._entries[entry.name] = size
+            self._total_bytes += size
+
+        log.info(f"Loaded LLM response cache: {len(self._entries)} entries")
+        self._evict()
+        return self._entries
+
+
+# Shared by all OpenAIClients
+response_cache = ResponseCache()
@@ -1,11 +1,13 @@
 from datetime import datetime, time, timedelta
 import logging
-from typing import Sequence
+from typing import Dict, Optional, Sequence
+
+from src.utils.clock import Clock, system_clock
 
 log = logging.getLogger("utils")
 
 
-def parse_date_str(date_str: str):
+def parse_date_str(date_str: str, clock: Optional[Clock] = None):
     """
     Parses a string into a `datetime` object, supporting multiple common formats.
     Parses into a single date (no repeats)
@@ -16,7 +18,7 @@ def parse_date_str(date_str: str):
         3. "Mon DD, YYYY HH:MM" - Short month name format (e.g., "Jun 21, 2025 14:30").
         4. "Month DD, YYYY HH:MM" - Full month name format (e.g., "June 21, 2025 14:30").
     """
-    now = datetime.now()
+    now = (clock or system_clock).now()
 
     try:
         time = datetime.strptime(date_str, "%H:%M")
@@ -75,3 +77,32 @@ def parse_days(days_str: str) -> Sequence[int]:
     if len(output) == 0:
         raise ValueError(f"{days_str} cannot be parsed")
     return output
+
+
+def parse_question_filters(filters_str: str) -> Dict[Optional[int], str]:
+    """
+    Parses comma separated rules of the form <days>=<filter>, or just <filter> for all other days.
+    Days are in any format parse_days supports, filters are a difficulty or topic.
+    ie, "Mo=easy,Fr=hard,arrays" -> {0: "easy", 4: "hard", None: "arrays"}
+    """
+    output: Dict[Optional[int], str] = {}
+    for rule in filters_str.split(","):
+        rule = rule.strip()
+        if not rule:
+            continue
+
+        if "=" in rule:
+            days_str, question_filter = rule.split("=", 1)
+            days = parse_days(days_str.strip())
+        else:
+            question_filter, days = rule, [None]
+
+        question_filter = question_filter.strip().lower()
+        if not question_filter:
+            raise ValueError(f"{rule} is missing a filter")
+        for day in days:
+            output[day] = question_filter
+
+    if len(output) == 0:
+        raise ValueError(f"{filters_str} cannot be parsed")
+    return output
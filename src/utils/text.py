@@ -1,11 +1,12 @@
 from datetime import datetime
 from typing import List
 
-from src.internal.posts import Post
-from src.internal.question_bank import QuestionBank
-import pytz
-
+from src.internal.posts import Post, Scheduler
+from src.internal.question_bank import QuestionBankInfo
 from src.internal.stats import UserStats
+from src.utils.loop_watchdog import BlockingSite
+from src.utils.profiler import CpuProfile, MemoryProfile, short_path
+from src.utils.tracing import Span
 
 
 def format_story_text(story: str):
@@ -34,7 +35,20 @@ def get_schedule_post_response_text(url: str, date: datetime):
     return f"Added question: {url} to be posted at {date.strftime('%Y-%m-%d %H:%M')}"
 
 
-def get_formatted_question_bank_list(banks: List[QuestionBank]):
+def get_scheduler_list_text(schedulers: List[Scheduler], num_post_times: int):
+    if len(schedulers) == 0:
+        return "No schedulers active."
+    lines = []
+    for scheduler in schedulers:
+        post_times = scheduler.upcoming_post_times(num_post_times)
+        upcoming = ", ".join(date.strftime("%a %Y-%m-%d %H:%M") for date in post_times)
+        lines.append(f"{scheduler} | Next: {upcoming or 'unknown'}")
+    return "\n".join(lines)
+
+
+def get_formatted_question_bank_list(banks: List[QuestionBankInfo]):
+    import pytz  # Only needed here, keep it off the startup path
+
     eastern_time = pytz.timezone("America/New_York")
     if len(banks) == 0:
         return "No question banks to display."
@@ -62,3 +76,92 @@ def get_stats_text(user_stats: List[UserStats]):
         lines.append(f"{stat.user_name}: {stat.total_completed}")
 
     return "\n".join(lines)
+
+
+def get_diagnostics_text(
+    loop_lag_text: str, offenders: List[BlockingSite], stack_lines: int = 8
+):
+    lines = [f"Event loop lag: {loop_lag_text}"]
+    if not offenders:
+        lines.append("Nothing has blocked the event loop.")
+        return "\n".join(lines)
+
+    lines.append("Blocking call sites, by total time blocked:")
+    for i, offender in enumerate(offenders):
+        lines.append(
+            f"{i + 1}. {offender.site} | {offender.num_stalls} stalls, "
+            f"{offender.blocked_time:.2f}s blocked, longest {offender.max_stall * 1000:.0f}ms, "
+            f"task {offender.task_name or 'unknown'}"
+        )
+
+    # Innermost frames of the worst offender's longest stall
+    stack = offenders[0].stack.rstrip().splitlines()[-stack_lines * 2 :]
+    lines.append(f"```\n{chr(10).join(stack)}\n```")
+    return "\n".join(lines)
+
+
+def _get_span_lines(span: Span, total: float, depth: int) -> List[str]:
+    line = f"{'  ' * depth}{span.name} {span.duration * 1000:.1f}ms ({span.duration / total:.0%})"
+    if span.children:
+        # Time not spent in any child, ie parsing or waiting on the state lock
+        own = span.duration - sum(child.duration for child in span.children)
+        line += f", self {own * 1000:.1f}ms"
+    if span.error:
+        line += f" raised {span.error}"
+    lines = [line]
+    for child in span.children:
+        lines.extend(_get_span_lines(child, total, depth + 1))
+    return lines
+
+
+def get_trace_text(trace: Span):
+    started_at = datetime.fromtimestamp(trace.started_at).strftime("%Y-%m-%d %H:%M:%S")
+    attributes = ", ".join(f"{k}={v}" for k, v in trace.attributes.items())
+    header = f"{trace.name} at {started_at}" + (
+        f" ({attributes})" if attributes else ""
+    )
+    spans = "\n".join(_get_span_lines(trace, trace.duration or 1.0, 0))
+    return f"{header}\n```\n{spans}\n```"
+
+
+def get_cpu_profile_text(profile: CpuProfile, n: int):
+    num_samples = profile.num_samples
+    total = num_samples + profile.num_idle_samples
+    lines = [
+        f"CPU profile of the event loop over {profile.seconds:.0f}s: "
+        f"busy in {num_samples} of {total} samples ({num_samples / (total or 1):.0%})"
+    ]
+    if not num_samples:
+        lines.append("The event loop was idle.")
+        return "\n".join(lines)
+
+    lines.append("Top functions by own samples (own / including callees):")
+    for i, stats in enumerate(profile.get_top(n)):
+        lines.append(
+            f"{i + 1}. {stats.function} | {stats.self_samples / num_samples:.1%} / "
+            f"{stats.total_samples / num_samples:.1%}"
+        )
+    lines.append("Attached stacks are in folded format, for flame graph tools.")
+    return "\n".join(lines)
+
+
+def get_memory_profile_text(profile: MemoryProfile, n: int):
+    current, peak = profile.traced_memory
+    lines = [
+        f"Memory profile over {profile.seconds:.0f}s: "
+        f"{current / 1024**2:.1f} MiB traced, peak {peak / 1024**2:.1f} MiB"
+    ]
+    top = profile.get_top(n)
+    if not top:
+        lines.append("No memory growth.")
+        return "\n".join(lines)
+
+    lines.append("Top allocation sites by growth:")
+    for i, stat in enumerate(top):
+        frame = stat.traceback[-1]  # Innermost
+        lines.append(
+            f"{i + 1}. {short_path(frame.filename)}:{frame.lineno} | +{stat.size_diff / 1024:.1f} KiB, "
+            f"+{stat.count_diff} blocks"
+        )
+    lines.append("Attached report has the full tracebacks.")
+    return "\n".join(lines)
@@ -0,0 +1,178 @@
+from collections import deque
+from contextlib import contextmanager
+from contextvars import ContextVar
+from dataclasses import dataclass, field
+import functools
+import inspect
+import json
+import logging
+import os
+import time
+from typing import Any, Deque, Dict, List, Optional
+
+from src.constants.config import (
+    TRACE_FILE_MAX_BYTES,
+    TRACE_HISTORY,
+    TRACE_SLOW_THRESHOLD,
+)
+
+log = logging.getLogger(__name__)
+
+
+@dataclass
+class Span:
+    """
+    A timed step of a command, with the steps it made as children
+    """
+
+    name: str
+    started_at: float = field(default_factory=time.time)  # Unix time, for exports
+    duration: float = 0.0  # seconds, set when the span ends
+    attributes: Dict[str, Any] = field(default_factory=dict)
+    error: Optional[str] = None  # Exception type if the span raised
+    children: List["Span"] = field(default_factory=list)
+
+    def to_dict(self) -> dict:
+        return {
+            "name": self.name,
+            "started_at": self.started_at,
+            "duration": self.duration,
+            "attributes": self.attributes,
+            "error": self.error,
+            "children": [child.to_dict() for child in self.children],
+        }
+
+
+# Innermost open span of the running task, tasks and threads started from it inherit it
+_current_span: ContextVar[Optional[Span]] = ContextVar("current_span", default=None)
+
+
+@contextmanager
+def _open_span(span: Span):
+    token = _current_span.set(span)
+    start = time.perf_counter()
+    try:
+        yield span
+    except BaseException as e:
+        span.error = type(e).__name__
+        raise
+    finally:
+        span.duration = time.perf_counter() - start
+        _current_span.reset(token)
+
+
+@contextmanager
+def span(name: str, **attributes):
+    """
+    Times a step as a child of the current span. Does nothing outside a trace, yielding None.
+    """
+    parent = _current_span.get()
+    if parent is None:
+        yield None
+        return
+    child = Span(name, attributes=attributes)
+    parent.children.append(child)
+    with _open_span(child):
+        yield child
+
+
+def traced(name: Optional[str] = None):
+    """
+    Decorator running the function, sync or async, in a span named after it
+    """
+
+    def decorator(func):
+        span_name = name or func.__qualname__
+
+        if inspect.iscoroutinefunction(func):
+
+            @functools.wraps(func)
+            async def async_wrapper(*args, **kwargs):
+                if _current_span.get() is None:  # Skip the context manager
+                    return await func(*args, **kwargs)
+                with span(span_name):
+                    return await func(*args, **kwargs)
+
+            return async_wrapper
+
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            if _current_span.get() is None:
+                return func(*args, **kwargs)
+            with span(span_name):
+                return func(*args, **kwargs)
+
+        return wrapper
+
+    return decorator
+
+
+class JsonlTraceExporter:
+    """
+    Appends each trace as a line of JSON, moving the file to path.1 once over max_bytes
+    """
+
+    def __init__(self, path: str, max_bytes: int = TRACE_FILE_MAX_BYTES):
+        self.path = path
+        self.max_bytes = max_bytes
+
+    def export(self, trace: Span):
+        # Only slow traces are exported, so a small blocking write is fine
+        try:
+            os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+            if (
+                os.path.exists(self.path)
+                and os.path.getsize(self.path) >= self.max_bytes
+            ):
+                os.replace(self.path, self.path + ".1")
+            with open(self.path, mode="a", encoding="utf-8") as file:
+                file.write(json.dumps(trace.to_dict()) + "\n")
+        except OSError as e:
+            log.warning(f"Failed to export trace {trace.name}: {e}")
+
+
+class Tracer:
+    """
+    Keeps recent traces in memory, and the latest one slower than slow_threshold.
+    Slow traces are also passed to the exporter, if set.
+    """
+
+    def __init__(
+        self,
+        slow_threshold: float = TRACE_SLOW_THRESHOLD,
+        history: int = TRACE_HISTORY,
+        exporter: Optional[JsonlTraceExporter] = None,
+    ):
+        self.slow_threshold = slow_threshold  # seconds
+        self.recent: Deque[Span] = deque(maxlen=history)  # Most recent last
+        self.last_slow: Optional[Span] = None
+        self.exporter = exporter
+
+    @contextmanager
+    def trace(self, name: str, **attributes):
+        """
+        Starts a trace with a root span, or a child span if already in one
+        """
+        if _current_span.get() is not None:
+            with span(name, **attributes) as child:
+                yield child
+            return
+
+        root = Span(name, attributes=attributes)
+        try:
+            with _open_span(root):
+                yield root
+        finally:
+            self._record(root)
+
+    def _record(self, root: Span):
+        self.recent.append(root)
+        if root.duration < self.slow_threshold:
+            return
+        self.last_slow = root
+        log.info(f"Slow trace {root.name}: {root.duration * 1000:.1f}ms")
+        if self.exporter:
+            self.exporter.export(root)
+
+
+tracer = Tracer()
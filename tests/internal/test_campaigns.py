@@ -0,0 +1,148 @@
+from datetime import datetime, timedelta
+
+import pytest
+
+from src.internal.campaigns import Campaign
+from src.internal.leetcode_bot_logic import Channel, LeetcodeBot
+from src.internal.message_queue import MessageQueue
+from src.internal.scheduler_store import CatchUpPolicy, SchedulerStore
+from src.internal.stats import StatsManager
+from src.types.command_inputs import CampaignCommandArgs
+from src.utils.clock import VirtualClock
+import src.internal.campaigns
+import src.internal.settings
+from tests.test_utils.fakes import (
+    FakeChannel,
+    FakeLeetcodeClient,
+    FakeOpenAIClient,
+    FakeQuestionBankManager,
+)
+
+
+@pytest.fixture(scope="function", autouse=True)
+def not_dev(monkeypatch):
+    monkeypatch.setattr(src.internal.settings, "is_dev", False)
+
+
+async def make_bot(clock: VirtualClock, store_path: str) -> LeetcodeBot:
+    lc_bot = LeetcodeBot(
+        clock=clock,
+        leetcode_client=FakeLeetcodeClient(),
+        openai_client=FakeOpenAIClient(),
+        question_bank_manager=FakeQuestionBankManager(),
+        stats=StatsManager(),
+        message_queue=MessageQueue(rate=1e9, capacity=10**9),
+        scheduler_store=SchedulerStore(store_path),
+    )
+    await lc_bot.init(FakeChannel(1), FakeChannel(2), members=["user"])
+    return lc_bot
+
+
+async def run_ticks(lc_bot: LeetcodeBot, clock: VirtualClock, days: int):
+    """
+    Checks schedulers every 15 minutes, returns the times something was posted
+    """
+    main_channel = lc_bot.channels[Channel.MAIN]
+    posted_times = []
+    for _ in range(days * 24 * 4):
+        num_posts = len(main_channel.messages)
+        await lc_bot.handle_check_for_schedulers()
+        if len(main_channel.messages) > num_posts:
+            posted_times.append(clock.now())
+        clock.advance(timedelta(minutes=15))
+    return posted_times
+
+
+CAMPAIGN_ARGS = CampaignCommandArgs(
+    time_str="9:00",
+    days_str="MoWe",
+    question_bank_name="bank",
+    length=3,
+    story_prompt="A story",
+)
+
+
+@pytest.mark.asyncio
+async def test_campaign_posts_on_schedule(tmp_path):
+    clock = VirtualClock(datetime(2025, 6, 30, 8))  # 8AM Monday
+    lc_bot = await make_bot(clock, str(tmp_path / "schedulers.jsonl"))
+    await lc_bot.handle_campaign(CAMPAIGN_ARGS)
+
+    # 3 questions, then the story ending
+    assert await run_ticks(lc_bot, clock, days=14) == [
+        datetime(2025, 6, 30, 9),
+        datetime(2025, 7, 2, 9),
+        datetime(2025, 7, 7, 9),
+        datetime(2025, 7, 9, 9),
+    ]
+    main_channel = lc_bot.channels[Channel.MAIN]
+    assert "bank-2" in main_channel.messages[2].content
+    assert lc_bot.openai_client.num_generations == 4
+    assert lc_bot.schedulers == []
+
+
+@pytest.mark.asyncio
+@pytest.mark.parametrize(
+    "catch_up_policy, expected_first_post",
+    [
+        (CatchUpPolicy.POST_ONCE, datetime(2025, 7, 10)),  # First tick after restart
+        (CatchUpPolicy.SKIP, datetime(2025, 7, 14, 9)),  # Next Monday
+    ],
+)
+async def test_campaign_restored_after_restart(
+    tmp_path, catch_up_policy, expected_first_post
+):
+    store_path = str(tmp_path / "schedulers.jsonl")
+    clock = VirtualClock(datetime(2025, 6, 30, 8))  # 8AM Monday
+    lc_bot = await make_bot(clock, store_path)
+    await lc_bot.handle_campaign(CAMPAIGN_ARGS)
+    await run_ticks(lc_bot, clock, days=1)  # First question posted
+    campaign = lc_bot.schedulers[0]
+
+    # Down until Thursday, missing Wednesday
+    clock.set(datetime(2025, 7, 10))
+    restarted = LeetcodeBot(
+        clock=clock,
+        leetcode_client=FakeLeetcodeClient(),
+        openai_client=FakeOpenAIClient(),
+        question_bank_manager=FakeQuestionBankManager(),
+        stats=StatsManager(),
+        message_queue=MessageQueue(rate=1e9, capacity=10**9),
+        scheduler_store=SchedulerStore(store_path),
+    )
+    restarted.channels[Channel.MAIN] = FakeChannel(1)
+    restarted.channels[Channel.BOT] = FakeChannel(2)
+    await restarted.stats.init(["user"])
+    await restarted.restore_schedulers(catch_up_policy)
+
+    assert len(restarted.schedulers) == 1
+    restored = restarted.schedulers[0]
+    assert isinstance(restored, Campaign)
+    assert restored.id == campaign.id
+    assert restored.repeats == campaign.repeats == 3
+    assert restored.story_history == campaign.story_history
+
+    posted_times = await run_ticks(restarted, clock, days=14)
+    assert posted_times[0] == expected_first_post
+    assert len(posted_times) == 3  # 2 questions left, then the story ending
+    assert restarted.schedulers == []
+
+
+@pytest.mark.asyncio
+async def test_openai_client_created_on_first_story(tmp_path, monkeypatch):
+    clients = []
+
+    def get_openai_client():
+        clients.append(FakeOpenAIClient())
+        return clients[-1]
+
+    monkeypatch.setattr(src.internal.campaigns, "get_openai_client", get_openai_client)
+    clock = VirtualClock(datetime(2025, 6, 30, 8))
+    lc_bot = await make_bot(clock, str(tmp_path / "schedulers.jsonl"))
+    lc_bot.openai_client = None
+    await lc_bot.handle_campaign(CAMPAIGN_ARGS)
+    assert clients == []
+
+    await run_ticks(lc_bot, clock, days=1)
+    assert len(clients) == 1
+    assert clients[0].num_generations == 1
@@ -2,92 +2,131 @@ import pytest
 from datetime import datetime, time, timedelta
 
 from src.internal.date_generator import DateGenerator
-import src.internal.date_generator
-from tests.test_utils.datetime_test_utils import MockDateTime
+from src.utils.clock import VirtualClock
 
 
-@pytest.fixture(scope="function", autouse=True)
-def date_setup(monkeypatch):
-    monkeypatch.setattr(src.internal.date_generator, "datetime", MockDateTime)
+@pytest.fixture(scope="function")
+def clock():
+    return VirtualClock(datetime(2025, 6, 26, 9))
 
 
-def test_initial_date_on_valid_day_and_time():
-    MockDateTime.init(datetime(2025, 6, 30, 8))  # 8AM Monday
-    dg = DateGenerator(days=[0], time=time(9, 0))
+def test_initial_date_on_valid_day_and_time(clock):
+    clock.set(datetime(2025, 6, 30, 8))  # 8AM Monday
+    dg = DateGenerator(days=[0], time=time(9, 0), clock=clock)
     assert dg.get_next_posting_date().weekday() == 0
     assert dg.get_next_posting_date().hour == 9
 
 
-def test_initial_date_adjusts_to_next_valid_day():
+def test_initial_date_adjusts_to_next_valid_day(clock):
     called_date = datetime(2025, 6, 30, 10)  # 10AM Monday
-    MockDateTime.init(called_date)  # 10AM
-    dg = DateGenerator(days=[0], time=time(9, 0))
+    clock.set(called_date)  # 10AM
+    dg = DateGenerator(days=[0], time=time(9, 0), clock=clock)
     # Should schedule for next Monday
     assert dg.get_next_posting_date().weekday() == 0
     assert dg.get_next_posting_date() == datetime(2025, 7, 7, 9)
 
 
-def test_day_generator_cycles_correctly():
+def test_day_generator_cycles_correctly(clock):
     called_date = datetime(2025, 6, 30, 10)  # 10AM Monday
-    MockDateTime.init(called_date)  # 10AM
-    dg = DateGenerator(days=[1, 3, 5], time=time(9))  # Tuesday, thursday, sat
+    clock.set(called_date)  # 10AM
+    dg = DateGenerator(
+        days=[1, 3, 5], time=time(9), clock=clock
+    )  # Tuesday, thursday, sat
 
     assert dg() is False
-    MockDateTime.advance(timedelta(days=1))  # Tuesday 10am
+    clock.advance(timedelta(days=1))  # Tuesday 10am
     assert dg() is True
-    MockDateTime.advance(timedelta(seconds=1))
+    clock.advance(timedelta(seconds=1))
     assert dg() is False  # Should have advanced to next day
-    MockDateTime.advance(timedelta(days=1))  # Wednesday 10am
+    clock.advance(timedelta(days=1))  # Wednesday 10am
     assert dg() is False
-    MockDateTime.advance(timedelta(days=1))  # Thursday 10am
+    clock.advance(timedelta(days=1))  # Thursday 10am
     assert dg() is True
-    MockDateTime.advance(timedelta(days=1))  # Friday 10AM
+    clock.advance(timedelta(days=1))  # Friday 10AM
     assert dg() is False  # Should have advanced to next day
-    MockDateTime.advance(timedelta(days=1))  # Sat 10AM
+    clock.advance(timedelta(days=1))  # Sat 10AM
     assert dg() is True
-    MockDateTime.advance(timedelta(seconds=1))
+    clock.advance(timedelta(seconds=1))
     assert dg() is False  # Should have advanced to next day
-    MockDateTime.advance(timedelta(days=1))  # Sunday 10am
+    clock.advance(timedelta(days=1))  # Sunday 10am
     assert dg() is False  # Should have advanced to next day
-    MockDateTime.advance(timedelta(days=1))  # Monday 10am
+    clock.advance(timedelta(days=1))  # Monday 10am
     assert dg() is False
-    MockDateTime.advance(timedelta(days=1))  # Tuesday 10am
+    clock.advance(timedelta(days=1))  # Tuesday 10am
     assert dg() is True
 
 
-def test_day_generator_returns_true_on_time_single_day():
+def test_day_generator_returns_true_on_time_single_day(clock):
     called_date = datetime(2025, 6, 30, 9, 59)  # 9:59AM Monday
-    MockDateTime.init(called_date)
-    dg = DateGenerator(days=[0], time=time(10))  # Monday at 10AM
+    clock.set(called_date)
+    dg = DateGenerator(days=[0], time=time(10), clock=clock)  # Monday at 10AM
 
     assert dg() is False
-    MockDateTime.advance(timedelta(minutes=1))
+    clock.advance(timedelta(minutes=1))
     assert dg() is True
     assert dg() is False  # advanced date generator
-    MockDateTime.advance(timedelta(days=2))
+    clock.advance(timedelta(days=2))
     assert dg() is False
-    MockDateTime.advance(timedelta(days=4, hours=23, minutes=59))
+    clock.advance(timedelta(days=4, hours=23, minutes=59))
     assert dg() is False
-    MockDateTime.advance(timedelta(minutes=1))
+    clock.advance(timedelta(minutes=1))
     assert dg() is True
     assert dg() is False
 
 
-def test_day_generator_all_days():
+def test_day_generator_all_days(clock):
     called_date = datetime(2025, 6, 30, 9, 59)  # 9:59AM Monday
-    MockDateTime.init(called_date)
-    dg = DateGenerator(days=[0, 1, 2, 3, 4, 5, 6], time=time(10))  # Monday at 10AM
+    clock.set(called_date)
+    dg = DateGenerator(
+        days=[0, 1, 2, 3, 4, 5, 6], time=time(10), clock=clock
+    )  # Monday at 10AM
 
     for _ in range(12):
         assert dg() is False
-        MockDateTime.advance(timedelta(minutes=1))
+        clock.advance(timedelta(minutes=1))
         assert dg() is True
         assert dg() is False
-        MockDateTime.advance(timedelta(minutes=1))
+        clock.advance(timedelta(minutes=1))
         assert dg() is False
-        MockDateTime.advance(timedelta(hours=23, minutes=58))
+        clock.advance(timedelta(hours=23, minutes=58))
 
 
-def test_day_generator_raises_exception_on_no_days():
+def test_day_generator_raises_exception_on_no_days(clock):
     with pytest.raises(ValueError):
-        DateGenerator(days=[], time=time(9))
+        DateGenerator(days=[], time=time(9), clock=clock)
+
+
+def test_day_generator_skips_missed_dates(clock):
+    clock.set(datetime(2025, 6, 30, 8))  # 8AM Monday
+    dg = DateGenerator(days=[0, 2], time=time(9), clock=clock)
+
+    clock.advance(timedelta(days=365))  # Down for a year
+    assert dg() is True
+    assert dg.get_next_posting_date() == datetime(2026, 7, 1, 9)  # Next Wednesday
+    assert dg() is False
+
+
+def test_preview(clock):
+    clock.set(datetime(2025, 6, 30, 10))  # 10AM Monday
+    dg = DateGenerator(days=[1, 3, 5], time=time(9), clock=clock)
+
+    assert dg.preview(5) == [
+        datetime(2025, 7, 1, 9),
+        datetime(2025, 7, 3, 9),
+        datetime(2025, 7, 5, 9),
+        datetime(2025, 7, 8, 9),
+        datetime(2025, 7, 10, 9),
+    ]
+    assert dg.preview(0) == []
+
+    # Matches stepping through the generator
+    dg = DateGenerator(days=[0, 4, 6], time=time(9), clock=clock)
+    expected = dg.preview(20)
+    for date in expected:
+        clock.set(date)
+        assert dg() is True
+    clock.set(expected[-1] + timedelta(seconds=1))
+    assert (
+        dg.get_next_posting_date()
+        == DateGenerator(days=[0, 4, 6], time=time(9), clock=clock).preview(1)[0]
+    )
@@ -5,19 +5,27 @@ import pytest
 import pytest_asyncio
 
 from src.internal.leetcode_bot_logic import Channel, LeetcodeBot
-import src.internal.leetcode_bot_logic
-import src.utils.string_utils
 from src.utils.leetcode_client import QuestionData
 from src.internal.posts import Post
-import src.internal.posts
+from src.internal.scheduler_store import SchedulerStore
 from src.types.command_inputs import PostCommandArgs
-from tests.test_utils.datetime_test_utils import MockDateTime
+from src.types.errors import SchedulerDoesNotExistError
+from src.utils.clock import VirtualClock
+
+
+@pytest.fixture(scope="function")
+def clock():
+    return VirtualClock(datetime(2025, 6, 26, 9))
 
 
 @pytest_asyncio.fixture(scope="function")
-async def lc_bot(mocker: pytest_mock.MockerFixture, monkeypatch):
+async def lc_bot(clock, tmp_path, mocker: pytest_mock.MockerFixture):
     load_dotenv()
-    bot = LeetcodeBot()
+    bot = LeetcodeBot(
+        clock=clock,
+        leetcode_client=mocker.Mock(),
+        scheduler_store=SchedulerStore(str(tmp_path / "schedulers.jsonl")),
+    )
 
     # Setup mock channels
     bot_channel = mocker.Mock()
@@ -26,24 +34,12 @@ async def lc_bot(mocker: pytest_mock.MockerFixture, monkeypatch):
     main_channel.send = mocker.AsyncMock()
     await bot.init(main_channel=main_channel, bot_channel=bot_channel, members=[])
 
-    # Mock LC client
-    bot.leetcode_client = mocker.Mock()
-
-    # Monkeypatch datetime in LeetcodeBot with MockDateTime
-    monkeypatch.setattr(src.internal.leetcode_bot_logic, "datetime", MockDateTime)
-    # Monkeypatch datetime in src.utils.string with MockDateTime
-    monkeypatch.setattr(src.utils.string_utils, "datetime", MockDateTime)
-
     yield bot
 
 
 @pytest.fixture(scope="function")
-def posts_lc_client(mocker: pytest_mock.MockerFixture, monkeypatch):
-    # Mock lc client
-    posts_lc_client_mock = mocker.Mock()
-    monkeypatch.setattr(src.internal.posts, "leetcode_client", posts_lc_client_mock)
-
-    yield posts_lc_client_mock
+def posts_lc_client(lc_bot):
+    yield lc_bot.leetcode_client
 
 
 @pytest.mark.asyncio
@@ -117,11 +113,11 @@ async def test_handle_post_command_none_rendered_correctly(
 
 @pytest.mark.asyncio
 async def test_handle_post_command_valid_future_schedule(
-    lc_bot, posts_lc_client, mocker: pytest_mock.MockerFixture
+    clock, lc_bot, posts_lc_client, mocker: pytest_mock.MockerFixture
 ):
     curr_date = datetime(2025, 6, 26, 9)
     test_url = "https://leetcode.com/problems/minimum-moves-to-equal-array-elements-ii/description/"
-    MockDateTime.init(curr_date)
+    clock.set(curr_date)
     posts_lc_client.scrape_question.return_value = QuestionData(
         1, "title", "content", "Easy", test_url
     )
@@ -132,11 +128,11 @@ async def test_handle_post_command_valid_future_schedule(
     await lc_bot.handle_check_for_schedulers()
     lc_bot.channels[Channel.MAIN].send.assert_not_called()
 
-    MockDateTime.advance(timedelta(hours=3))
+    clock.advance(timedelta(hours=3))
     await lc_bot.handle_check_for_schedulers()
     lc_bot.channels[Channel.MAIN].send.assert_not_called()
 
-    MockDateTime.advance(timedelta(minutes=31))
+    clock.advance(timedelta(minutes=31))
     await lc_bot.handle_check_for_schedulers()
     args, kwargs = lc_bot.channels[Channel.MAIN].send.call_args
     question_text = args[0]
@@ -147,10 +143,50 @@ async def test_handle_post_command_valid_future_schedule(
 
 
 @pytest.mark.asyncio
-async def test_handle_post_command_date_in_past(lc_bot, mocker):
+async def test_view_schedulers_shows_post_time(clock, lc_bot):
+    clock.set(datetime(2025, 6, 26, 9))
+    test_url = "https://leetcode.com/problems/two-sum/"
+    await lc_bot.handle_post_command(PostCommandArgs(url=test_url, date_str="12:30"))
+
+    await lc_bot.handle_view_schedulers()
+    args, kwargs = lc_bot.channels[Channel.BOT].send.call_args
+    assert "Next: Thu 2025-06-26 12:30" in args[0]
+
+
+@pytest.mark.asyncio
+async def test_scheduled_post_restored_and_deleted_by_id(clock, lc_bot):
+    clock.set(datetime(2025, 6, 26, 9))
+    for date_str in ["12:30", "13:30"]:
+        await lc_bot.handle_post_command(
+            PostCommandArgs(
+                url="https://leetcode.com/problems/two-sum/", date_str=date_str
+            )
+        )
+    first, second = lc_bot.schedulers
+
+    restarted = LeetcodeBot(
+        clock=clock, scheduler_store=SchedulerStore(lc_bot.scheduler_store.path)
+    )
+    restarted.channels = lc_bot.channels
+    await restarted.restore_schedulers()
+    assert [s.to_spec() for s in restarted.schedulers] == [
+        first.to_spec(),
+        second.to_spec(),
+    ]
+
+    # Ids, not positions in the list
+    await restarted.handle_delete_scheduler(second.id)
+    assert [s.id for s in restarted.schedulers] == [first.id]
+    with pytest.raises(SchedulerDoesNotExistError):
+        await restarted.handle_delete_scheduler(second.id)
+    assert len(SchedulerStore(lc_bot.scheduler_store.path).load()) == 1
+
+
+@pytest.mark.asyncio
+async def test_handle_post_command_date_in_past(clock, lc_bot, mocker):
     curr_date = datetime(2025, 6, 26, 9)
     test_url = "https://leetcode.com/problems/minimum-moves-to-equal-array-elements-ii/description/"
-    MockDateTime.init(curr_date)
+    clock.set(curr_date)
 
     args = PostCommandArgs(
         url=test_url, date_str="2025-05-26-09:00", desc="desc", story="story"
@@ -166,10 +202,10 @@ async def test_handle_post_command_date_in_past(lc_bot, mocker):
 
 
 @pytest.mark.asyncio
-async def test_handle_post_command_invalid_date_str(lc_bot, mocker):
+async def test_handle_post_command_invalid_date_str(clock, lc_bot, mocker):
     curr_date = datetime(2025, 6, 26, 9)
     test_url = "https://leetcode.com/problems/minimum-moves-to-equal-array-elements-ii/description/"
-    MockDateTime.init(curr_date)
+    clock.set(curr_date)
 
     args = PostCommandArgs(
         url=test_url, date_str="invalid date", desc="desc", story="story"
@@ -179,3 +215,35 @@ async def test_handle_post_command_invalid_date_str(lc_bot, mocker):
     args, kwargs = lc_bot.channels[Channel.BOT].send.call_args
     error_text = args[0]
     assert "Failed to parse date str" in error_text
+
+
+@pytest.mark.asyncio
+async def test_send_splits_long_message(lc_bot):
+    lines = [f"user{i}: {i}" for i in range(400)]
+    await lc_bot.send("\n".join(lines), Channel.BOT)
+
+    sent = [args[0] for args, _ in lc_bot.channels[Channel.BOT].send.call_args_list]
+    assert len(sent) > 1
+    assert all(len(part) <= 2000 for part in sent)
+    assert "\n".join(sent) == "\n".join(lines)
+
+
+@pytest.mark.asyncio
+async def test_handle_bot_stats(lc_bot):
+    await lc_bot.handle_bot_stats()
+    args, kwargs = lc_bot.channels[Channel.BOT].send.call_args
+    assert "Message queue: queued=0" in args[0]
+    assert "avg_wait=" in args[0]
+    assert "LLM response cache: hits=" in args[0]
+
+
+@pytest.mark.asyncio
+async def test_metadata_index_retried(lc_bot, mocker: pytest_mock.MockerFixture):
+    mocker.patch("src.internal.leetcode_bot_logic.METADATA_INDEX_RETRY_DELAY", 0)
+    campaign = mocker.Mock(id=1)
+    campaign.index_question_metadata = mocker.AsyncMock(
+        side_effect=[ConnectionError(), None]
+    )
+
+    await lc_bot._index_question_metadata(campaign)
+    assert campaign.index_question_metadata.await_count == 2
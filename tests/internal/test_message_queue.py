@@ -0,0 +1,96 @@
+import asyncio
+
+import pytest
+import pytest_mock
+
+from src.internal.message_queue import MessageQueue, Priority
+
+
+def make_channel(mocker: pytest_mock.MockerFixture, id: int, sent: list):
+    channel = mocker.Mock()
+    channel.id = id
+
+    async def send(msg, **kwargs):
+        sent.append((id, msg))
+        return mocker.Mock(id=len(sent))
+
+    channel.send = send
+    return channel
+
+
+@pytest.mark.asyncio
+async def test_sends_higher_priority_first(mocker: pytest_mock.MockerFixture):
+    sent = []
+    main_channel = make_channel(mocker, 1, sent)
+    bot_channel = make_channel(mocker, 2, sent)
+    queue = MessageQueue()
+
+    low = queue.enqueue(bot_channel, "error", Priority.LOW)
+    normal = queue.enqueue(bot_channel, "response", Priority.NORMAL)
+    high = queue.enqueue(main_channel, "post", Priority.HIGH)
+    await asyncio.gather(low, normal, high)
+
+    assert sent == [(1, "post"), (2, "response"), (2, "error")]
+    assert (await high).id == 1
+    assert queue.num_sent == 3
+
+
+@pytest.mark.asyncio
+async def test_coalesces_identical_messages(mocker: pytest_mock.MockerFixture):
+    sent = []
+    channel = make_channel(mocker, 1, sent)
+    queue = MessageQueue()
+
+    first = queue.enqueue(channel, "error", coalesce=True)
+    second = queue.enqueue(channel, "error", coalesce=True)
+    other = queue.enqueue(channel, "other error", coalesce=True)
+
+    assert first is not second
+    assert await first is await second
+    await other
+    assert sent == [(1, "error\n(repeated 2 times)"), (1, "other error")]
+    assert queue.num_coalesced == 1
+
+
+@pytest.mark.asyncio
+async def test_rate_limits_per_channel(mocker: pytest_mock.MockerFixture):
+    sent = []
+    channel = make_channel(mocker, 1, sent)
+    other_channel = make_channel(mocker, 2, sent)
+    queue = MessageQueue(rate=20, capacity=1)
+
+    first = queue.enqueue(channel, "a")
+    second = queue.enqueue(channel, "b")
+    other = queue.enqueue(other_channel, "c")
+    await asyncio.gather(first, second, other)
+
+    # Second message on channel 1 waits for a token, channel 2 is not blocked behind it
+    assert sent == [(1, "a"), (2, "c"), (1, "b")]
+    assert queue.max_wait_time >= 0.04
+
+
+@pytest.mark.asyncio
+async def test_send_failure_sets_exception(mocker: pytest_mock.MockerFixture):
+    channel = mocker.Mock()
+    channel.id = 1
+    channel.send = mocker.AsyncMock(side_effect=RuntimeError("failed"))
+    queue = MessageQueue()
+
+    with pytest.raises(RuntimeError):
+        await queue.enqueue(channel, "a")
+
+
+@pytest.mark.asyncio
+async def test_cancelled_caller_does_not_cancel_coalesced_send(
+    mocker: pytest_mock.MockerFixture,
+):
+    sent = []
+    channel = make_channel(mocker, 1, sent)
+    queue = MessageQueue()
+
+    first = queue.enqueue(channel, "error", coalesce=True)
+    second = queue.enqueue(channel, "error", coalesce=True)
+    first.cancel()
+
+    assert (await second).id == 1
+    assert sent == [(1, "error\n(repeated 2 times)")]
@@ -1,5 +1,8 @@
+import pytest
 import pytest_mock
 from src.internal.question_bank import Question, QuestionBank
+from src.types.errors import NoMoreQuestionsInQuestionBankError
+from src.utils.leetcode_client import QuestionMetadata, question_metadata_cache
 import src.internal.question_bank
 from datetime import datetime
 
@@ -15,3 +18,32 @@ def test_question_bank_random_choice(mocker: pytest_mock.MockerFixture, monkeypa
     q = bank.get_random_question_url()
     assert q == "q2"
     assert bank.questions[1].posted is True
+
+
+@pytest.fixture
+def metadata():
+    question_metadata_cache.update(
+        {
+            "q1": QuestionMetadata("q1", "1", "Q1", "Easy", ("array",)),
+            "q2": QuestionMetadata("q2", "2", "Q2", "Hard", ("array", "graph")),
+            "q3": QuestionMetadata("q3", "3", "Q3", "Easy", ()),
+        }
+    )
+    yield
+    question_metadata_cache.clear()
+
+
+def test_question_bank_filtered_choice(metadata):
+    urls = [f"https://leetcode.com/problems/q{i}/" for i in range(1, 5)]
+    bank = QuestionBank(
+        "test_file", [Question(url, False) for url in urls], datetime.now()
+    )
+
+    assert bank.get_random_question_url(question_filter="hard") == urls[1]
+    with pytest.raises(NoMoreQuestionsInQuestionBankError):
+        bank.get_random_question_url(question_filter="graph")
+
+    assert bank.get_random_question_url(question_filter="array") == urls[0]
+    assert bank.get_random_question_url(question_filter="easy") == urls[2]
+    assert bank.get_unindexed_urls() == [urls[3]]
+    assert bank.get_random_question_url() == urls[3]
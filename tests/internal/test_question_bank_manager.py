@@ -0,0 +1,343 @@
+import asyncio
+import codecs
+from datetime import datetime, timedelta
+
+import pytest
+import pytest_mock
+
+from src.internal.question_bank import Question, QuestionBank
+from src.internal.question_bank_manager import QuestionBankManager
+from src.types.errors import (
+    InvalidQuestionsInQuestionBankError,
+    NoMoreQuestionsInQuestionBankError,
+    QuestionBankDoesNotExistError,
+)
+from src.utils.clock import VirtualClock
+from src.utils.leetcode_client import QuestionMetadata
+import src.internal.question_bank
+import src.internal.question_bank_manager
+
+CSV_TEXT = (
+    "https://leetcode.com/problems/two-sum/,True\r\n"
+    "https://leetcode.com/problems/valid-anagram/,False\r\n"
+    "\r\n"
+    "https://leetcode.com/problems/group-anagrams/\r\n"
+)
+
+
+async def to_chunks(data: bytes, chunk_size: int):
+    for i in range(0, len(data), chunk_size):
+        yield data[i : i + chunk_size]
+
+
+@pytest.mark.asyncio
+@pytest.mark.parametrize(
+    "data",
+    [
+        CSV_TEXT.encode("utf-8"),
+        codecs.BOM_UTF8 + CSV_TEXT.encode("utf-8"),
+        CSV_TEXT.encode("utf-16"),  # Includes BOM
+        CSV_TEXT.encode("utf-32"),
+    ],
+)
+@pytest.mark.parametrize("chunk_size", [1, 3, 7, 1024])
+async def test_stream_to_question_bank(data, chunk_size):
+    bank = await QuestionBankManager._stream_to_question_bank(
+        "bank.csv", to_chunks(data, chunk_size)
+    )
+
+    assert bank.filename == "bank.csv"
+    assert [(q.url, q.posted) for q in bank.questions] == [
+        ("https://leetcode.com/problems/two-sum/", True),
+        ("https://leetcode.com/problems/valid-anagram/", False),
+        ("https://leetcode.com/problems/group-anagrams/", False),
+    ]
+    assert [q.line for q in bank.questions] == [1, 2, 4]  # Line 3 is blank
+
+
+@pytest.mark.asyncio
+async def test_stream_to_question_bank_without_trailing_newline():
+    data = b"https://leetcode.com/problems/two-sum/,True"
+    bank = await QuestionBankManager._stream_to_question_bank(
+        "bank.csv", to_chunks(data, 2)
+    )
+    assert [(q.url, q.posted) for q in bank.questions] == [
+        ("https://leetcode.com/problems/two-sum/", True)
+    ]
+
+
+@pytest.mark.asyncio
+async def test_stream_to_question_bank_size_cap():
+    with pytest.raises(ValueError):
+        await QuestionBankManager._stream_to_question_bank(
+            "bank.csv", to_chunks(CSV_TEXT.encode(), 16), max_bytes=32
+        )
+
+
+@pytest.mark.asyncio
+async def test_stream_to_question_bank_invalid_url():
+    with pytest.raises(ValueError):
+        await QuestionBankManager._stream_to_question_bank(
+            "bank.csv", to_chunks(b"https://example.com/two-sum\n", 4)
+        )
+
+
+@pytest.fixture(scope="function")
+def question_bank_dir(tmp_path, monkeypatch):
+    bank_dir = str(tmp_path) + "/"
+    monkeypatch.setattr(src.internal.question_bank, "QUESTION_BANK_DIR", bank_dir)
+    monkeypatch.setattr(
+        src.internal.question_bank_manager, "QUESTION_BANK_DIR", bank_dir
+    )
+    monkeypatch.setattr(
+        src.internal.question_bank_manager,
+        "QUESTION_BANK_OPTIONS_FILE",
+        str(tmp_path / "options" / "options.json"),
+    )
+    for name in ["a.csv", "b.csv", "c.csv"]:
+        (tmp_path / name).write_text(f"https://leetcode.com/problems/{name}/\n")
+    yield tmp_path
+
+
+@pytest.mark.asyncio
+async def test_load_question_banks_only_indexes(question_bank_dir):
+    manager = QuestionBankManager()
+    await manager.load_question_banks()
+
+    assert sorted(manager.question_bank_index) == ["a.csv", "b.csv", "c.csv"]
+    assert len(manager.question_banks) == 0
+    assert "a.csv" in await manager.get_question_bank_list_text()
+
+    url = await manager.get_random_question_url_from_question_bank("b.csv")
+    assert url == "https://leetcode.com/problems/b.csv/"
+    assert list(manager.question_banks) == ["b.csv"]
+    await asyncio.gather(*manager._pending_writes.values())
+
+
+@pytest.mark.asyncio
+async def test_warm_and_evict_question_banks(question_bank_dir, monkeypatch):
+    monkeypatch.setattr(
+        src.internal.question_bank_manager, "MAX_LOADED_QUESTION_BANKS", 2
+    )
+    manager = QuestionBankManager()
+    await manager.load_question_banks()
+    await manager.warm_question_banks()
+    assert len(manager.question_banks) == 2
+
+    # Posting marks a bank as changed, so it's written out when evicted
+    await manager.get_random_question_url_from_question_bank("a.csv")
+    for name in ["b.csv", "c.csv"]:
+        async with manager._get_bank_lock(name):
+            await manager._get_question_bank(name)
+    await asyncio.gather(*manager._pending_writes.values())
+
+    assert list(manager.question_banks) == ["b.csv", "c.csv"]
+    assert (question_bank_dir / "a.csv").read_text().endswith(",True\n")
+
+
+@pytest.mark.asyncio
+async def test_validate_question_bank_reports_invalid_rows(
+    mocker: pytest_mock.MockerFixture,
+):
+    client = mocker.Mock()
+    client.fetch_question_metadata = mocker.AsyncMock(
+        return_value={"two-sum": mocker.Mock(), "tow-sum": None, "3sum": None}
+    )
+    manager = QuestionBankManager(leetcode_client=client)
+    bank = QuestionBank(
+        "bank.csv",
+        [  # As parsed from a file with a blank second line
+            Question("https://leetcode.com/problems/two-sum/", line=1),
+            Question("https://leetcode.com/problems/tow-sum/", line=3),
+            Question("https://leetcode.com/problems/3sum/description/", line=4),
+        ],
+        datetime.now(),
+    )
+
+    with pytest.raises(InvalidQuestionsInQuestionBankError) as e:
+        await manager._validate_question_bank(bank)
+    assert "Line 3: https://leetcode.com/problems/tow-sum/" in e.value.displayed_msg
+    assert "Line 4: https://leetcode.com/problems/3sum/" in e.value.displayed_msg
+    assert "Line 1" not in e.value.displayed_msg
+
+
+@pytest.mark.asyncio
+async def test_bank_locks_are_independent(question_bank_dir):
+    manager = QuestionBankManager()
+    await manager.load_question_banks()
+
+    async with manager._get_bank_lock("a.csv"):
+        url = await asyncio.wait_for(
+            manager.get_random_question_url_from_question_bank("b.csv"), timeout=1
+        )
+        assert url == "https://leetcode.com/problems/b.csv/"
+        assert "a.csv" in await manager.get_question_bank_list_text()
+
+    data = await manager.get_question_bank_file("b.csv")
+    assert data == b"https://leetcode.com/problems/b.csv/,True\n"
+    await asyncio.gather(*manager._pending_writes.values())
+
+
+@pytest.mark.asyncio
+async def test_question_bank_file_served_from_memory(question_bank_dir):
+    manager = QuestionBankManager()
+    await manager.load_question_banks()
+
+    data = await manager.get_question_bank_file("a.csv")
+    assert data == b"https://leetcode.com/problems/a.csv/,False\n"
+    assert await manager.get_question_bank_file("a.csv") is data  # Not regenerated
+
+    # Changes are persisted separately, and regenerate the download
+    await manager.get_random_question_url_from_question_bank("a.csv")
+    await asyncio.gather(*manager._pending_writes.values())
+    assert (question_bank_dir / "a.csv").read_text().endswith(",True\n")
+    data = await manager.get_question_bank_file("a.csv")
+    assert data == b"https://leetcode.com/problems/a.csv/,True\n"
+
+
+@pytest.mark.asyncio
+async def test_skip_globally_posted(question_bank_dir):
+    shared = "https://leetcode.com/problems/two-sum/"
+    (question_bank_dir / "a.csv").write_text(f"{shared}\n")
+    (question_bank_dir / "b.csv").write_text(
+        f"{shared}description/\nhttps://leetcode.com/problems/3sum/\n"
+    )
+    manager = QuestionBankManager()
+    await manager.load_question_banks()
+    await manager.set_skip_globally_posted("b.csv", True)
+
+    assert await manager.get_random_question_url_from_question_bank("a.csv") == shared
+    assert shared in manager.posted_index
+
+    # Same question under a different url is skipped
+    assert (
+        await manager.get_random_question_url_from_question_bank("b.csv")
+        == "https://leetcode.com/problems/3sum/"
+    )
+    await asyncio.gather(*manager._pending_writes.values())
+
+    # Option is persisted
+    reloaded = QuestionBankManager()
+    await reloaded.load_question_banks()
+    assert reloaded._skip_globally_posted == {"b.csv"}
+
+
+@pytest.mark.asyncio
+async def test_reupload_keeps_posted_state(question_bank_dir, mocker):
+    urls = [f"https://leetcode.com/problems/q{i}/" for i in range(4)]
+    (question_bank_dir / "a.csv").write_text(
+        f"{urls[0]},True\n{urls[1]},False\n{urls[2]},True\n"
+    )
+    manager = QuestionBankManager()
+    await manager.load_question_banks()
+    async with manager._get_bank_lock("a.csv"):
+        in_use = await manager._get_question_bank("a.csv")
+
+    uploaded = QuestionBank(
+        "a.csv",
+        [Question(urls[0]), Question(urls[1]), Question(urls[3])],
+        datetime.now(),
+    )
+    mocker.patch.object(
+        manager, "_get_question_bank_from_attachment", return_value=uploaded
+    )
+    msg = await manager.upload_question_bank(mocker.Mock(size=100))
+
+    assert "Added 1, removed 1, kept 2" in msg
+    assert [(q.url, q.posted) for q in in_use.questions] == [
+        (urls[0], True),
+        (urls[1], False),
+        (urls[3], False),
+    ]
+    await asyncio.gather(*manager._pending_writes.values())
+    assert (question_bank_dir / "a.csv").read_text() == (
+        f"{urls[0]},True\n{urls[1]},False\n{urls[3]},False\n"
+    )
+
+
+@pytest.mark.asyncio
+async def test_filtered_draw_indexes_missing_metadata(
+    question_bank_dir, mocker: pytest_mock.MockerFixture
+):
+    urls = [f"https://leetcode.com/problems/q{i}/" for i in range(2)]
+    (question_bank_dir / "a.csv").write_text(f"{urls[0]}\n{urls[1]}\n")
+
+    async def fetch_question_metadata(slugs):
+        slugs = list(slugs)
+        cache = src.internal.question_bank.question_metadata_cache
+        cache["q0"] = QuestionMetadata("q0", "0", "Q0", "Hard", ())
+        return {slug: cache.get(slug) for slug in slugs}
+
+    client = mocker.Mock()
+    client.fetch_question_metadata = mocker.AsyncMock(
+        side_effect=fetch_question_metadata
+    )
+    manager = QuestionBankManager(leetcode_client=client)
+    await manager.load_question_banks()
+
+    # As after a restart, with nothing indexed
+    try:
+        url = await manager.get_random_question_url_from_question_bank("a.csv", "hard")
+        assert url == urls[0]
+        # q1 doesn't exist, so it isn't looked up again
+        with pytest.raises(NoMoreQuestionsInQuestionBankError):
+            await manager.get_random_question_url_from_question_bank("a.csv", "hard")
+        assert client.fetch_question_metadata.await_count == 1
+    finally:
+        src.internal.question_bank.question_metadata_cache.clear()
+        await asyncio.gather(*manager._pending_writes.values())
+
+
+@pytest.mark.asyncio
+async def test_skip_globally_posted_before_warm(
+    question_bank_dir, mocker: pytest_mock.MockerFixture, monkeypatch
+):
+    shared = "https://leetcode.com/problems/two-sum/"
+    (question_bank_dir / "a.csv").write_text(f"{shared},True\n")
+    (question_bank_dir / "b.csv").write_text(
+        f"{shared}\nhttps://leetcode.com/problems/3sum/\n"
+    )
+    mock_random = mocker.Mock()
+    mock_random.randrange.return_value = 0  # Shared question first
+    monkeypatch.setattr(src.internal.question_bank, "random", mock_random)
+    manager = QuestionBankManager()
+    await manager.load_question_banks()
+    await manager.set_skip_globally_posted("b.csv", True)
+
+    # a.csv isn't loaded yet, its posted question is still skipped
+    assert (
+        await manager.get_random_question_url_from_question_bank("b.csv")
+        == "https://leetcode.com/problems/3sum/"
+    )
+    await asyncio.gather(*manager._pending_writes.values())
+
+
+@pytest.mark.asyncio
+async def test_bank_locks_only_for_existing_banks(question_bank_dir):
+    manager = QuestionBankManager()
+    await manager.load_question_banks()
+
+    with pytest.raises(QuestionBankDoesNotExistError):
+        await manager.get_random_question_url_from_question_bank("typo.csv")
+    assert "typo.csv" not in manager._bank_locks
+
+    await manager.get_question_bank_file("a.csv")
+    assert "a.csv" in manager._bank_locks
+    await manager.delete_question_bank("a.csv")
+    assert "a.csv" not in manager._bank_locks
+    with pytest.raises(QuestionBankDoesNotExistError):
+        await manager.delete_question_bank("a.csv")
+
+
+@pytest.mark.asyncio
+async def test_bank_times_follow_clock(question_bank_dir):
+    clock = VirtualClock(datetime(2025, 6, 30, 9))
+    manager = QuestionBankManager(clock=clock)
+    await manager.load_question_banks()
+
+    clock.advance(timedelta(days=1))
+    await manager.get_random_question_url_from_question_bank("a.csv")
+    await asyncio.gather(*manager._pending_writes.values())
+
+    assert manager.question_banks["a.csv"].last_updated_time == clock.now()
+    assert manager.question_bank_index["a.csv"].last_updated_time == clock.now()
@@ -0,0 +1,75 @@
+from datetime import datetime, time
+
+import pytest
+
+from src.internal.scheduler_store import SchedulerStore
+from src.types.scheduler_specs import CampaignSpec, PostSchedulerSpec
+import src.internal.scheduler_store
+
+
+def make_campaign_spec(id: int = 1) -> CampaignSpec:
+    return CampaignSpec(
+        id=id,
+        question_bank_name="bank",
+        days=[0, 2],
+        time=time(9),
+        length=10,
+        repeats=11,
+        next_date=datetime(2025, 6, 30, 9),
+        question_filters=[(0, "easy"), (None, "arrays")],
+    )
+
+
+@pytest.mark.asyncio
+async def test_save_and_load(tmp_path):
+    path = str(tmp_path / "schedulers.jsonl")
+    store = SchedulerStore(path)
+    campaign = make_campaign_spec()
+    post = PostSchedulerSpec(id=2, url="url", post_date=datetime(2025, 7, 1))
+    await store.save([campaign])
+    await store.save([post])
+
+    # Progress is logged as a delta
+    campaign.repeats = 10
+    campaign.next_date = datetime(2025, 7, 2, 9)
+    campaign.story_history.append("Once upon a time")
+    await store.save([campaign])
+    await store.save([campaign])  # Unchanged, not logged
+    await store.delete(2)
+
+    with open(path) as file:
+        lines = file.readlines()
+    assert len(lines) == 4
+    assert '"op":"progress"' in lines[2] and "story_prompt" not in lines[2]
+
+    assert SchedulerStore(path).load() == [campaign]
+
+
+@pytest.mark.asyncio
+async def test_load_skips_partial_line(tmp_path):
+    path = str(tmp_path / "schedulers.jsonl")
+    store = SchedulerStore(path)
+    await store.save([make_campaign_spec()])
+    with open(path, "a") as file:
+        file.write('{"op":"put","id":2,"sp')  # Crashed mid-write
+
+    assert SchedulerStore(path).load() == [make_campaign_spec()]
+
+
+@pytest.mark.asyncio
+async def test_log_is_compacted(tmp_path, monkeypatch):
+    monkeypatch.setattr(
+        src.internal.scheduler_store, "SCHEDULER_LOG_COMPACT_MIN_RECORDS", 10
+    )
+    path = str(tmp_path / "schedulers.jsonl")
+    store = SchedulerStore(path)
+    specs = [make_campaign_spec(id) for id in range(3)]
+    for i in range(20):
+        for spec in specs:
+            spec.repeats -= 1
+            spec.story_history.append(f"Story {i}")
+            await store.save([spec])
+
+    with open(path) as file:
+        assert len(file.readlines()) <= 10
+    assert SchedulerStore(path).load() == specs
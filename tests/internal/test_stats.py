@@ -0,0 +1,95 @@
+import pytest
+import pytest_asyncio
+
+from src.internal.stats import StatsManager
+
+
+async def make_stats(**kwargs) -> StatsManager:
+    stats = StatsManager(**kwargs)
+    await stats.init(["alice", "bob"])
+    return stats
+
+
+@pytest_asyncio.fixture
+async def stats():
+    return await make_stats()
+
+
+@pytest.mark.asyncio
+async def test_user_stats_are_snapshots(stats: StatsManager):
+    await stats.handle_new_post(1)
+    await stats.log_user_reaction_add("alice", 1, "✅")
+    before = {
+        s.user_name: (s.total_completed, s.streak) for s in await stats.get_user_stats()
+    }
+
+    await stats.log_user_reaction_remove("alice", 1, "✅")
+    await stats.log_user_reaction_add("bob", 1, "✅")
+
+    assert before == {"alice": (1, 1), "bob": (0, 0)}
+    after = {
+        s.user_name: (s.total_completed, s.streak) for s in await stats.get_user_stats()
+    }
+    assert after == {"alice": (0, 0), "bob": (1, 1)}
+
+
+@pytest.mark.asyncio
+async def test_only_complete_emojis_count(stats: StatsManager):
+    await stats.handle_new_post(1)
+    await stats.log_user_reaction_add("alice", 1, "👍")
+    await stats.log_user_reaction_add("bob", 1, "👍")
+    await stats.log_user_reaction_add("bob", 1, "✅")
+    await stats.log_user_reaction_remove("bob", 1, "👍")
+
+    assert await stats.get_num_users_finished_question(1) == (1, 2)
+
+
+@pytest.mark.asyncio
+async def test_old_posts_compacted():
+    stats = await make_stats(retained_posts=2)
+    await stats.handle_new_post(1)
+    await stats.log_user_reaction_add("alice", 1, "✅")
+    await stats.log_user_reaction_add("bob", 1, "👍")
+    await stats.handle_new_post(2)
+    await stats.handle_new_post(3)
+
+    assert list(stats._post_ids) == [2, 3]
+    assert all(1 not in user.reactions for user in stats._users.values())
+    assert await stats.get_num_users_finished_question(1) == (1, 2)
+    totals = {s.user_name: s.total_completed for s in await stats.get_user_stats()}
+    assert totals == {"alice": 1, "bob": 0}
+
+
+@pytest.mark.asyncio
+async def test_late_reactions_to_archived_post():
+    stats = await make_stats(retained_posts=1)
+    await stats.handle_new_post(1)
+    await stats.log_user_reaction_add("alice", 1, "✅")
+    await stats.handle_new_post(2)
+
+    await stats.log_user_reaction_add("bob", 1, "✅")
+    await stats.log_user_reaction_add("bob", 1, "👍")
+    await stats.log_user_reaction_remove("alice", 1, "✅")
+
+    assert await stats.get_num_users_finished_question(1) == (1, 2)
+    by_user = {
+        s.user_name: (s.total_completed, s.streak) for s in await stats.get_user_stats()
+    }
+    assert by_user == {
+        "alice": (0, 1),
+        "bob": (1, 0),
+    }  # Streaks only count the current post
+    assert all(not user.reactions for user in stats._users.values())
+
+
+@pytest.mark.asyncio
+async def test_forgotten_posts_ignored():
+    stats = await make_stats(retained_posts=1, max_archived_posts=1)
+    for post_id in range(1, 4):
+        await stats.handle_new_post(post_id)
+
+    assert list(stats._archived_posts) == [2]
+    await stats.log_user_reaction_add("alice", 1, "✅")
+    assert [s.total_completed for s in await stats.get_user_stats()] == [0, 0]
+    with pytest.raises(RuntimeError):
+        await stats.get_num_users_finished_question(1)
@@ -0,0 +1,170 @@
+import asyncio
+from datetime import datetime
+import subprocess
+import sys
+
+import pytest
+import pytest_asyncio
+
+from src.internal.leetcode_bot_logic import LeetcodeBot
+from src.internal.message_queue import MessageQueue
+from src.internal.scheduler_store import SchedulerStore
+from src.internal.stats import StatsManager
+from src.utils.clock import VirtualClock
+from src.utils.metrics import COMMAND_LATENCY, REACTIONS
+from src.utils.tracing import tracer
+from tests.test_utils.fake_discord import FakeDiscord
+from tests.test_utils.fakes import (
+    FakeChannel,
+    FakeLeetcodeClient,
+    FakeOpenAIClient,
+    FakeQuestionBankManager,
+)
+
+URL = "https://leetcode.com/problems/two-sum/"
+
+
+@pytest_asyncio.fixture(scope="function")
+async def discord(tmp_path):
+    lc_bot = LeetcodeBot(
+        clock=VirtualClock(datetime(2025, 6, 30, 9)),
+        leetcode_client=FakeLeetcodeClient(),
+        openai_client=FakeOpenAIClient(),
+        question_bank_manager=FakeQuestionBankManager(),
+        stats=StatsManager(),
+        message_queue=MessageQueue(rate=1e9, capacity=10**9),
+        scheduler_store=SchedulerStore(str(tmp_path / "schedulers.jsonl")),
+    )
+    async with FakeDiscord(lc_bot, [f"user-{i}" for i in range(2)]) as d:
+        yield d
+
+
+def user(discord: FakeDiscord, i: int) -> str:
+    return list(discord.users)[i]
+
+
+async def post(discord: FakeDiscord) -> int:
+    await discord.command("post", URL)
+    return discord.main_channel.messages[-1].id
+
+
+async def get_stats_text(discord: FakeDiscord) -> str:
+    await discord.command("stats")
+    return discord.bot_channel.messages[-1].content
+
+
+@pytest.mark.asyncio
+async def test_post_command_posts_immediately(discord):
+    await discord.command("post", URL)
+    assert len(discord.main_channel.messages) == 1
+    assert URL in discord.main_channel.messages[0].content
+
+
+@pytest.mark.asyncio
+async def test_reaction_counts_towards_stats(discord):
+    post_id = await post(discord)
+    await discord.react(user(discord, 0), post_id, "✅")
+    await discord.react(user(discord, 1), post_id, "👍")
+
+    text = await get_stats_text(discord)
+    assert f"{user(discord, 0)}: 1" in text
+    assert f"{user(discord, 1)}: 0" in text
+
+
+@pytest.mark.asyncio
+async def test_reaction_remove_undoes_completion(discord):
+    post_id = await post(discord)
+    await discord.react(user(discord, 0), post_id, "✅")
+    await discord.react(user(discord, 0), post_id, "✅", remove=True)
+
+    assert f"{user(discord, 0)}: 0" in await get_stats_text(discord)
+
+
+@pytest.mark.asyncio
+async def test_reaction_in_other_channel_ignored(discord):
+    post_id = await post(discord)
+    await discord.react(user(discord, 0), post_id, "✅", channel=FakeChannel(3))
+
+    assert f"{user(discord, 0)}: 0" in await get_stats_text(discord)
+
+
+@pytest.mark.asyncio
+async def test_removing_other_reaction_keeps_completion(discord):
+    post_id = await post(discord)
+    await discord.react(user(discord, 0), post_id, "✅")
+    await discord.react(user(discord, 0), post_id, "👍")
+    await discord.react(user(discord, 0), post_id, "👍", remove=True)
+    await discord.react(user(discord, 1), post_id, "👍")
+    await discord.react(user(discord, 1), post_id, "👍", remove=True)
+
+    text = await get_stats_text(discord)
+    assert f"{user(discord, 0)}: 1" in text
+    assert f"{user(discord, 1)}: 0" in text
+
+
+@pytest.mark.asyncio
+async def test_diagnostics_command(discord):
+    await discord.command("diagnostics")
+    assert "Event loop lag" in discord.bot_channel.messages[-1].content
+
+
+@pytest.mark.asyncio
+async def test_commands_and_reactions_recorded_in_metrics(discord):
+    num_posts = COMMAND_LATENCY.get_count("post", "ok")
+    num_reactions = REACTIONS.get("add")
+
+    post_id = await post(discord)
+    await discord.react(user(discord, 0), post_id, "✅")
+
+    assert COMMAND_LATENCY.get_count("post", "ok") == num_posts + 1
+    assert REACTIONS.get("add") == num_reactions + 1
+
+
+@pytest.mark.asyncio
+async def test_trace_last_shows_slow_command(discord, monkeypatch):
+    monkeypatch.setattr(tracer, "slow_threshold", 0)
+    monkeypatch.setattr(tracer, "last_slow", None)
+    await post(discord)
+    await discord.command("trace", "last")
+
+    text = discord.bot_channel.messages[-1].content
+    assert "post at" in text
+    assert "LeetcodeBot.handle_post_command" in text
+    assert "PostGenerator.generate" in text
+    assert "LeetcodeBot.send" in text
+
+
+@pytest.mark.asyncio
+async def test_trace_unknown(discord):
+    await discord.command("trace", "first")
+    assert "Unknown trace first" in discord.bot_channel.messages[-1].content
+
+
+@pytest.mark.asyncio
+async def test_profile_cpu_posts_attachment(discord):
+    await discord.command("profileCpu", 0.1)
+    assert "Profiling CPU for" in discord.bot_channel.messages[-1].content
+
+    await discord.command("profileMemory", 0.1)
+    assert "already running" in discord.bot_channel.messages[-1].content
+
+    await asyncio.gather(*discord.lc_bot.background_tasks)
+    message = discord.bot_channel.messages[-1]
+    assert "CPU profile of the event loop" in message.content
+    assert message.file.filename == "cpu_profile.folded"
+
+
+@pytest.mark.asyncio
+async def test_profile_duration_limited(discord):
+    await discord.command("profileMemory", 10_000)
+    assert "Profile duration" in discord.bot_channel.messages[-1].content
+    assert not discord.lc_bot.background_tasks
+
+
+def test_import_skips_heavy_modules():
+    # Fresh interpreter, other tests import these
+    code = "import sys, src.bot; print(sorted({'openai', 'boto3', 'requests', 'pytz'} & set(sys.modules)))"
+    output = subprocess.run(
+        [sys.executable, "-c", code], capture_output=True, text=True, check=True
+    ).stdout
+    assert output.strip() == "[]"
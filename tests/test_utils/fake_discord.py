@@ -0,0 +1,119 @@
+import itertools
+from dataclasses import dataclass, field
+from typing import Any, Dict, List, Optional
+
+from src.internal.leetcode_bot_logic import LeetcodeBot
+import src.bot
+from tests.test_utils.fakes import FakeChannel
+
+
+@dataclass
+class FakeUser:
+    id: int
+    name: str
+    bot: bool = False
+
+
+@dataclass
+class FakeRawReactionEvent:
+    """
+    Fields of discord.RawReactionActionEvent that the handlers use
+    """
+
+    user_id: int
+    message_id: int
+    channel_id: int
+    emoji: str
+    member: Optional[FakeUser] = None  # Only sent for reaction adds
+
+
+@dataclass
+class FakeCommandMessage:
+    attachments: List[Any] = field(default_factory=list)
+
+
+@dataclass
+class FakeContext:
+    channel: FakeChannel
+    author: FakeUser
+    message: FakeCommandMessage = field(default_factory=FakeCommandMessage)
+
+
+class FakeDiscord:
+    """
+    Stands in for the discord connection, driving the handlers in src/bot.py in process.
+    Use as an async context manager, the bot module uses lc_bot while inside.
+    """
+
+    def __init__(self, lc_bot: LeetcodeBot, members: List[str]):
+        self.lc_bot = lc_bot
+        self.main_channel = FakeChannel(1)
+        self.bot_channel = FakeChannel(2)
+        self._user_ids = itertools.count(1000)
+        self.users: Dict[str, FakeUser] = {}
+        for name in members:
+            self.add_user(name)
+        self._previous: tuple = ()
+
+    async def __aenter__(self) -> "FakeDiscord":
+        self._previous = (
+            src.bot.lc_bot,
+            src.bot.BOT_CHANNEL_ID,
+            src.bot.MAIN_CHANNEL_ID,
+        )
+        src.bot.lc_bot = self.lc_bot
+        src.bot.BOT_CHANNEL_ID = self.bot_channel.id
+        src.bot.MAIN_CHANNEL_ID = self.main_channel.id
+
+        # What on_ready does, without a guild to fetch members from
+        for user in self.users.values():
+            src.bot.user_names[user.id] = user.name
+        await self.lc_bot.init(
+            self.main_channel,
+            self.bot_channel,
+            [user.name for user in self.users.values() if not user.bot],
+        )
+        return self
+
+    async def __aexit__(self, *exc_info):
+        src.bot.lc_bot, src.bot.BOT_CHANNEL_ID, src.bot.MAIN_CHANNEL_ID = self._previous
+        src.bot.user_names.clear()
+
+    def add_user(self, name: str, bot: bool = False) -> FakeUser:
+        user = FakeUser(next(self._user_ids), name, bot)
+        self.users[name] = user
+        return user
+
+    async def react(
+        self,
+        user_name: str,
+        message_id: int,
+        emoji: str,
+        remove: bool = False,
+        channel: Optional[FakeChannel] = None,
+    ):
+        user = self.users[user_name]
+        event = FakeRawReactionEvent(
+            user_id=user.id,
+            message_id=message_id,
+            channel_id=(channel or self.main_channel).id,
+            emoji=emoji,
+            member=None if remove else user,
+        )
+        if remove:
+            await src.bot.on_raw_reaction_remove(event)
+        else:
+            await src.bot.on_raw_reaction_add(event)
+
+    async def command(
+        self, name: str, *args, user_name: Optional[str] = None, **kwargs
+    ):
+        """
+        Runs a command as if sent in the bot channel, args are already converted
+        """
+        author = self.users[user_name] if user_name else next(iter(self.users.values()))
+        ctx = FakeContext(self.bot_channel, author)
+        command = src.bot.bot.get_command(name)
+        assert command is not None, f"No command {name}"
+        assert src.bot.validate_channel(ctx)
+        await command.callback(ctx, *args, **kwargs)
@@ -0,0 +1,287 @@
+"""
+Local stand-ins for the LeetCode GraphQL and OpenAI responses endpoints, with injectable latency, errors and throttling.
+Point the clients at them with the LEETCODE_GRAPHQL_URL and OPENAI_BASE_URL env vars, or their base_url params.
+
+Usage: python -m tests.test_utils.fake_servers --latency-ms 200 --error-rate 0.05
+"""
+
+import argparse
+import asyncio
+import itertools
+import random
+import re
+import threading
+import time
+import zlib
+from dataclasses import dataclass
+from typing import Optional, Set
+
+from aiohttp import web
+
+DIFFICULTIES = ["Easy", "Medium", "Hard"]
+TOPICS = ["array", "string", "hash-table", "dynamic-programming", "graph", "tree"]
+
+# alias: question(titleSlug: $var), the alias is absent for single question queries
+QUESTION_FIELD_PATTERN = re.compile(
+    r"(?:(\w+)\s*:\s*)?question\(titleSlug:\s*\$(\w+)\)"
+)
+
+
+@dataclass
+class FaultInjection:
+    latency: float = 0.0  # seconds, added to every request
+    jitter: float = 0.0  # seconds, uniform extra latency up to this
+    error_rate: float = 0.0  # Fraction of requests failed with a 500
+    rate_limit: Optional[float] = (
+        None  # requests per second, above which requests get a 429
+    )
+    burst: int = 1  # Requests allowed at once before rate limiting
+
+
+class FakeServer:
+    """
+    Serves an aiohttp app on localhost, applying fault injection to every request
+    """
+
+    def __init__(self, faults: Optional[FaultInjection] = None, seed: int = 0):
+        self.faults = faults or FaultInjection()
+        self.rng = random.Random(seed)
+        self.num_requests = 0
+        self.num_errors = 0
+        self.num_throttled = 0
+        self._tokens = float(self.faults.burst)
+        self._last_refill = time.monotonic()
+        self._runner: Optional[web.AppRunner] = None
+        self.port: Optional[int] = None
+
+    def _routes(self) -> list:
+        raise NotImplementedError()
+
+    @property
+    def base_url(self) -> str:
+        return f"http://127.0.0.1:{self.port}"
+
+    async def start(self, port: int = 0):
+        app = web.Application(middlewares=[self._fault_middleware])
+        app.add_routes(self._routes())
+        self._runner = web.AppRunner(app)
+        await self._runner.setup()
+        site = web.TCPSite(self._runner, "127.0.0.1", port)
+        await site.start()
+        self.port = site._server.sockets[0].getsockname()[1]  # Picked by the OS if 0
+
+    async def stop(self):
+        if self._runner:
+            await self._runner.cleanup()
+
+    async def __aenter__(self):
+        await self.start()
+        return self
+
+    async def __aexit__(self, *exc_info):
+        await self.stop()
+
+    def _take_token(self) -> bool:
+        if self.faults.rate_limit is None:
+            return True
+        now = time.monotonic()
+        self._tokens = min(
+            self.faults.burst,
+            self._tokens + (now - self._last_refill) * self.faults.rate_limit,
+        )
+        self._last_refill = now
+        if self._tokens < 1:
+            return False
+        self._tokens -= 1
+        return True
+
+    @web.middleware
+    async def _fault_middleware(self, request: web.Request, handler):
+        self.num_requests += 1
+        if not self._take_token():
+            self.num_throttled += 1
+            retry_after = (1 - self._tokens) / self.faults.rate_limit
+            return web.json_response(
+                {"error": {"message": "Rate limited", "type": "rate_limit_error"}},
+                status=429,
+                headers={"Retry-After": f"{retry_after:.3f}"},
+            )
+
+        await asyncio.sleep(
+            self.faults.latency + self.rng.uniform(0, self.faults.jitter)
+        )
+
+        if self.rng.random() < self.faults.error_rate:
+            self.num_errors += 1
+            return web.json_response(
+                {"error": {"message": "Injected error", "type": "server_error"}},
+                status=500,
+            )
+        return await handler(request)
+
+
+def get_fake_question(slug: str) -> dict:
+    """
+    Deterministic question fields for any slug, a superset of what LeetcodeClient queries
+    """
+    slug_hash = zlib.crc32(slug.encode())
+    id = str(slug_hash % 3000 + 1)
+    return {
+        "questionId": id,
+        "questionFrontendId": id,
+        "title": slug.replace("-", " ").title(),
+        "titleSlug": slug,
+        "isPaidOnly": False,
+        "difficulty": DIFFICULTIES[slug_hash % len(DIFFICULTIES)],
+        "likes": slug_hash % 10000,
+        "dislikes": slug_hash % 1000,
+        "topicTags": [{"slug": TOPICS[slug_hash % len(TOPICS)]}],
+        "content": f"<p>Description of <code>{slug}</code>.</p>",
+        "mysqlSchemas": [],
+    }
+
+
+class FakeLeetcodeServer(FakeServer):
+    """
+    Answers question(titleSlug) queries, aliased or not, for any slug not in missing_slugs
+    """
+
+    def __init__(self, *args, missing_slugs: Optional[Set[str]] = None, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.missing_slugs = missing_slugs or set()
+
+    @property
+    def graphql_url(self) -> str:
+        return f"{self.base_url}/graphql/"
+
+    def _routes(self) -> list:
+        return [web.post("/graphql/", self._graphql)]
+
+    async def _graphql(self, request: web.Request) -> web.Response:
+        body = await request.json()
+        variables = body.get("variables") or {}
+        data = {}
+        for alias, var in QUESTION_FIELD_PATTERN.findall(body.get("query", "")):
+            slug = variables.get(var)
+            data[alias or "question"] = (
+                None
+                if slug is None or slug in self.missing_slugs
+                else get_fake_question(slug)
+            )
+        return web.json_response({"data": data})
+
+
+class FakeOpenAIServer(FakeServer):
+    """
+    Answers the responses endpoint with a canned completion
+    """
+
+    def __init__(self, *args, output_text: str = "Once upon a time...", **kwargs):
+        super().__init__(*args, **kwargs)
+        self.output_text = output_text
+        self._ids = itertools.count(1)
+
+    @property
+    def openai_base_url(self) -> str:
+        return f"{self.base_url}/v1"
+
+    def _routes(self) -> list:
+        return [web.post("/v1/responses", self._responses)]
+
+    async def _responses(self, request: web.Request) -> web.Response:
+        body = await request.json()
+        id = next(self._ids)
+        return web.json_response(
+            {
+                "id": f"resp_{id}",
+                "object": "response",
+                "created_at": int(time.time()),
+                "model": body.get("model", "fake"),
+                "status": "completed",
+                "output": [
+                    {
+                        "type": "message",
+                        "id": f"msg_{id}",
+                        "status": "completed",
+                        "role": "assistant",
+                        "content": [
+                            {
+                                "type": "output_text",
+                                "text": self.output_text,
+                                "annotations": [],
+                            }
+                        ],
+                    }
+                ],
+                "parallel_tool_calls": True,
+                "tool_choice": "auto",
+                "tools": [],
+            }
+        )
+
+
+class ServerThread:
+    """
+    Runs servers on their own event loop in a thread, so clients that block the caller's loop still get answers
+    """
+
+    def __init__(self, *servers: FakeServer):
+        self.servers = servers
+        self._loop = asyncio.new_event_loop()
+        self._thread = threading.Thread(target=self._loop.run_forever, daemon=True)
+
+    def __enter__(self) -> "ServerThread":
+        self._thread.start()
+        self._run(self._start_all())
+        return self
+
+    def __exit__(self, *exc_info):
+        self._run(self._stop_all())
+        self._loop.call_soon_threadsafe(self._loop.stop)
+        self._thread.join()
+        self._loop.close()
+
+    async def _start_all(self):
+        await asyncio.gather(*[server.start() for server in self.servers])
+
+    async def _stop_all(self):
+        await asyncio.gather(*[server.stop() for server in self.servers])
+
+    def _run(self, coro):
+        return asyncio.run_coroutine_threadsafe(coro, self._loop).result()
+
+
+async def _serve(args: argparse.Namespace):
+    faults = FaultInjection(
+        latency=args.latency_ms / 1000,
+        jitter=args.jitter_ms / 1000,
+        error_rate=args.error_rate,
+        rate_limit=args.rate_limit,
+        burst=args.burst,
+    )
+    leetcode, openai = FakeLeetcodeServer(faults), FakeOpenAIServer(faults)
+    await leetcode.start(args.leetcode_port)
+    await openai.start(args.openai_port)
+    print(f"LEETCODE_GRAPHQL_URL={leetcode.graphql_url}")
+    print(f"OPENAI_BASE_URL={openai.openai_base_url}")
+    try:
+        await asyncio.Event().wait()
+    finally:
+        await leetcode.stop()
+        await openai.stop()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--leetcode-port", type=int, default=8081)
+    parser.add_argument("--openai-port", type=int, default=8082)
+    parser.add_argument("--latency-ms", type=float, default=0)
+    parser.add_argument("--jitter-ms", type=float, default=0)
+    parser.add_argument("--error-rate", type=float, default=0)
+    parser.add_argument("--rate-limit", type=float, default=None)
+    parser.add_argument("--burst", type=int, default=1)
+    asyncio.run(_serve(parser.parse_args()))
+
+
+if __name__ == "__main__":
+    main()
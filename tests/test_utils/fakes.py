@@ -0,0 +1,101 @@
+import itertools
+import zlib
+from dataclasses import dataclass
+from typing import Any, Dict, Iterable, List, Optional
+
+from src.utils.leetcode_client import QuestionData, QuestionMetadata, get_slug_from_url
+
+DIFFICULTIES = ["Easy", "Medium", "Hard"]
+
+
+def _stable_hash(text: str) -> int:
+    return zlib.crc32(text.encode())
+
+
+@dataclass
+class FakeMessage:
+    id: int
+    content: str
+    file: Optional[Any] = None  # discord.File attachment
+
+
+class FakeChannel:
+    """
+    Stands in for a discord TextChannel, records what was sent
+    """
+
+    _message_ids = itertools.count(1)  # Unique across channels, like discord
+
+    def __init__(self, id: int):
+        self.id = id
+        self.messages: List[FakeMessage] = []
+
+    async def send(self, content: str, **kwargs) -> FakeMessage:
+        message = FakeMessage(next(self._message_ids), content, kwargs.get("file"))
+        self.messages.append(message)
+        return message
+
+
+class FakeLeetcodeClient:
+    def __init__(self):
+        self.num_scrapes = 0
+
+    def scrape_question(self, url: str) -> QuestionData:
+        self.num_scrapes += 1
+        slug = get_slug_from_url(url)
+        return QuestionData(
+            _stable_hash(slug) % 3000,
+            slug.replace("-", " ").title(),
+            f"Description of {slug}",
+            DIFFICULTIES[_stable_hash(slug) % 3],
+            url,
+        )
+
+    async def fetch_question_metadata(
+        self, slugs: Iterable[str], *args
+    ) -> Dict[str, Optional[QuestionMetadata]]:
+        return {
+            slug: QuestionMetadata(
+                slug, "0", slug, DIFFICULTIES[_stable_hash(slug) % 3]
+            )
+            for slug in slugs
+        }
+
+
+class FakeOpenAIClient:
+    def __init__(self):
+        self.num_generations = 0
+
+    def generate(self, inputs, bypass_cache: bool = False) -> str:
+        self.num_generations += 1
+        return f"Story part {self.num_generations}"
+
+
+class FakeQuestionBankManager:
+    """
+    Question banks that never run out, kept in memory
+    """
+
+    def __init__(self):
+        self._counters: Dict[str, itertools.count] = {}
+
+    async def load_question_banks(self):
+        pass
+
+    async def warm_question_banks(self):
+        pass
+
+    async def _assert_question_bank_exists(self, question_bank_name: str):
+        self._counters.setdefault(question_bank_name, itertools.count())
+
+    async def index_question_metadata(self, question_bank_name: str):
+        pass
+
+    async def get_random_question_url_from_question_bank(
+        self, question_bank_name: str, question_filter: Optional[str] = None
+    ) -> str:
+        i = next(self._counters[question_bank_name])
+        return f"https://leetcode.com/problems/{question_bank_name}-{i}/"
+
+    async def get_question_bank_list_text(self) -> str:
+        return "\n".join(self._counters) or "No question banks"
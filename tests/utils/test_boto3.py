@@ -0,0 +1,40 @@
+import threading
+
+import pytest
+
+import src.utils.boto3 as ssm
+
+
+@pytest.fixture(autouse=True)
+def no_cached_secrets(monkeypatch):
+    monkeypatch.setattr(ssm, "_futures", {})
+
+
+def test_prefetch_fetches_concurrently(monkeypatch):
+    barrier = threading.Barrier(2, timeout=5)
+
+    def fetch(id: str) -> str:
+        barrier.wait()  # Both fetches must be in flight at once
+        return f"value of {id}"
+
+    monkeypatch.setattr(ssm, "_fetch_from_ssm", fetch)
+    ssm.prefetch_from_ssm("BOT_TOKEN", "OPENAI_API_KEY")
+    assert ssm.get_from_ssm("BOT_TOKEN") == "value of BOT_TOKEN"
+    assert ssm.get_from_ssm("OPENAI_API_KEY") == "value of OPENAI_API_KEY"
+
+
+def test_failed_fetch_retried(monkeypatch):
+    calls = []
+
+    def fetch(id: str) -> str:
+        calls.append(id)
+        if len(calls) == 1:
+            raise RuntimeError("throttled")
+        return "value"
+
+    monkeypatch.setattr(ssm, "_fetch_from_ssm", fetch)
+    with pytest.raises(RuntimeError):
+        ssm.get_from_ssm("BOT_TOKEN")
+    assert ssm.get_from_ssm("BOT_TOKEN") == "value"
+    assert ssm.get_from_ssm("BOT_TOKEN") == "value"
+    assert len(calls) == 2
@@ -0,0 +1,93 @@
+import pytest
+
+import src.utils.leetcode_client
+from src.utils.leetcode_client import (
+    LeetcodeClient,
+    QuestionMetadata,
+    get_slug_from_url,
+)
+from tests.test_utils.fake_servers import FakeLeetcodeServer, ServerThread
+
+
+@pytest.fixture(scope="function", autouse=True)
+def empty_metadata_cache():
+    src.utils.leetcode_client.question_metadata_cache.clear()
+    yield
+    src.utils.leetcode_client.question_metadata_cache.clear()
+
+
+def fake_graphql(requests: list):
+    async def post_graphql(session, query, variables):
+        requests.append(variables)
+        return {
+            "data": {
+                f"q{key[1:]}": None
+                if slug.startswith("bad")
+                else {
+                    "questionFrontendId": "1",
+                    "title": slug.title(),
+                    "titleSlug": slug,
+                    "difficulty": "Easy",
+                }
+                for key, slug in variables.items()
+            }
+        }
+
+    return post_graphql
+
+
+def test_get_slug_from_url():
+    assert (
+        get_slug_from_url("https://leetcode.com/problems/two-sum/description/")
+        == "two-sum"
+    )
+    assert get_slug_from_url("https://leetcode.com/problems/two-sum") == "two-sum"
+
+
+@pytest.mark.asyncio
+async def test_fetch_question_metadata_batches(monkeypatch):
+    client = LeetcodeClient()
+    requests = []
+    monkeypatch.setattr(client, "_post_graphql", fake_graphql(requests))
+
+    slugs = [f"slug-{i}" for i in range(5)] + ["bad-slug", "slug-0"]
+    res = await client.fetch_question_metadata(slugs, batch_size=2)
+
+    assert len(requests) == 3  # 6 unique slugs, 2 per request
+    assert res["bad-slug"] is None
+    assert res["slug-3"] == QuestionMetadata("slug-3", "1", "Slug-3", "Easy")
+    assert "slug-3" in src.utils.leetcode_client.question_metadata_cache
+    assert "bad-slug" not in src.utils.leetcode_client.question_metadata_cache
+
+    # Cached slugs aren't requested again
+    await client.fetch_question_metadata(["slug-1", "slug-2"])
+    assert len(requests) == 3
+
+
+@pytest.fixture(scope="module")
+def leetcode_server():
+    server = FakeLeetcodeServer(missing_slugs={"bad-slug"})
+    with ServerThread(server):
+        yield server
+
+
+def test_scrape_question_from_base_url(leetcode_server):
+    client = LeetcodeClient(base_url=leetcode_server.graphql_url)
+    question = client.scrape_question("https://leetcode.com/problems/two-sum/")
+    assert question.title == "Two Sum"
+    assert question.desc == "Description of two-sum."
+    assert "two-sum" in src.utils.leetcode_client.question_metadata_cache
+
+
+@pytest.mark.asyncio
+async def test_fetch_question_metadata_from_base_url(leetcode_server):
+    client = LeetcodeClient(base_url=leetcode_server.graphql_url)
+    res = await client.fetch_question_metadata(["two-sum", "bad-slug"], batch_size=1)
+    assert res["two-sum"].title == "Two Sum"
+    assert res["two-sum"].topics
+    assert res["bad-slug"] is None
+
+
+def test_base_url_from_env(monkeypatch):
+    monkeypatch.setenv("LEETCODE_GRAPHQL_URL", "http://127.0.0.1:1/graphql/")
+    assert LeetcodeClient().base_url == "http://127.0.0.1:1/graphql/"
@@ -0,0 +1,106 @@
+import io
+import json
+import logging
+import queue
+import threading
+
+from src.utils.logging_pipeline import (
+    JsonFormatter,
+    LogQueueHandler,
+    SamplingFilter,
+    TextFormatter,
+    setup_logging,
+    truncate,
+)
+
+
+def make_record(msg: str, name: str = "test", level: int = logging.INFO, **extra):
+    record = logging.LogRecord(name, level, __file__, 1, msg, None, None)
+    for key, value in extra.items():
+        setattr(record, key, value)
+    return record
+
+
+def test_truncate():
+    assert truncate("short", 10) == "short"
+    assert truncate("x" * 15, 10) == "x" * 10 + "... (5 more chars)"
+    assert truncate([1, 2], 10) == "[1, 2]"
+
+
+def test_json_formatter_truncates_extras():
+    record = make_record("Sent", body="y" * 50, num_parts=2)
+    data = json.loads(JsonFormatter(max_chars=10).format(record))
+    assert data["message"] == "Sent"
+    assert data["logger"] == "test"
+    assert data["level"] == "INFO"
+    assert data["body"] == "y" * 10 + "... (40 more chars)"
+    assert data["num_parts"] == 2
+
+
+def test_text_formatter_appends_extras():
+    record = make_record("z" * 20, story="once upon a time")
+    text = TextFormatter(max_chars=10).format(record)
+    assert (
+        text
+        == "INFO:test:"
+        + "z" * 10
+        + "... (10 more chars) story=once upon ... (6 more chars)"
+    )
+
+
+def test_sampling_keeps_fraction_of_child_loggers():
+    log_filter = SamplingFilter(sample_rates={"src.internal": 0.25}, rate_limits={})
+    kept = [
+        log_filter.filter(make_record("reaction", "src.internal.stats"))
+        for _ in range(8)
+    ]
+    assert kept == [True, False, False, False, True, False, False, False]
+    assert log_filter.filter(make_record("other", "src.utils.text"))
+
+
+def test_rate_limit_notes_dropped_and_keeps_warnings():
+    log_filter = SamplingFilter(sample_rates={}, rate_limits={"stats": (1e-9, 2)})
+    assert log_filter.filter(make_record("a", "stats"))
+    assert log_filter.filter(make_record("b", "stats"))
+    assert not log_filter.filter(make_record("c", "stats"))
+    assert not log_filter.filter(make_record("d", "stats"))
+
+    warning = make_record("e", "stats", logging.WARNING)
+    assert log_filter.filter(warning)
+
+    log_filter._buckets["stats"].tokens = 1
+    record = make_record("f", "stats")
+    assert log_filter.filter(record)
+    assert record.num_dropped == 2
+
+
+def test_queue_handler_drops_when_full():
+    handler = LogQueueHandler(queue.Queue(1))
+    handler.handle(make_record("a"))
+    handler.handle(make_record("b"))
+    assert handler.num_dropped == 1
+
+
+def test_setup_logging_writes_on_listener_thread():
+    stream = io.StringIO()
+    root = logging.getLogger()
+    previous_handlers, previous_level = root.handlers[:], root.level
+    written_from = []
+
+    class RecordingStream(io.StringIO):
+        def write(self, text):
+            written_from.append(threading.current_thread().name)
+            return stream.write(text)
+
+    listener = setup_logging(logging.INFO, json_output=True, stream=RecordingStream())
+    try:
+        logging.getLogger("pipeline").info("hello %s", "world", extra={"n": 1})
+    finally:
+        listener.stop()
+        root.handlers[:] = previous_handlers
+        root.setLevel(previous_level)
+
+    data = json.loads(stream.getvalue().splitlines()[0])
+    assert data["message"] == "hello world"
+    assert data["n"] == 1
+    assert threading.main_thread().name not in written_from
@@ -0,0 +1,50 @@
+import asyncio
+import time
+
+import pytest
+
+from src.utils.loop_watchdog import LoopWatchdog
+from src.utils.text import get_diagnostics_text
+
+
+def block_the_loop(seconds: float):
+    time.sleep(seconds)
+
+
+@pytest.mark.asyncio
+async def test_blocking_call_site_reported():
+    watchdog = LoopWatchdog(threshold=0.05, interval=0.01)
+    watchdog.start()
+    try:
+        await asyncio.sleep(0.05)
+        block_the_loop(0.3)
+        await asyncio.sleep(0.05)
+    finally:
+        watchdog.stop()
+
+    assert watchdog.max_lag >= 0.25
+    assert watchdog.num_stalls == 1
+    [offender] = watchdog.get_offenders(5)
+    assert "tests/utils/test_loop_watchdog.py" in offender.site
+    assert offender.site.endswith("in block_the_loop")
+    assert offender.num_stalls == 1
+    assert 0.1 < offender.blocked_time < 0.4
+    assert "block_the_loop" in offender.stack
+
+    text = get_diagnostics_text(watchdog.get_stats_text(), watchdog.get_offenders(5))
+    assert "1. tests/utils/test_loop_watchdog.py" in text
+
+
+@pytest.mark.asyncio
+async def test_no_stalls_when_not_blocked():
+    watchdog = LoopWatchdog(threshold=0.05, interval=0.01)
+    watchdog.start()
+    try:
+        await asyncio.sleep(0.1)
+    finally:
+        watchdog.stop()
+
+    assert watchdog.lags
+    assert watchdog.num_stalls == 0
+    assert watchdog.get_offenders(5) == []
+    assert "Nothing has blocked" in get_diagnostics_text(watchdog.get_stats_text(), [])
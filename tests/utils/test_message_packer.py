@@ -0,0 +1,54 @@
+import pytest
+
+from src.utils.message_packer import pack_message
+
+
+def test_short_message_is_not_split():
+    assert pack_message("a\nb", limit=10) == ["a\nb"]
+
+
+@pytest.mark.parametrize(
+    "text, limit, expected",
+    [
+        ("aaa\nbbb\nccc", 7, ["aaa\nbbb", "ccc"]),
+        ("aaa\nbbb\nccc\nd", 8, ["aaa\nbbb", "ccc\nd"]),
+        ("a" * 20, 16, ["a" * 16, "a" * 4]),
+        ("bb\n" + "a" * 20, 16, ["bb\n" + "a" * 13, "a" * 7]),
+    ],
+)
+def test_splits_at_line_boundaries(text, limit, expected):
+    assert pack_message(text, limit) == expected
+
+
+def test_all_parts_within_limit_and_lossless():
+    lines = [f"user{i}: {i * 7}" for i in range(1000)]
+    text = "\n".join(lines)
+    parts = pack_message(text, limit=2000)
+
+    assert all(len(part) <= 2000 for part in parts)
+    assert "\n".join(parts) == text
+    assert len(parts) == len(text) // 2000 + 1  # Fewest possible
+
+
+def test_long_line_split_without_added_newlines():
+    text = "a" * 5000
+    parts = pack_message(text, limit=2000)
+
+    assert [len(part) for part in parts] == [2000, 2000, 1000]
+    assert "".join(parts) == text
+
+
+def test_reopens_code_blocks_with_language():
+    text = "intro\n```py\n" + "\n".join(["x" * 10] * 5) + "\n```\noutro"
+    parts = pack_message(text, limit=30)
+
+    assert all(len(part) <= 30 for part in parts)
+    for part in parts:
+        assert part.count("```") % 2 == 0
+    for part in parts[1:-1]:
+        assert part.startswith("```py\n")
+
+
+def test_limit_too_small_for_code_block():
+    with pytest.raises(ValueError):
+        pack_message("```python\n" + "x" * 20, limit=12)
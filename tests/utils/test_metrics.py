@@ -0,0 +1,80 @@
+import asyncio
+
+import aiohttp
+import pytest
+
+from src.utils.metrics import (
+    LOCK_WAIT,
+    Counter,
+    Histogram,
+    InstrumentedLock,
+    MetricsRegistry,
+    start_metrics_server,
+)
+
+
+def test_counter_render():
+    counter = Counter("reactions_total", "Reactions", ["action"])
+    counter.inc("add")
+    counter.inc("add")
+    counter.inc("remove", amount=0.5)
+    assert counter.render() == [
+        "# HELP reactions_total Reactions",
+        "# TYPE reactions_total counter",
+        'reactions_total{action="add"} 2',
+        'reactions_total{action="remove"} 0.5',
+    ]
+
+
+def test_histogram_buckets_are_cumulative():
+    histogram = Histogram("latency_seconds", "Latency", ["command"], buckets=[0.1, 1])
+    histogram.observe(0.05, "post")
+    histogram.observe(0.1, "post")  # Upper bounds are inclusive
+    histogram.observe(5, "post")
+    assert histogram.render()[2:] == [
+        'latency_seconds_bucket{command="post",le="0.1"} 2',
+        'latency_seconds_bucket{command="post",le="1"} 2',
+        'latency_seconds_bucket{command="post",le="+Inf"} 3',
+        'latency_seconds_sum{command="post"} 5.15',
+        'latency_seconds_count{command="post"} 3',
+    ]
+
+
+def test_label_values_escaped():
+    counter = Counter("errors_total", "Errors", ["msg"])
+    counter.inc('say "hi"\n')
+    assert counter.render()[-1] == 'errors_total{msg="say \\"hi\\"\\n"} 1'
+
+
+@pytest.mark.asyncio
+async def test_instrumented_lock_records_waits():
+    lock = InstrumentedLock("test_lock")
+    count = LOCK_WAIT.get_count("test_lock")
+
+    async def wait_for_lock():
+        async with lock:
+            pass
+
+    async with lock:
+        waiter = asyncio.create_task(wait_for_lock())
+        await asyncio.sleep(0.05)
+    await waiter
+
+    assert LOCK_WAIT.get_count("test_lock") == count + 2
+    series = LOCK_WAIT._series[("test_lock",)]
+    assert series.sum >= 0.05
+
+
+@pytest.mark.asyncio
+async def test_metrics_server():
+    registry = MetricsRegistry()
+    registry.counter("things_total", "Things").inc()
+    runner = await start_metrics_server(0, registry, host="127.0.0.1")
+    try:
+        port = runner.addresses[0][1]
+        async with aiohttp.ClientSession() as session:
+            async with session.get(f"http://127.0.0.1:{port}/metrics") as response:
+                assert response.status == 200
+                assert "things_total 1" in await response.text()
+    finally:
+        await runner.cleanup()
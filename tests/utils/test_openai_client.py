@@ -0,0 +1,43 @@
+import openai
+import pytest
+
+from src.utils.openai_client import OpenAIClient
+from src.utils.response_cache import ResponseCache
+from tests.test_utils.fake_servers import (
+    FakeOpenAIServer,
+    FaultInjection,
+    ServerThread,
+)
+
+
+def make_client(server: FakeOpenAIServer, tmp_path) -> OpenAIClient:
+    client = OpenAIClient(
+        ResponseCache(str(tmp_path)),
+        base_url=server.openai_base_url,
+        api_key="fake",
+    )
+    client.client = client.client.with_options(max_retries=0)
+    return client
+
+
+def test_generate_from_base_url(tmp_path):
+    server = FakeOpenAIServer(output_text="A story")
+    with ServerThread(server):
+        client = make_client(server, tmp_path)
+        assert client.generate("prompt") == "A story"
+        assert client.generate("prompt") == "A story"  # Cached
+    assert server.num_requests == 1
+
+
+@pytest.mark.parametrize(
+    "faults, error",
+    [
+        (FaultInjection(error_rate=1), openai.InternalServerError),
+        (FaultInjection(rate_limit=1e-6, burst=0), openai.RateLimitError),
+    ],
+)
+def test_generate_injected_faults(tmp_path, faults, error):
+    server = FakeOpenAIServer(faults)
+    with ServerThread(server):
+        with pytest.raises(error):
+            make_client(server, tmp_path).generate("prompt")
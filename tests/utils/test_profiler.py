@@ -0,0 +1,50 @@
+import asyncio
+import time
+
+import pytest
+
+from src.utils.profiler import profile_cpu, profile_memory
+from src.utils.text import get_cpu_profile_text, get_memory_profile_text
+
+
+def spin(seconds: float):
+    end = time.perf_counter() + seconds
+    while time.perf_counter() < end:
+        pass
+
+
+@pytest.mark.asyncio
+async def test_cpu_profile_finds_busy_function():
+    async def busy():
+        await asyncio.sleep(0.05)
+        spin(0.2)
+
+    task = asyncio.create_task(busy())
+    profile = await profile_cpu(0.4, interval=0.002)
+    await task
+
+    top = profile.get_top(3)
+    assert top[0].function.startswith("spin (tests/utils/test_profiler.py")
+    assert top[0].self_samples >= 10
+    assert profile.num_idle_samples > 0  # Waiting out the rest of the capture
+    assert "spin (tests/utils/test_profiler.py" in profile.get_folded_text()
+    assert "1. spin" in get_cpu_profile_text(profile, 3)
+
+
+@pytest.mark.asyncio
+async def test_memory_profile_finds_growth():
+    held = []
+
+    async def allocate():
+        await asyncio.sleep(0.05)
+        held.extend(bytearray(1024) for _ in range(1000))
+
+    task = asyncio.create_task(allocate())
+    profile = await profile_memory(0.2)
+    await task
+
+    top = profile.get_top(1)[0]
+    assert top.size_diff >= 1000 * 1024
+    assert top.traceback[-1].filename == __file__
+    assert "bytearray(1024)" in profile.get_report_text(1)
+    assert "test_profiler.py" in get_memory_profile_text(profile, 1)
@@ -0,0 +1,50 @@
+import os
+
+from src.utils.response_cache import ResponseCache
+
+
+def test_make_key_depends_on_model_and_inputs():
+    inputs = [{"role": "user", "content": "hello"}]
+    assert ResponseCache.make_key("gpt", inputs) == ResponseCache.make_key(
+        "gpt", [{"content": "hello", "role": "user"}]
+    )
+    assert ResponseCache.make_key("gpt", inputs) != ResponseCache.make_key(
+        "gpt-mini", inputs
+    )
+    assert ResponseCache.make_key("gpt", inputs) != ResponseCache.make_key(
+        "gpt", [{"role": "user", "content": "hello!"}]
+    )
+
+
+def test_get_and_put_tracks_hit_rate(tmp_path):
+    cache = ResponseCache(str(tmp_path))
+    assert cache.get("a") is None
+    cache.put("a", "story")
+    assert cache.get("a") == "story"
+    assert cache.hits == 1
+    assert cache.misses == 1
+    assert cache.hit_rate == 0.5
+
+
+def test_evicts_least_recently_used(tmp_path):
+    cache = ResponseCache(str(tmp_path), max_bytes=10)
+    cache.put("a", "aaaa")
+    cache.put("b", "bbbb")
+    assert cache.get("a") == "aaaa"  # b is now least recently used
+    cache.put("c", "cccc")
+
+    assert cache.get("b") is None
+    assert cache.get("a") == "aaaa"
+    assert cache.get("c") == "cccc"
+    assert sorted(os.listdir(tmp_path)) == ["a", "c"]
+
+
+def test_skips_responses_larger_than_cache(tmp_path):
+    cache = ResponseCache(str(tmp_path), max_bytes=3)
+    cache.put("a", "aaaa")
+    assert cache.get("a") is None
+
+
+def test_loads_entries_from_disk(tmp_path):
+    ResponseCache(str(tmp_path)).put("a", "story")
+    assert ResponseCache(str(tmp_path)).get("a") == "story"
@@ -1,9 +1,13 @@
 from datetime import time, datetime
-import src.utils
 
 import pytest
-from src.utils.string_utils import parse_days, parse_time_str, parse_date_str
-import src.utils.string_utils
+from src.utils.clock import VirtualClock
+from src.utils.string_utils import (
+    parse_days,
+    parse_question_filters,
+    parse_time_str,
+    parse_date_str,
+)
 
 
 @pytest.mark.parametrize(
@@ -34,6 +38,24 @@ def test_parse_days_failures(days_str):
         parse_days(days_str)
 
 
+@pytest.mark.parametrize(
+    "filters_str, output",
+    [
+        ("easy", {None: "easy"}),
+        ("Mo=easy,Fr=Hard", {0: "easy", 4: "hard"}),
+        ("weekends=hard, arrays", {5: "hard", 6: "hard", None: "arrays"}),
+    ],
+)
+def test_parse_question_filters(filters_str, output):
+    assert parse_question_filters(filters_str) == output
+
+
+@pytest.mark.parametrize("filters_str", ["", ",", "Mo=", "asdf=easy"])
+def test_parse_question_filters_failures(filters_str):
+    with pytest.raises(ValueError):
+        parse_question_filters(filters_str)
+
+
 @pytest.mark.parametrize(
     "time_str, expected_time",
     [
@@ -123,15 +145,8 @@ def test_parse_time_str_failures(time_str):
         ),
     ],
 )
-def test_parse_date_str(date_str, now_date, expected_date, monkeypatch):
-    # Mock datetime class to override now() to expected date
-    class MockDateTime(datetime):
-        @classmethod
-        def now(cls, tz=None):
-            return now_date
-
-    monkeypatch.setattr(src.utils.string_utils, "datetime", MockDateTime)
-    assert parse_date_str(date_str) == expected_date
+def test_parse_date_str(date_str, now_date, expected_date):
+    assert parse_date_str(date_str, VirtualClock(now_date)) == expected_date
 
 
 @pytest.mark.parametrize(
@@ -142,14 +157,6 @@ def test_parse_date_str(date_str, now_date, expected_date, monkeypatch):
         ("feburary 13, 2025 12:30", datetime(2025, 1, 1)),  # Mispelled months
     ],
 )
-def test_parse_date_str_failures(date_str, now_date, monkeypatch):
-    # Mock datetime class to override now() to expected date
-    class MockDateTime(datetime):
-        @classmethod
-        def now(cls, tz=None):
-            return now_date
-
-    monkeypatch.setattr(src.utils.string_utils, "datetime", MockDateTime)
-
+def test_parse_date_str_failures(date_str, now_date):
     with pytest.raises(ValueError):
-        parse_date_str(date_str)
+        parse_date_str(date_str, VirtualClock(now_date))
@@ -0,0 +1,91 @@
+import asyncio
+import json
+
+import pytest
+
+from src.utils.text import get_trace_text
+from src.utils.tracing import JsonlTraceExporter, Tracer, span, traced
+
+
+@traced()
+async def fetch():
+    await asyncio.sleep(0.01)
+    return parse()
+
+
+@traced("parse_step")
+def parse():
+    return 1
+
+
+@pytest.mark.asyncio
+async def test_spans_nest_under_trace():
+    tracer = Tracer(slow_threshold=60)
+    with tracer.trace("post") as root:
+        assert await fetch() == 1
+        with span("send", channel="bot"):
+            pass
+
+    assert [child.name for child in root.children] == ["fetch", "send"]
+    assert root.children[0].children[0].name == "parse_step"
+    assert root.children[0].duration >= 0.01
+    assert root.children[1].attributes == {"channel": "bot"}
+    assert root.duration >= root.children[0].duration
+    assert list(tracer.recent) == [root]
+    assert tracer.last_slow is None
+
+
+def test_span_outside_trace_does_nothing():
+    with span("orphan") as child:
+        assert child is None
+    assert parse() == 1
+
+
+@pytest.mark.asyncio
+async def test_concurrent_traces_kept_apart():
+    tracer = Tracer()
+
+    async def command(name: str):
+        with tracer.trace(name) as root:
+            await fetch()
+        return root
+
+    roots = await asyncio.gather(command("a"), command("b"))
+    assert [len(root.children) for root in roots] == [1, 1]
+
+
+def test_error_recorded():
+    tracer = Tracer()
+    with pytest.raises(ValueError):
+        with tracer.trace("post") as root:
+            with span("scrape"):
+                raise ValueError()
+    assert root.error == "ValueError"
+    assert root.children[0].error == "ValueError"
+
+
+def test_slow_trace_exported(tmp_path):
+    path = tmp_path / "traces.jsonl"
+    tracer = Tracer(slow_threshold=0, exporter=JsonlTraceExporter(str(path)))
+    with tracer.trace("campaign", outcome="ok"):
+        with span("parse_args"):
+            pass
+
+    assert tracer.last_slow is not None
+    exported = json.loads(path.read_text())
+    assert exported["name"] == "campaign"
+    assert exported["children"][0]["name"] == "parse_args"
+
+    text = get_trace_text(tracer.last_slow)
+    assert "campaign at" in text and "(outcome=ok)" in text
+    assert "  parse_args" in text
+
+
+def test_exporter_rotates(tmp_path):
+    path = tmp_path / "traces.jsonl"
+    tracer = Tracer(slow_threshold=0, exporter=JsonlTraceExporter(str(path), 1))
+    for _ in range(2):
+        with tracer.trace("post"):
+            pass
+    assert len(path.read_text().splitlines()) == 1
+    assert (tmp_path / "traces.jsonl.1").exists()